@@ -4,11 +4,14 @@ from flask_sqlalchemy import SQLAlchemy
 from flask import Flask
 from dotenv import load_dotenv
 import os
+import tempfile
+
+from app.services.banco import SessaoRoteada, configurar_engine, init_banco
 
 load_dotenv()
 
 # Inicialização das extensões
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': SessaoRoteada})
 migrate = Migrate()
 
 
@@ -22,11 +25,72 @@ def create_app(config_name='default'):
         'DATABASE_URL', 'sqlite:///database/dev.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+    # Fila de geração de relatórios PDF
+    app.config['RELATORIOS_JOBS_DIR'] = os.environ.get('RELATORIOS_JOBS_DIR')
+    app.config['RELATORIOS_JOBS_WORKERS'] = int(os.environ.get('RELATORIOS_JOBS_WORKERS', 2))
+    app.config['RELATORIOS_JOBS_FILA_MAX'] = int(os.environ.get('RELATORIOS_JOBS_FILA_MAX', 20))
+    app.config['RELATORIOS_JOBS_TTL'] = int(os.environ.get('RELATORIOS_JOBS_TTL', 3600))
+
+    # Cache de agregações (métricas e resumos)
+    app.config['CACHE_AGREGADOS_MAX'] = int(os.environ.get('CACHE_AGREGADOS_MAX', 256))
+    app.config['CACHE_AGREGADOS_TTL'] = int(os.environ.get('CACHE_AGREGADOS_TTL', 300))
+    app.config['CACHE_AGREGADOS_MARCADOR'] = os.environ.get('CACHE_AGREGADOS_MARCADOR')
+
+    # Máximo de ordens por requisição em POST /api/ordens/bulk
+    app.config['ORDENS_BULK_MAX'] = int(os.environ.get('ORDENS_BULK_MAX', 5000))
+
+    # Log de consultas lentas (0 desativa)
+    app.config['CONSULTAS_LENTAS_MS'] = float(os.environ.get('CONSULTAS_LENTAS_MS', 250))
+    app.config['CONSULTAS_LENTAS_ARQUIVO'] = os.environ.get(
+        'CONSULTAS_LENTAS_ARQUIVO', os.path.join(tempfile.gettempdir(), 'dashboard_os_consultas_lentas.jsonl'))
+    app.config['CONSULTAS_LENTAS_MAX_BYTES'] = int(os.environ.get('CONSULTAS_LENTAS_MAX_BYTES', 10 * 1024 * 1024))
+    app.config['CONSULTAS_LENTAS_BACKUPS'] = int(os.environ.get('CONSULTAS_LENTAS_BACKUPS', 5))
+
+    # Perfil (cProfile) de requisições: ?__profile=1 com o token de
+    # administrador ou 1 a cada PERFIL_AMOSTRAGEM requisições (0 desativa)
+    app.config['PERFIL_DIR'] = os.environ.get(
+        'PERFIL_DIR', os.path.join(tempfile.gettempdir(), 'dashboard_os_perfis'))
+    app.config['PERFIL_AMOSTRAGEM'] = int(os.environ.get('PERFIL_AMOSTRAGEM', 0))
+    app.config['PERFIL_MAX'] = int(os.environ.get('PERFIL_MAX', 200))
+
+    # Feed de eventos de ordens (GET /api/ordens/stream): eventos guardados
+    # para retomar conexões, espera máxima por eventos de outros workers,
+    # eventos pendentes por conexão e intervalo do comentário de keep-alive
+    app.config['EVENTOS_ORDENS_RETENCAO'] = int(os.environ.get('EVENTOS_ORDENS_RETENCAO', 10000))
+    app.config['EVENTOS_ORDENS_INTERVALO'] = float(os.environ.get('EVENTOS_ORDENS_INTERVALO', 1))
+    app.config['EVENTOS_ORDENS_FILA_MAX'] = int(os.environ.get('EVENTOS_ORDENS_FILA_MAX', 1000))
+    app.config['EVENTOS_ORDENS_HEARTBEAT'] = float(os.environ.get('EVENTOS_ORDENS_HEARTBEAT', 15))
+    # 0 desliga a rota neste processo: o gunicorn da API (workers sync) deixa
+    # o feed para o de gunicorn_stream.conf.py
+    app.config['EVENTOS_ORDENS_STREAM'] = os.environ.get('EVENTOS_ORDENS_STREAM', '1') != '0'
+
+    # Sincronização incremental (GET /api/sync): atraso da leitura em relação
+    # ao relógio, para não perder transações em andamento, e dias em que as
+    # exclusões são guardadas (tokens mais antigos precisam recomeçar)
+    app.config['SYNC_MARGEM'] = float(os.environ.get('SYNC_MARGEM', 5))
+    app.config['SYNC_EXCLUSOES_DIAS'] = int(os.environ.get('SYNC_EXCLUSOES_DIAS', 90))
+
+    # Configuração de testes: banco SQLite em memória
+    if config_name == 'testing':
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        app.config['CONSULTAS_LENTAS_MS'] = 0
+
+    # Perfil do engine (pragmas do SQLite, pool, banco de leitura)
+    configurar_engine(app)
+
     # Inicialização das extensões com a aplicação
     db.init_app(app)
+    init_banco(app, db)
     migrate.init_app(app, db)
     CORS(app)
 
+    from app.services.relatorios_jobs import init_jobs
+    init_jobs(app)
+
+    from app.services.serializacao import init_serializacao
+    init_serializacao(app)
+
     # Configura o CORS para permitir o domínio do Vercel
     frontend_url = os.environ.get(
         "FRONTEND_URL", "https://dashboard-os-frontend.onrender.com")
@@ -38,18 +102,75 @@ def create_app(config_name='default'):
         from app.routes.ordens import ordens_bp
         from app.routes.clientes import clientes_bp
         from app.routes.tecnicos import tecnicos_bp
+        from app.routes.cidades import cidades_bp
         from app.routes.relatorios import relatorios_bp
+        from app.routes.admin import admin_bp
+        from app.routes.dashboard import dashboard_bp
+        from app.routes.sync import sync_bp
 
         app.register_blueprint(ordens_bp, url_prefix='/api/ordens')
         app.register_blueprint(clientes_bp, url_prefix='/api/clientes')
         app.register_blueprint(tecnicos_bp, url_prefix='/api/tecnicos')
+        app.register_blueprint(cidades_bp, url_prefix='/api/cidades')
         app.register_blueprint(relatorios_bp, url_prefix='/api/relatorios')
+        app.register_blueprint(admin_bp, url_prefix='/api/admin')
+        app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
+        app.register_blueprint(sync_bp, url_prefix='/api/sync')
     except ImportError as e:
         print(f"Warning: Could not import blueprints: {e}")
 
+    # Resumo diário mantido a cada alteração de ordens de serviço
+    from app.services.resumo_diario import init_resumo_diario
+    init_resumo_diario(app)
+
+    # Contadores por status, técnico e cidade
+    from app.services.contadores_ordens import init_contadores
+    init_contadores(app)
+
+    # Eventos de ordens para o feed SSE
+    from app.services.eventos_ordens import init_eventos_ordens
+    init_eventos_ordens(app)
+
+    # Registro de exclusões para a sincronização incremental
+    from app.services.sincronizacao import init_sincronizacao
+    init_sincronizacao(app)
+
+    # Cache de agregações invalidado pelas alterações de ordens de serviço
+    from app.services.cache_agregados import init_cache_agregados
+    init_cache_agregados(app)
+
+    from app.services.busca_clientes import init_busca_clientes
+    init_busca_clientes(app)
+
+    # Latência, tamanho da resposta e SQL por requisição (/api/metrics)
+    from app.services.metricas import init_metricas, exportar
+    init_metricas(app)
+
+    # Comandos SQL acima de CONSULTAS_LENTAS_MS, com o plano de execução
+    from app.services.consultas_lentas import init_consultas_lentas
+    init_consultas_lentas(app)
+
+    from app.services.perfilador import init_perfilador
+    init_perfilador(app)
+
+    # Comandos de linha de comando (flask <comando>)
+    from app.cli import registrar_comandos
+    registrar_comandos(app)
+
     # Rota de teste
     @app.route('/api/status')
     def status():
         return {'status': 'online', 'version': '2.0.0'}
 
+    # Contadores do cache de agregações
+    @app.route('/api/status/cache')
+    def status_cache():
+        return app.extensions['cache_agregados'].estatisticas()
+
+    # Métricas no formato de texto do Prometheus
+    @app.route('/api/metrics')
+    def metricas():
+        corpo, tipo = exportar()
+        return corpo, 200, {'Content-Type': tipo}
+
     return app
@@ -0,0 +1,176 @@
+import click
+from datetime import date, timedelta
+
+
+def registrar_comandos(app):
+    """Registra os comandos de linha de comando da aplicação (flask <comando>)"""
+
+    @app.cli.command('verificar-planos')
+    def verificar_planos_comando():
+        """Falha se alguma consulta das rotas varrer ordens, clientes ou contatos sem índice"""
+        from app import create_app, db
+        from app.services.planos_consulta import verificar_planos
+
+        # Banco SQLite em memória, com o esquema e os índices dos modelos
+        app_teste = create_app('testing')
+        with app_teste.app_context():
+            db.create_all()
+            problemas = verificar_planos(app_teste, db)
+
+        for url, statement, plano in problemas:
+            click.echo(f'[VARREDURA COMPLETA] {url}', err=True)
+            click.echo(f'    {" ".join(statement.split())}', err=True)
+            for linha in plano:
+                click.echo(f'    -> {linha}', err=True)
+
+        if problemas:
+            raise SystemExit(1)
+        click.echo('Todas as consultas verificadas usam índices.')
+
+    @app.cli.group('resumo-diario')
+    def resumo_diario():
+        """Manutenção do resumo diário de ordens de serviço"""
+
+    @resumo_diario.command('reconstruir')
+    def reconstruir_comando():
+        """Recalcula o resumo diário inteiro"""
+        from app import db
+        from app.services.resumo_diario import reconstruir
+
+        reconstruir()
+        db.session.commit()
+        click.echo('Resumo diário reconstruído.')
+
+    @resumo_diario.command('atualizar')
+    @click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']), required=True,
+                  help='Primeiro dia a recalcular (AAAA-MM-DD)')
+    @click.option('--ate', type=click.DateTime(formats=['%Y-%m-%d']),
+                  help='Último dia a recalcular (padrão: hoje)')
+    def atualizar_comando(desde, ate):
+        """Recalcula apenas os dias do intervalo informado"""
+        from app import db
+        from app.services.resumo_diario import atualizar_dias
+
+        inicio = desde.date()
+        fim = ate.date() if ate else date.today()
+        dias = [inicio + timedelta(days=i) for i in range((fim - inicio).days + 1)]
+        atualizar_dias(dias)
+        db.session.commit()
+        click.echo(f'Resumo diário atualizado: {len(dias)} dia(s).')
+
+
+    @app.cli.group('contadores')
+    def contadores():
+        """Manutenção dos contadores de ordens por status, técnico e cidade"""
+
+    @contadores.command('verificar')
+    @click.option('--corrigir', is_flag=True, help='Regrava os contadores com a recontagem')
+    def verificar_contadores_comando(corrigir):
+        """Compara os contadores com uma recontagem completa das ordens"""
+        from app import db
+        from app.services.cache_agregados import obter_cache
+        from app.services.contadores_ordens import divergencias, reconstruir
+
+        diferencas = divergencias()
+        for dimensao, valor, gravado, recontado in diferencas:
+            click.echo(f'[DIVERGENTE] {dimensao}={valor}: gravado {gravado[0]} '
+                       f'({gravado[1]} instaladas), recontado {recontado[0]} '
+                       f'({recontado[1]} instaladas)', err=True)
+
+        if not diferencas:
+            click.echo('Contadores conferem com a recontagem.')
+        elif corrigir:
+            reconstruir()
+            db.session.commit()
+            obter_cache().invalidar()
+            click.echo(f'Contadores corrigidos: {len(diferencas)} valor(es) divergente(s).')
+        else:
+            raise SystemExit(1)
+
+    @contadores.command('reconstruir')
+    def reconstruir_contadores_comando():
+        """Recalcula todos os contadores"""
+        from app import db
+        from app.services.cache_agregados import obter_cache
+        from app.services.contadores_ordens import reconstruir
+
+        reconstruir()
+        db.session.commit()
+        obter_cache().invalidar()
+        click.echo('Contadores reconstruídos.')
+
+
+    @app.cli.group('busca-clientes')
+    def busca_clientes():
+        """Manutenção do índice de busca textual de clientes"""
+
+    @busca_clientes.command('reconstruir')
+    def reconstruir_busca_comando():
+        """Recria o índice de busca a partir de clientes e contatos"""
+        from app import db
+        from app.services.busca_clientes import indice_disponivel, reconstruir
+
+        if not indice_disponivel():
+            raise click.ClickException('Índice de busca indisponível (requer SQLite; rode flask db upgrade).')
+        total = reconstruir()
+        db.session.commit()
+        click.echo(f'Índice de busca reconstruído: {total} cliente(s).')
+
+    @app.cli.command('benchmark-serializacao')
+    @click.option('--linhas', default=100000, show_default=True,
+                  help='Quantidade de ordens de serviço geradas')
+    @click.option('--repeticoes', default=3, show_default=True,
+                  help='Execuções de cada caminho (vale a melhor)')
+    def benchmark_serializacao_comando(linhas, repeticoes):
+        """Compara to_dict() + JSON padrão com a serialização por colunas"""
+        import time
+        from datetime import datetime
+        from flask.json.provider import DefaultJSONProvider
+        from sqlalchemy import insert
+        from app import create_app, db
+        from app.models import OrdemServico
+        from app.services.serializacao import serializador, orjson
+
+        # Banco SQLite em memória com ordens sintéticas
+        app_teste = create_app('testing')
+        with app_teste.app_context():
+            db.create_all()
+            agora = datetime.now()
+            db.session.execute(insert(OrdemServico.__table__), [{
+                'numero_os': f'BENCH{i:07d}',
+                'status': ('PENDENTE', 'AGENDADA', 'INSTALADA')[i % 3],
+                'data_criacao': agora,
+                'data_instalacao': agora if i % 3 == 2 else None,
+                'data_vencimento': agora,
+                'cliente_id': 1,
+                'tecnico_campo_id': 1,
+                'cidade_id': 1,
+                'fez_na_rua': False,
+                'baixou_no_app': False,
+                'created_at': agora,
+                'updated_at': agora
+            } for i in range(linhas)])
+            db.session.commit()
+
+            provider_padrao = DefaultJSONProvider(app_teste)
+            serializar = serializador(OrdemServico)
+
+            def antes():
+                ordens = OrdemServico.query.all()
+                return provider_padrao.dumps([ordem.to_dict() for ordem in ordens])
+
+            def depois():
+                tuplas = serializar.selecionar(OrdemServico.query).all()
+                return app_teste.json.response(serializar.serializar(tuplas)).get_data()
+
+            caminhos = [('objetos ORM + to_dict() + json', antes),
+                        ('tuplas + serializador' + (' + orjson' if orjson else ''), depois)]
+            for nome, funcao in caminhos:
+                melhor = None
+                for _ in range(repeticoes):
+                    db.session.expunge_all()
+                    inicio = time.perf_counter()
+                    funcao()
+                    duracao = time.perf_counter() - inicio
+                    melhor = duracao if melhor is None else min(melhor, duracao)
+                click.echo(f'{nome}: {melhor:.3f}s ({linhas / melhor:,.0f} linhas/s)')
@@ -0,0 +1,12 @@
+from app.models.cidade import Cidade
+from app.models.cliente import Cliente
+from app.models.tecnico import Tecnico
+from app.models.ordem_servico import OrdemServico
+from app.models.fornecedor import Fornecedor
+from app.models.kit import Kit
+from app.services.contato import Contato
+from app.services.componente import Componente
+from app.models.resumo_diario import ResumoDiarioOrdem
+from app.models.contador_ordem import ContadorOrdem
+from app.models.evento_ordem import EventoOrdem
+from app.models.exclusao import Exclusao
@@ -4,6 +4,12 @@ from datetime import datetime
 class Cliente(db.Model):
     """Modelo para Clientes"""
     __tablename__ = 'clientes'
+    __table_args__ = (
+        # Versão da listagem (ETag): max(updated_at) sem varrer a tabela
+        db.Index('ix_clientes_updated_at', 'updated_at'),
+        # Listagem filtrada por cidade
+        db.Index('ix_clientes_cidade_id', 'cidade_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     nome_completo = db.Column(db.String(100), nullable=False)
@@ -21,7 +27,7 @@ class Cliente(db.Model):
     
     # Relacionamentos reversos
     cidade = db.relationship('Cidade', backref=db.backref('clientes', lazy=True))
-    contatos = db.relationship('Contato', primaryjoin="and_(Contato.entidade_tipo=='cliente', Contato.entidade_id==Cliente.id)", 
+    contatos = db.relationship('Contato', primaryjoin="and_(Contato.entidade_tipo=='cliente', foreign(Contato.entidade_id)==Cliente.id)", 
                               backref=db.backref('cliente', lazy=True), viewonly=True)
     
     def __repr__(self):
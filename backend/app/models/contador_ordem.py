@@ -0,0 +1,29 @@
+from app import db
+
+class ContadorOrdem(db.Model):
+    """Contadores de ordens de serviço por status, técnico de campo e cidade
+
+    Uma linha por (dimensão, valor) com o total de ordens e o total de
+    instaladas, mantida na mesma transação das alterações pelos eventos de
+    sessão em app.services.contadores_ordens.
+    """
+    __tablename__ = 'contadores_ordens'
+    
+    dimensao = db.Column(db.String(20), primary_key=True)
+    valor = db.Column(db.String(50), primary_key=True)
+    
+    # Contadores
+    total = db.Column(db.Integer, nullable=False, default=0)
+    total_instaladas = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<ContadorOrdem {self.dimensao}={self.valor}: {self.total}>'
+    
+    def to_dict(self):
+        """Converte o modelo para dicionário"""
+        return {
+            'dimensao': self.dimensao,
+            'valor': self.valor,
+            'total': self.total,
+            'total_instaladas': self.total_instaladas
+        }
@@ -0,0 +1,21 @@
+from app import db
+from datetime import datetime
+
+class EventoOrdem(db.Model):
+    """Evento de alteração de ordem de serviço (feed de /api/ordens/stream)
+
+    Gravado na mesma transação da alteração, então só existe se ela for
+    confirmada. O id crescente é o id do evento no SSE (Last-Event-ID).
+    """
+    __tablename__ = 'eventos_ordens'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(20), nullable=False)
+    ordem_id = db.Column(db.Integer, nullable=False)
+    momento = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    # Ordem resumida em JSON (campos dos filtros e valores anteriores)
+    dados = db.Column(db.Text, nullable=False)
+    
+    def __repr__(self):
+        return f'<EventoOrdem {self.id} {self.tipo} {self.ordem_id}>'
@@ -0,0 +1,24 @@
+from app import db
+from datetime import datetime
+
+class Exclusao(db.Model):
+    """Registro de exclusão de ordem, cliente ou técnico (tombstone do
+    GET /api/sync)
+
+    Gravado na mesma transação da exclusão pelos eventos de sessão em
+    app.services.sincronizacao; os mais antigos que SYNC_EXCLUSOES_DIAS são
+    descartados.
+    """
+    __tablename__ = 'exclusoes'
+    __table_args__ = (
+        # Leitura incremental por (momento, id) e descarte dos antigos
+        db.Index('ix_exclusoes_momento_id', 'momento', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tabela = db.Column(db.String(30), nullable=False)
+    registro_id = db.Column(db.Integer, nullable=False)
+    momento = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Exclusao {self.tabela} {self.registro_id}>'
@@ -15,7 +15,7 @@ class Fornecedor(db.Model):
     
     # Relacionamentos reversos
     kits = db.relationship('Kit', backref=db.backref('fornecedor', lazy=True))
-    contatos = db.relationship('Contato', primaryjoin="and_(Contato.entidade_tipo=='fornecedor', Contato.entidade_id==Fornecedor.id)", 
+    contatos = db.relationship('Contato', primaryjoin="and_(Contato.entidade_tipo=='fornecedor', foreign(Contato.entidade_id)==Fornecedor.id)", 
                               backref=db.backref('fornecedor', lazy=True), viewonly=True)
     
     def __repr__(self):
@@ -4,6 +4,21 @@ from datetime import datetime
 class OrdemServico(db.Model):
     """Modelo para Ordens de Serviço"""
     __tablename__ = 'ordens_servico'
+    __table_args__ = (
+        # Paginação por cursor e filtros por período de criação
+        db.Index('ix_ordens_servico_data_criacao_id', 'data_criacao', 'id'),
+        # Filtro por status com período de criação ou vencimento
+        db.Index('ix_ordens_servico_status_data_criacao', 'status', 'data_criacao'),
+        db.Index('ix_ordens_servico_status_data_vencimento', 'status', 'data_vencimento'),
+        # Ordenação por vencimento (próximas do vencimento, relatório de pendentes)
+        db.Index('ix_ordens_servico_data_vencimento', 'data_vencimento'),
+        # Filtros e agregações por técnico/cidade (cobrem o status)
+        db.Index('ix_ordens_servico_tecnico_campo_data_criacao', 'tecnico_campo_id', 'data_criacao', 'status'),
+        db.Index('ix_ordens_servico_tecnico_app_data_criacao', 'tecnico_app_id', 'data_criacao', 'status'),
+        db.Index('ix_ordens_servico_cidade_data_criacao', 'cidade_id', 'data_criacao', 'status'),
+        # Versão da listagem (ETag): max(updated_at) sem varrer a tabela
+        db.Index('ix_ordens_servico_updated_at', 'updated_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     numero_os = db.Column(db.String(20), unique=True, nullable=False)
@@ -0,0 +1,42 @@
+from app import db
+
+class ResumoDiarioOrdem(db.Model):
+    """Agregado diário de ordens de serviço (rollup)
+
+    Uma linha por (dia de criação, status, técnico de campo, técnico do app,
+    cidade) com o total de ordens e o total de instaladas. Mantido pelos
+    eventos de sessão em app.services.resumo_diario.
+    """
+    __tablename__ = 'resumo_diario_ordens'
+    __table_args__ = (
+        db.Index('ix_resumo_diario_ordens_dia', 'dia'),
+        db.Index('ix_resumo_diario_ordens_tecnico_campo_dia', 'tecnico_campo_id', 'dia'),
+        db.Index('ix_resumo_diario_ordens_tecnico_app_dia', 'tecnico_app_id', 'dia'),
+        db.Index('ix_resumo_diario_ordens_cidade_dia', 'cidade_id', 'dia'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    dia = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    tecnico_campo_id = db.Column(db.Integer, nullable=False)
+    tecnico_app_id = db.Column(db.Integer, nullable=True)
+    cidade_id = db.Column(db.Integer, nullable=False)
+    
+    # Contadores
+    total = db.Column(db.Integer, nullable=False, default=0)
+    total_instaladas = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<ResumoDiarioOrdem {self.dia} {self.status}: {self.total}>'
+    
+    def to_dict(self):
+        """Converte o modelo para dicionário"""
+        return {
+            'dia': self.dia.isoformat(),
+            'status': self.status,
+            'tecnico_campo_id': self.tecnico_campo_id,
+            'tecnico_app_id': self.tecnico_app_id,
+            'cidade_id': self.cidade_id,
+            'total': self.total,
+            'total_instaladas': self.total_instaladas
+        }
@@ -4,6 +4,10 @@ from datetime import datetime
 class Tecnico(db.Model):
     """Modelo para Técnicos"""
     __tablename__ = 'tecnicos'
+    __table_args__ = (
+        # Alterações desde um instante (GET /api/sync)
+        db.Index('ix_tecnicos_updated_at', 'updated_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(100), nullable=False)
@@ -16,7 +20,7 @@ class Tecnico(db.Model):
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relacionamentos reversos
-    contatos = db.relationship('Contato', primaryjoin="and_(Contato.entidade_tipo=='tecnico', Contato.entidade_id==Tecnico.id)", 
+    contatos = db.relationship('Contato', primaryjoin="and_(Contato.entidade_tipo=='tecnico', foreign(Contato.entidade_id)==Tecnico.id)", 
                               backref=db.backref('tecnico', lazy=True), viewonly=True)
     kits = db.relationship('Kit', backref=db.backref('tecnico', lazy=True))
     
@@ -0,0 +1,44 @@
+from flask import Blueprint, current_app, jsonify, request, send_from_directory, url_for
+
+from app.routes.auth import token_required
+from app.services.perfilador import EXTENSOES, nome_valido
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/consultas-lentas', methods=['GET'])
+@token_required
+def resumo_consultas_lentas():
+    """Comandos SQL mais lentos, agrupados e ordenados pelo tempo total"""
+    log = current_app.extensions.get('consultas_lentas')
+    if log is None:
+        return jsonify({'erro': 'Log de consultas lentas desativado (CONSULTAS_LENTAS_MS=0)'}), 404
+    
+    limite = max(1, min(request.args.get('limite', 20, type=int), 200))
+    desde = request.args.get('desde')
+    
+    return jsonify(log.resumo(limite=limite, desde=desde))
+
+@admin_bp.route('/perfis', methods=['GET'])
+@token_required
+def listar_perfis():
+    """Perfis (cProfile) gravados, do mais recente para o mais antigo"""
+    perfilador = current_app.extensions['perfilador']
+    perfis = perfilador.listar(endpoint=request.args.get('endpoint'))
+    limite = max(1, min(request.args.get('limite', 50, type=int), 500))
+    
+    for perfil in perfis[:limite]:
+        perfil['arquivos'] = {
+            extensao[1:]: url_for('admin.baixar_perfil', nome=perfil['nome'] + extensao)
+            for extensao in EXTENSOES
+        }
+    
+    return jsonify({'total': len(perfis), 'perfis': perfis[:limite]})
+
+@admin_bp.route('/perfis/<nome>', methods=['GET'])
+@token_required
+def baixar_perfil(nome):
+    """Baixa o .pstats, .collapsed ou .json de um perfil"""
+    if not nome_valido(nome):
+        return jsonify({'erro': 'Nome de arquivo inválido'}), 400
+    
+    return send_from_directory(current_app.extensions['perfilador'].diretorio, nome, as_attachment=True)
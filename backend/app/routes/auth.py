@@ -4,11 +4,16 @@ from functools import wraps
 
 auth_bp = Blueprint("auth", __name__)
 
+def token_valido():
+    """Indica se a requisição atual traz o token de administrador"""
+    token = request.headers.get("Authorization")
+    esperado = os.environ.get('AUTH_TOKEN')
+    return bool(esperado) and token == f"Bearer {esperado}"
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = request.headers.get("Authorization")
-        if token == f"Bearer {os.environ.get("AUTH_TOKEN")}":
+        if token_valido():
             return f(*args, **kwargs)
         return jsonify({"message": "Token inválido ou ausente"}), 401
     return decorated
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from app.models import Cidade
 from app import db
+from app.services.serializacao import serializador
+from app.services.etag import etag_colecao, etag_registro, resposta_condicional
 
 cidades_bp = Blueprint('cidades', __name__)
 
@@ -20,19 +22,18 @@ def listar_cidades():
     if regiao:
         query = query.filter(Cidade.regiao.ilike(f'%{regiao}%'))
     
-    # Executar consulta
-    cidades = query.all()
+    # Executar consulta somente se o cliente não tiver a versão atual
+    def responder():
+        serializar = serializador(Cidade)
+        return jsonify(serializar.serializar(serializar.selecionar(query).all()))
     
-    # Converter para dicionários
-    resultado = [cidade.to_dict() for cidade in cidades]
-    
-    return jsonify(resultado)
+    return resposta_condicional(etag_colecao(query, Cidade), responder)
 
 @cidades_bp.route('/<int:id>', methods=['GET'])
 def obter_cidade(id):
     """Obtém detalhes de uma cidade específica"""
     cidade = Cidade.query.get_or_404(id)
-    return jsonify(cidade.to_dict())
+    return resposta_condicional(etag_registro(cidade), lambda: jsonify(cidade.to_dict()))
 
 @cidades_bp.route('/', methods=['POST'])
 def criar_cidade():
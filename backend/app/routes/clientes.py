@@ -1,6 +1,11 @@
 from flask import Blueprint, request, jsonify
 from app.models import Cliente, Cidade, Contato
 from app import db
+from app.services.serializacao import serializador
+from app.services.etag import etag_colecao, etag_registro, gerar_etag, resposta_condicional, versao_contatos
+from app.services.contato import contatos_por_entidade
+from app.services.busca_clientes import buscar
+from app.services.paginacao import LIMITE_PADRAO, LIMITE_MAXIMO
 
 clientes_bp = Blueprint('clientes', __name__)
 
@@ -20,28 +25,48 @@ def listar_clientes():
     if cidade_id:
         query = query.filter(Cliente.cidade_id == cidade_id)
     
-    # Executar consulta
-    clientes = query.all()
+    # include=contatos anexa os contatos de cada linha
+    incluir_contatos = 'contatos' in request.args.get('include', '').split(',')
     
-    # Converter para dicionários
-    resultado = [cliente.to_dict() for cliente in clientes]
+    etag = etag_colecao(query, Cliente)
+    if incluir_contatos:
+        etag = gerar_etag(etag, *versao_contatos('cliente'))
     
-    return jsonify(resultado)
+    # Executar consulta somente se o cliente não tiver a versão atual
+    def responder():
+        serializar = serializador(Cliente)
+        resultado = serializar.serializar(serializar.selecionar(query).all())
+        
+        # Contatos da listagem inteira em uma consulta IN
+        if incluir_contatos:
+            contatos = contatos_por_entidade('cliente', [linha['id'] for linha in resultado])
+            for linha in resultado:
+                linha['contatos'] = contatos[linha['id']]
+        
+        return jsonify(resultado)
+    
+    return resposta_condicional(etag, responder)
 
 @clientes_bp.route('/<int:id>', methods=['GET'])
 def obter_cliente(id):
     """Obtém detalhes de um cliente específico"""
     cliente = Cliente.query.get_or_404(id)
     
-    # Obter contatos do cliente
-    contatos = Contato.query.filter_by(entidade_tipo='cliente', entidade_id=id).all()
-    contatos_dict = [contato.to_dict() for contato in contatos]
+    # A versão inclui os contatos, que fazem parte da resposta
+    etag = etag_registro(cliente, *versao_contatos('cliente', id))
     
-    # Montar resposta
-    resultado = cliente.to_dict()
-    resultado['contatos'] = contatos_dict
+    def responder():
+        # Obter contatos do cliente
+        contatos = Contato.query.filter_by(entidade_tipo='cliente', entidade_id=id).all()
+        contatos_dict = [contato.to_dict() for contato in contatos]
+        
+        # Montar resposta
+        resultado = cliente.to_dict()
+        resultado['contatos'] = contatos_dict
+        
+        return jsonify(resultado)
     
-    return jsonify(resultado)
+    return resposta_condicional(etag, responder)
 
 @clientes_bp.route('/', methods=['POST'])
 def criar_cliente():
@@ -181,28 +206,11 @@ def buscar_cliente():
     if not termo or len(termo) < 3:
         return jsonify({'erro': 'Termo de busca deve ter pelo menos 3 caracteres'}), 400
     
-    # Buscar por nome ou CPF
-    clientes_por_nome_cpf = Cliente.query.filter(
-        (Cliente.nome_completo.ilike(f'%{termo}%')) | 
-        (Cliente.cpf.ilike(f'%{termo}%'))
-    ).all()
-    
-    # Buscar por contato
-    contatos = Contato.query.filter(
-        (Contato.entidade_tipo == 'cliente') & 
-        (Contato.valor.ilike(f'%{termo}%'))
-    ).all()
-    
-    clientes_por_contato = []
-    for contato in contatos:
-        cliente = Cliente.query.get(contato.entidade_id)
-        if cliente and cliente not in clientes_por_nome_cpf:
-            clientes_por_contato.append(cliente)
-    
-    # Combinar resultados
-    todos_clientes = clientes_por_nome_cpf + clientes_por_contato
+    pagina = max(request.args.get('pagina', 1, type=int), 1)
+    limite = max(1, min(request.args.get('limite', LIMITE_PADRAO, type=int), LIMITE_MAXIMO))
     
-    # Converter para dicionários
-    resultado = [cliente.to_dict() for cliente in todos_clientes]
+    # Busca no índice textual (nome, CPF e contatos), ordenada por relevância
+    serializar = serializador(Cliente)
+    clientes = serializar.selecionar(buscar(termo, pagina, limite)).all()
     
-    return jsonify(resultado)
+    return jsonify(serializar.serializar(clientes))
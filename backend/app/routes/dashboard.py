@@ -0,0 +1,107 @@
+from flask import Blueprint, request, jsonify
+from sqlalchemy import Integer, String, cast, literal, select, union_all
+from app.models import Tecnico, Cidade, ContadorOrdem
+from app import db
+from app.services.resumo_diario import subconsulta_agregada
+from app.services.cache_agregados import em_cache
+from datetime import datetime
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+
+def _consulta_resumo(data_inicio, data_fim):
+    """Um único comando com as quatro agregações (UNION ALL), cada linha
+    marcada com a dimensão: (dimensao, id, chave, total_os, total_instaladas).
+
+    Sem período, cidades, técnicos e status vêm dos contadores; só os dias
+    são lidos do resumo diário.
+    """
+    def parte(dimensao, modelo=None):
+        agregado = subconsulta_agregada([dimensao], data_inicio, data_fim)
+        if modelo is None:
+            id_coluna, chave = literal(None, Integer), agregado.c[dimensao]
+        else:
+            # Cidades e técnicos: nome pela chave estrangeira
+            id_coluna, chave = agregado.c[dimensao], modelo.nome
+        consulta = select(
+            literal(dimensao).label('dimensao'),
+            id_coluna.label('id'),
+            cast(chave, String).label('chave'),
+            agregado.c.total_os,
+            agregado.c.total_instaladas
+        ).select_from(agregado)
+        if modelo is not None:
+            consulta = consulta.outerjoin(modelo, modelo.id == agregado.c[dimensao])
+        return consulta
+
+    def parte_contadores(dimensao, modelo=None):
+        if modelo is None:
+            id_coluna, chave = literal(None, Integer), ContadorOrdem.valor
+        else:
+            id_coluna, chave = cast(ContadorOrdem.valor, Integer), modelo.nome
+        consulta = select(
+            literal(dimensao).label('dimensao'),
+            id_coluna.label('id'),
+            cast(chave, String).label('chave'),
+            ContadorOrdem.total.label('total_os'),
+            ContadorOrdem.total_instaladas
+        ).where(ContadorOrdem.dimensao == dimensao)
+        if modelo is not None:
+            consulta = consulta.outerjoin(modelo, cast(modelo.id, String) == ContadorOrdem.valor)
+        return consulta
+
+    por_dimensao = parte if data_inicio or data_fim else parte_contadores
+    return union_all(
+        por_dimensao('cidade_id', Cidade),
+        por_dimensao('tecnico_campo_id', Tecnico),
+        parte('dia'),
+        por_dimensao('status')
+    )
+
+
+@dashboard_bp.route('/resumo', methods=['GET'])
+@em_cache
+def resumo_dashboard():
+    """Totais por cidade, técnico de campo, dia e status no período (lidos do
+    resumo diário e dos contadores em um único comando), com o número de
+    dias com ordens"""
+    try:
+        data_inicio = request.args.get('data_inicio')
+        data_fim = request.args.get('data_fim')
+        data_inicio = datetime.fromisoformat(data_inicio) if data_inicio else None
+        data_fim = datetime.fromisoformat(data_fim) if data_fim else None
+    except ValueError:
+        return jsonify({'erro': 'Datas devem estar no formato ISO (AAAA-MM-DD)'}), 400
+    
+    cidades, tecnicos, datas, status = [], [], [], []
+    for linha in db.session.execute(_consulta_resumo(data_inicio, data_fim)):
+        total, instaladas = int(linha.total_os or 0), int(linha.total_instaladas or 0)
+        if linha.dimensao == 'status':
+            status.append({'status': linha.chave, 'total': total})
+        elif linha.chave is None:
+            # Ordens sem cidade ou sem técnico ficam só nos totais
+            continue
+        elif linha.dimensao == 'cidade_id':
+            cidades.append({'id': linha.id, 'cidade': linha.chave, 'total': total,
+                            'instaladas': instaladas})
+        elif linha.dimensao == 'tecnico_campo_id':
+            tecnicos.append({'id': linha.id, 'tecnico': linha.chave, 'total': total,
+                             'instaladas': instaladas})
+        else:
+            datas.append({'data': linha.chave, 'total': total, 'instaladas': instaladas})
+    
+    cidades.sort(key=lambda item: (-item['total'], item['cidade']))
+    tecnicos.sort(key=lambda item: (-item['total'], item['tecnico']))
+    datas.sort(key=lambda item: item['data'])
+    status.sort(key=lambda item: -item['total'])
+    
+    return jsonify({
+        'data_inicio': data_inicio.isoformat() if data_inicio else None,
+        'data_fim': data_fim.isoformat() if data_fim else None,
+        'total': sum(item['total'] for item in status),
+        'cidades': cidades,
+        'tecnicos': tecnicos,
+        'datas': datas,
+        'dias': len(datas),
+        'status': status
+    })
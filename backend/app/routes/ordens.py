@@ -1,13 +1,33 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
 from app.models import OrdemServico, Cliente, Tecnico, Cidade
 from app import db
+from app.services.resumo_diario import agregar
+from app.services.contadores_ordens import contagens
+from app.services.cache_agregados import em_cache
+from app.services.eventos_ordens import Filtros, gerar_stream
+from app.services.serie_temporal import (
+    AGRUPAMENTOS, INTERVALOS, MAX_PONTOS, MAX_PONTOS_PADRAO, MIN_PONTOS, gerar_serie
+)
+from app.services.serializacao import serializador
+from app.services.etag import etag_colecao, etag_registro, resposta_condicional
+from app.services.ordens_lote import (
+    CAMPOS_OBRIGATORIOS, LoteInvalido, ler_linhas, criar_em_lote, atualizar_status
+)
+from app.services.paginacao import (
+    CursorInvalido, LIMITE_PADRAO, paginar_por_cursor, gerar_array_json
+)
 from datetime import datetime
 
 ordens_bp = Blueprint('ordens', __name__)
 
 @ordens_bp.route('/', methods=['GET'])
 def listar_ordens():
-    """Lista todas as ordens de serviço com filtros opcionais"""
+    """Lista as ordens de serviço com filtros opcionais.
+
+    Sem parâmetros de paginação retorna a lista completa. Com `limite` e/ou
+    `cursor` retorna uma página ordenada por (data_criacao, id) junto com o
+    `next_cursor`. Com `stream=1` envia o array JSON em pedaços.
+    """
     # Parâmetros de filtro
     status = request.args.get('status')
     tecnico_id = request.args.get('tecnico_id')
@@ -32,19 +52,48 @@ def listar_ordens():
         data_fim = datetime.fromisoformat(data_fim)
         query = query.filter(OrdemServico.data_criacao <= data_fim)
     
-    # Executar consulta
-    ordens = query.all()
+    serializar_os = serializador(OrdemServico)
     
-    # Converter para dicionários
-    resultado = [ordem.to_dict() for ordem in ordens]
+    # GET condicional: com a ETag atual responde 304 sem serializar as linhas
+    etag = etag_colecao(query, OrdemServico)
     
-    return jsonify(resultado)
+    def responder():
+        # Streaming: lê as linhas em lotes e envia o array JSON em pedaços
+        if request.args.get('stream') == '1':
+            ordenada = serializar_os.selecionar(query).order_by(
+                OrdemServico.data_criacao, OrdemServico.id)
+            return Response(
+                stream_with_context(gerar_array_json(ordenada, serializar_os)),
+                mimetype='application/json'
+            )
+        
+        # Paginação por cursor (keyset) sobre (data_criacao, id)
+        cursor = request.args.get('cursor')
+        limite = request.args.get('limite', type=int)
+        if cursor or limite:
+            try:
+                linhas, proximo_cursor = paginar_por_cursor(
+                    serializar_os.selecionar(query), OrdemServico.data_criacao, OrdemServico.id,
+                    cursor=cursor, limite=limite or LIMITE_PADRAO
+                )
+            except CursorInvalido as e:
+                return jsonify({'erro': str(e)}), 400
+            
+            return jsonify({
+                'itens': serializar_os.serializar(linhas),
+                'next_cursor': proximo_cursor
+            })
+        
+        # Executar consulta só com as colunas serializadas (sem objetos ORM)
+        return jsonify(serializar_os.serializar(serializar_os.selecionar(query).all()))
+    
+    return resposta_condicional(etag, responder)
 
 @ordens_bp.route('/<int:id>', methods=['GET'])
 def obter_ordem(id):
     """Obtém detalhes de uma ordem de serviço específica"""
     ordem = OrdemServico.query.get_or_404(id)
-    return jsonify(ordem.to_dict())
+    return resposta_condicional(etag_registro(ordem), lambda: jsonify(ordem.to_dict()))
 
 @ordens_bp.route('/', methods=['POST'])
 def criar_ordem():
@@ -52,9 +101,7 @@ def criar_ordem():
     dados = request.json
     
     # Validar dados obrigatórios
-    campos_obrigatorios = ['numero_os', 'status', 'data_criacao', 'data_vencimento', 
-                          'cliente_id', 'tecnico_campo_id', 'cidade_id']
-    for campo in campos_obrigatorios:
+    for campo in CAMPOS_OBRIGATORIOS:
         if campo not in dados:
             return jsonify({'erro': f'Campo obrigatório ausente: {campo}'}), 400
     
@@ -91,6 +138,85 @@ def criar_ordem():
         db.session.rollback()
         return jsonify({'erro': str(e)}), 400
 
+@ordens_bp.route('/bulk', methods=['POST'])
+def criar_ordens_em_lote():
+    """Cria várias ordens de serviço a partir de um array JSON ou NDJSON.
+
+    Todas as linhas são validadas antes da inserção e a resposta traz o
+    resultado de cada uma. Com `tudo_ou_nada=1` nenhuma ordem é criada se
+    alguma linha tiver erro.
+    """
+    tudo_ou_nada = request.args.get('tudo_ou_nada', '').lower() in ('1', 'true')
+    
+    try:
+        linhas = ler_linhas(request, current_app.config['ORDENS_BULK_MAX'])
+    except LoteInvalido as e:
+        return jsonify({'erro': str(e)}), 400
+    
+    if not linhas:
+        return jsonify({'erro': 'Nenhuma ordem enviada'}), 400
+    
+    try:
+        resultados, criadas = criar_em_lote(linhas, tudo_ou_nada)
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 400
+    
+    erros = sum(1 for resultado in resultados if resultado['status'] == 'erro')
+    if not criadas:
+        codigo = 400
+    elif erros:
+        codigo = 207
+    else:
+        codigo = 201
+    
+    return jsonify({
+        'criadas': criadas,
+        'erros': erros,
+        'resultados': resultados
+    }), codigo
+
+@ordens_bp.route('/status', methods=['PATCH'])
+def atualizar_status_em_lote():
+    """Altera o status (e opcionalmente data_instalacao e baixou_no_app) de
+    várias ordens, identificadas por `ids` e/ou `numeros_os`"""
+    dados = request.get_json(silent=True) or {}
+    
+    # Validar dados obrigatórios
+    if not dados.get('status'):
+        return jsonify({'erro': 'Campo obrigatório ausente: status'}), 400
+    ids = dados.get('ids') or []
+    numeros_os = dados.get('numeros_os') or []
+    if not isinstance(ids, list) or not isinstance(numeros_os, list) or not (ids or numeros_os):
+        return jsonify({'erro': 'Informe uma lista de ids e/ou numeros_os'}), 400
+    if len(ids) + len(numeros_os) > current_app.config['ORDENS_BULK_MAX']:
+        return jsonify({'erro': f'Lote excede o máximo de {current_app.config["ORDENS_BULK_MAX"]} ordens'}), 400
+    try:
+        ids = [int(id) for id in ids]
+    except (TypeError, ValueError):
+        return jsonify({'erro': 'ids devem ser números inteiros'}), 400
+    
+    valores = {'status': str(dados['status'])}
+    if 'data_instalacao' in dados:
+        try:
+            valores['data_instalacao'] = (
+                datetime.fromisoformat(dados['data_instalacao']) if dados['data_instalacao'] else None)
+        except (TypeError, ValueError):
+            return jsonify({'erro': f'Data inválida em data_instalacao: {dados["data_instalacao"]}'}), 400
+    if 'baixou_no_app' in dados:
+        if not isinstance(dados['baixou_no_app'], bool):
+            return jsonify({'erro': 'baixou_no_app deve ser true ou false'}), 400
+        valores['baixou_no_app'] = dados['baixou_no_app']
+    
+    try:
+        atualizadas, nao_encontradas = atualizar_status(ids, numeros_os, valores)
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 400
+    
+    return jsonify({
+        'atualizadas': atualizadas,
+        'nao_encontradas': nao_encontradas
+    })
+
 @ordens_bp.route('/<int:id>', methods=['PUT'])
 def atualizar_ordem(id):
     """Atualiza uma ordem de serviço existente"""
@@ -160,21 +286,27 @@ def proximas_vencimento():
     return jsonify(resultado)
 
 @ordens_bp.route('/metricas', methods=['GET'])
+@em_cache
 def metricas_ordens():
-    """Retorna métricas sobre as ordens de serviço"""
-    # Total por status
-    from sqlalchemy import func
-    
-    total_por_status = db.session.query(
-        OrdemServico.status, 
-        func.count(OrdemServico.id)
-    ).group_by(OrdemServico.status).all()
+    """Retorna métricas sobre as ordens de serviço (lidas dos contadores ou,
+    com período, do resumo diário)"""
+    # Parâmetros de filtro
+    data_inicio = request.args.get('data_inicio')
+    data_fim = request.args.get('data_fim')
+    if data_inicio:
+        data_inicio = datetime.fromisoformat(data_inicio)
+    if data_fim:
+        data_fim = datetime.fromisoformat(data_fim)
     
-    # Total geral
-    total_geral = OrdemServico.query.count()
+    # Total e instaladas por status
+    if data_inicio or data_fim:
+        por_status = agregar(['status'], data_inicio, data_fim)
+    else:
+        por_status = contagens('status')
     
-    # Total instaladas
-    total_instaladas = OrdemServico.query.filter(OrdemServico.status == 'INSTALADA').count()
+    # Total geral e total instaladas
+    total_geral = sum(total for total, _ in por_status.values())
+    total_instaladas = sum(instaladas for _, instaladas in por_status.values())
     
     # Taxa de conclusão
     taxa_conclusao = (total_instaladas / total_geral) * 100 if total_geral > 0 else 0
@@ -184,7 +316,86 @@ def metricas_ordens():
         'total_geral': total_geral,
         'total_instaladas': total_instaladas,
         'taxa_conclusao': round(taxa_conclusao, 2),
-        'por_status': {status: total for status, total in total_por_status}
+        'por_status': {status: total for status, (total, _) in por_status.items()}
     }
     
     return jsonify(metricas)
+
+@ordens_bp.route('/serie', methods=['GET'])
+@em_cache
+def serie_ordens():
+    """Série temporal de ordens criadas, agrupada em períodos no SQL.
+
+    Parâmetros: `intervalo` (dia, semana, mes ou trimestre), `agrupar`
+    (status, tecnico ou cidade), `max_pontos` (reduz cada série com LTTB),
+    `data_inicio` e `data_fim`.
+    """
+    intervalo = request.args.get('intervalo', 'dia')
+    agrupar = request.args.get('agrupar') or None
+    max_pontos = request.args.get('max_pontos', MAX_PONTOS_PADRAO, type=int)
+    
+    if intervalo not in INTERVALOS:
+        return jsonify({'erro': f'intervalo deve ser um de: {", ".join(INTERVALOS)}'}), 400
+    if agrupar is not None and agrupar not in AGRUPAMENTOS:
+        return jsonify({'erro': f'agrupar deve ser um de: {", ".join(AGRUPAMENTOS)}'}), 400
+    if not MIN_PONTOS <= max_pontos <= MAX_PONTOS:
+        return jsonify({'erro': f'max_pontos deve estar entre {MIN_PONTOS} e {MAX_PONTOS}'}), 400
+    
+    try:
+        data_inicio = request.args.get('data_inicio')
+        data_fim = request.args.get('data_fim')
+        data_inicio = datetime.fromisoformat(data_inicio) if data_inicio else None
+        data_fim = datetime.fromisoformat(data_fim) if data_fim else None
+    except ValueError:
+        return jsonify({'erro': 'Datas devem estar no formato ISO (AAAA-MM-DD)'}), 400
+    
+    series = gerar_serie(intervalo, agrupar, max_pontos, data_inicio, data_fim)
+    
+    return jsonify({
+        'intervalo': intervalo,
+        'agrupar': agrupar,
+        'max_pontos': max_pontos,
+        'series': series
+    })
+
+@ordens_bp.route('/stream', methods=['GET'])
+def stream_ordens():
+    """Feed de alterações (Server-Sent Events): ordem_criada,
+    ordem_atualizada e ordem_excluida.
+
+    Filtros opcionais `tecnico_id`, `cidade_id` e `status`. Ao reconectar, o
+    navegador envia o cabeçalho Last-Event-ID (ou `ultimo_evento` na query
+    string) e recebe os eventos perdidos; se algum já foi descartado, recebe
+    antes o evento `reiniciar` e deve recarregar as listas.
+    """
+    if not current_app.config['EVENTOS_ORDENS_STREAM']:
+        # Cada conexão prenderia um worker sync da API
+        return jsonify({'erro': 'O feed de ordens é servido pelo gunicorn de gunicorn_stream.conf.py'}), 404
+    
+    try:
+        tecnico_id = request.args.get('tecnico_id')
+        cidade_id = request.args.get('cidade_id')
+        ultimo_evento = request.headers.get('Last-Event-ID') or request.args.get('ultimo_evento')
+        tecnico_id = int(tecnico_id) if tecnico_id else None
+        cidade_id = int(cidade_id) if cidade_id else None
+        ultimo_evento = int(ultimo_evento) if ultimo_evento else None
+    except ValueError:
+        return jsonify({'erro': 'tecnico_id, cidade_id e Last-Event-ID devem ser números inteiros'}), 400
+    
+    filtros = Filtros(tecnico_id, cidade_id, request.args.get('status') or None)
+    canal = current_app.extensions['eventos_ordens']
+    
+    # Assina antes de ler os pendentes para não perder eventos entre os dois
+    assinatura = canal.assinar(filtros)
+    if ultimo_evento is None:
+        pendentes, completo, enviado = [], True, canal.ultimo_id()
+    else:
+        pendentes, completo = canal.pendentes(ultimo_evento, filtros)
+        enviado = ultimo_evento
+    
+    return Response(
+        gerar_stream(canal, assinatura, pendentes, completo, enviado,
+                     current_app.config['EVENTOS_ORDENS_HEARTBEAT']),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -1,25 +1,78 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, current_app, url_for, Response, stream_with_context
+from werkzeug.datastructures import MultiDict
 from app.models import OrdemServico, Cliente, Tecnico, Cidade
+from app.services.contato import subconsulta_contato_principal
+from app.services.relatorios_jobs import CONCLUIDO, FilaCheia
+from app.services.resumo_diario import agregar, subconsulta_agregada
+from app.services.cache_agregados import obter_cache
+from app.services.banco import usar_somente_leitura
 from app import db
-import pandas as pd
 import io
+import csv
+import codecs
 import tempfile
 from datetime import datetime
-from weasyprint import HTML, CSS
-from sqlalchemy import func
+from sqlalchemy import func, case
 
 relatorios_bp = Blueprint('relatorios', __name__)
 
-@relatorios_bp.route('/tecnicos/pdf', methods=['GET'])
-def relatorio_tecnicos_pdf():
-    """Gera relatório PDF para técnicos com ordens de serviço pendentes"""
+class RelatorioInvalido(ValueError):
+    """Parâmetros de relatório inválidos"""
+
+
+def _gerar_pdf(html):
+    # Importado só aqui: o WeasyPrint depende de bibliotecas nativas (pango)
+    # que não precisam existir para o restante da API e para os testes
+    from weasyprint import HTML
+    return HTML(string=html).write_pdf()
+
+
+@relatorios_bp.before_request
+def _ler_do_banco_de_leitura():
+    # Relatórios só consultam: usam a conexão somente leitura, se configurada
+    usar_somente_leitura(db.session)
+
+
+@relatorios_bp.teardown_request
+def _voltar_ao_banco_principal(_erro):
+    usar_somente_leitura(db.session, ativo=False)
+
+
+def _montar_html_tecnicos(args):
+    """Monta o HTML do relatório de ordens pendentes para técnicos.
+
+    Retorna a tupla (html, nome do arquivo PDF).
+    """
     # Parâmetros
-    tecnico_id = request.args.get('tecnico_id', type=int)
-    cidade_id = request.args.get('cidade_id', type=int)
-    dias = request.args.get('dias', 30, type=int)
+    tecnico_id = args.get('tecnico_id', type=int)
+    cidade_id = args.get('cidade_id', type=int)
+    dias = args.get('dias', 30, type=int)
+    
+    # Contato principal de cada cliente, resolvido na mesma consulta
+    contato_principal = subconsulta_contato_principal('cliente')
     
-    # Consulta base
-    query = OrdemServico.query.filter(OrdemServico.status != 'INSTALADA')
+    # Consulta base: ordens, cliente, cidade, técnico e contato em um único JOIN
+    query = db.session.query(
+        OrdemServico.numero_os,
+        OrdemServico.status,
+        OrdemServico.data_vencimento,
+        Cliente.nome_completo,
+        Cliente.endereco,
+        Cliente.bairro,
+        Cliente.ponto_referencia,
+        Cidade.nome.label('cidade_nome'),
+        Cidade.uf.label('cidade_uf'),
+        Tecnico.nome.label('tecnico_nome'),
+        contato_principal.c.valor.label('contato_valor')
+    ).join(
+        Cliente, OrdemServico.cliente_id == Cliente.id
+    ).join(
+        Cidade, OrdemServico.cidade_id == Cidade.id
+    ).join(
+        Tecnico, OrdemServico.tecnico_campo_id == Tecnico.id
+    ).outerjoin(
+        contato_principal, contato_principal.c.entidade_id == Cliente.id
+    ).filter(OrdemServico.status != 'INSTALADA')
     
     # Aplicar filtros
     if tecnico_id:
@@ -30,50 +83,27 @@ def relatorio_tecnicos_pdf():
     # Ordenar por data de vencimento
     query = query.order_by(OrdemServico.data_vencimento)
     
-    # Executar consulta
-    ordens = query.all()
-    
     # Preparar dados para o relatório
     dados_relatorio = []
-    for ordem in ordens:
-        cliente = Cliente.query.get(ordem.cliente_id)
-        tecnico = Tecnico.query.get(ordem.tecnico_campo_id)
-        cidade = Cidade.query.get(ordem.cidade_id)
-        
-        # Obter contato principal do cliente
-        contato_principal = db.session.query(Contato).filter(
-            Contato.entidade_tipo == 'cliente',
-            Contato.entidade_id == cliente.id,
-            Contato.principal == True
-        ).first()
-        
-        if not contato_principal:
-            # Se não houver contato principal, pegar o primeiro
-            contato_principal = db.session.query(Contato).filter(
-                Contato.entidade_tipo == 'cliente',
-                Contato.entidade_id == cliente.id
-            ).first()
-        
-        contato_valor = contato_principal.valor if contato_principal else "Sem contato"
-        
+    for linha in query:
         dados_relatorio.append({
-            'numero_os': ordem.numero_os,
-            'cliente': cliente.nome_completo,
-            'contato': contato_valor,
-            'endereco': f"{cliente.endereco}, {cliente.bairro}, {cidade.nome}-{cidade.uf}",
-            'referencia': cliente.ponto_referencia or "Sem referência",
-            'tecnico': tecnico.nome,
-            'data_vencimento': ordem.data_vencimento.strftime('%d/%m/%Y') if ordem.data_vencimento else "Sem data",
-            'status': ordem.status
+            'numero_os': linha.numero_os,
+            'cliente': linha.nome_completo,
+            'contato': linha.contato_valor or "Sem contato",
+            'endereco': f"{linha.endereco}, {linha.bairro}, {linha.cidade_nome}-{linha.cidade_uf}",
+            'referencia': linha.ponto_referencia or "Sem referência",
+            'tecnico': linha.tecnico_nome,
+            'data_vencimento': linha.data_vencimento.strftime('%d/%m/%Y') if linha.data_vencimento else "Sem data",
+            'status': linha.status
         })
     
     # Gerar HTML para o relatório
     titulo_relatorio = "Relatório de Ordens de Serviço Pendentes"
     if tecnico_id:
-        tecnico = Tecnico.query.get(tecnico_id)
+        tecnico = db.session.get(Tecnico, tecnico_id)
         titulo_relatorio += f" - Técnico: {tecnico.nome}"
     if cidade_id:
-        cidade = Cidade.query.get(cidade_id)
+        cidade = db.session.get(Cidade, cidade_id)
         titulo_relatorio += f" - Cidade: {cidade.nome}-{cidade.uf}"
     
     html_content = f"""
@@ -131,17 +161,24 @@ def relatorio_tecnicos_pdf():
     </html>
     """
     
+    # Nome do arquivo
+    filename = f"relatorio_os_pendentes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    
+    return html_content, filename
+
+@relatorios_bp.route('/tecnicos/pdf', methods=['GET'])
+def relatorio_tecnicos_pdf():
+    """Gera relatório PDF para técnicos com ordens de serviço pendentes"""
+    html_content, filename = _montar_html_tecnicos(request.args)
+    
     # Gerar PDF
-    pdf = HTML(string=html_content).write_pdf()
+    pdf = _gerar_pdf(html_content)
     
     # Criar arquivo temporário
     pdf_file = io.BytesIO()
     pdf_file.write(pdf)
     pdf_file.seek(0)
     
-    # Nome do arquivo
-    filename = f"relatorio_os_pendentes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    
     # Retornar o arquivo
     return send_file(
         pdf_file,
@@ -150,9 +187,56 @@ def relatorio_tecnicos_pdf():
         download_name=filename
     )
 
+# Quantidade de linhas lidas do banco e escritas por pedaço no CSV
+LOTE_CSV = 1000
+
+def _formatar_datas_csv(*indices):
+    """Formatador de linha que converte as colunas de data para dd/mm/aaaa"""
+    def formatar(linha):
+        linha = list(linha)
+        for i in indices:
+            linha[i] = linha[i].strftime('%d/%m/%Y') if linha[i] else None
+        return linha
+    return formatar
+
+def _formatar_taxa_csv(indice):
+    """Formatador de linha que arredonda a taxa de conclusão para 2 casas"""
+    def formatar(linha):
+        linha = list(linha)
+        if linha[indice] is not None:
+            linha[indice] = round(linha[indice], 2)
+        return linha
+    return formatar
+
+def _gerar_csv(cabecalho, linhas, formatar):
+    """Gera o CSV (UTF-8 com BOM para o Excel, separador ';') em pedaços"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';', lineterminator='\n')
+    
+    writer.writerow(cabecalho)
+    yield codecs.BOM_UTF8 + buffer.getvalue().encode('utf-8')
+    
+    pendentes = 0
+    for linha in linhas:
+        if pendentes == 0:
+            buffer.seek(0)
+            buffer.truncate()
+        writer.writerow(formatar(linha))
+        pendentes += 1
+        if pendentes == LOTE_CSV:
+            yield buffer.getvalue().encode('utf-8')
+            pendentes = 0
+    
+    if pendentes:
+        yield buffer.getvalue().encode('utf-8')
+
 @relatorios_bp.route('/admin/csv', methods=['GET'])
 def relatorio_admin_csv():
-    """Gera relatório CSV para administração"""
+    """Gera relatório CSV para administração.
+
+    O arquivo é enviado em streaming: as linhas são lidas do banco em lotes
+    e formatadas uma a uma, sem montar o CSV inteiro em memória.
+    """
     # Parâmetros
     tipo = request.args.get('tipo', 'os')  # os, tecnicos, cidades
     data_inicio = request.args.get('data_inicio')
@@ -193,38 +277,20 @@ def relatorio_admin_csv():
         if data_fim:
             query = query.filter(OrdemServico.data_criacao <= data_fim)
         
-        # Executar consulta
-        resultados = query.all()
-        
-        # Converter para DataFrame
-        df = pd.DataFrame(resultados, columns=[
+        cabecalho = [
             'Número OS', 'Status', 'Data Criação', 'Data Instalação', 'Data Vencimento',
             'Cliente', 'Endereço', 'Bairro', 'Cidade', 'UF', 'Técnico'
-        ])
+        ]
         
         # Formatar datas
-        df['Data Criação'] = df['Data Criação'].dt.strftime('%d/%m/%Y')
-        df['Data Instalação'] = df['Data Instalação'].dt.strftime('%d/%m/%Y')
-        df['Data Vencimento'] = df['Data Vencimento'].dt.strftime('%d/%m/%Y')
+        formatar = _formatar_datas_csv(2, 3, 4)
         
         filename = f"relatorio_ordens_servico_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
     
     elif tipo == 'tecnicos':
         # Relatório de desempenho por técnico
-        subquery = db.session.query(
-            OrdemServico.tecnico_campo_id,
-            func.count(OrdemServico.id).label('total_os'),
-            func.sum(case((OrdemServico.status == 'INSTALADA', 1), else_=0)).label('total_instaladas')
-        )
-        
-        # Aplicar filtros de data
-        if data_inicio:
-            subquery = subquery.filter(OrdemServico.data_criacao >= data_inicio)
-        if data_fim:
-            subquery = subquery.filter(OrdemServico.data_criacao <= data_fim)
-        
-        # Agrupar por técnico
-        subquery = subquery.group_by(OrdemServico.tecnico_campo_id).subquery()
+        # Totais agrupados por técnico no período (lidos do resumo diário)
+        subquery = subconsulta_agregada(['tecnico_campo_id'], data_inicio, data_fim)
         
         # Consulta principal
         query = db.session.query(
@@ -238,36 +304,20 @@ def relatorio_admin_csv():
             subquery, Tecnico.id == subquery.c.tecnico_campo_id
         )
         
-        # Executar consulta
-        resultados = query.all()
-        
-        # Converter para DataFrame
-        df = pd.DataFrame(resultados, columns=[
+        cabecalho = [
             'Nome', 'Identificação Campo', 'Identificação App',
             'Total OS', 'Total Instaladas', 'Taxa Conclusão (%)'
-        ])
+        ]
         
         # Formatar taxa de conclusão
-        df['Taxa Conclusão (%)'] = df['Taxa Conclusão (%)'].round(2)
+        formatar = _formatar_taxa_csv(5)
         
         filename = f"relatorio_desempenho_tecnicos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
     
     elif tipo == 'cidades':
         # Relatório por cidade
-        subquery = db.session.query(
-            OrdemServico.cidade_id,
-            func.count(OrdemServico.id).label('total_os'),
-            func.sum(case((OrdemServico.status == 'INSTALADA', 1), else_=0)).label('total_instaladas')
-        )
-        
-        # Aplicar filtros de data
-        if data_inicio:
-            subquery = subquery.filter(OrdemServico.data_criacao >= data_inicio)
-        if data_fim:
-            subquery = subquery.filter(OrdemServico.data_criacao <= data_fim)
-        
-        # Agrupar por cidade
-        subquery = subquery.group_by(OrdemServico.cidade_id).subquery()
+        # Totais agrupados por cidade no período (lidos do resumo diário)
+        subquery = subconsulta_agregada(['cidade_id'], data_inicio, data_fim)
         
         # Consulta principal
         query = db.session.query(
@@ -281,47 +331,36 @@ def relatorio_admin_csv():
             subquery, Cidade.id == subquery.c.cidade_id
         )
         
-        # Executar consulta
-        resultados = query.all()
-        
-        # Converter para DataFrame
-        df = pd.DataFrame(resultados, columns=[
+        cabecalho = [
             'Cidade', 'UF', 'Região', 'Total OS', 'Total Instaladas', 'Taxa Conclusão (%)'
-        ])
+        ]
         
         # Formatar taxa de conclusão
-        df['Taxa Conclusão (%)'] = df['Taxa Conclusão (%)'].round(2)
+        formatar = _formatar_taxa_csv(5)
         
         filename = f"relatorio_desempenho_cidades_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
     
     else:
         return jsonify({'erro': f'Tipo de relatório inválido: {tipo}'}), 400
     
-    # Criar arquivo CSV
-    csv_file = io.StringIO()
-    df.to_csv(csv_file, index=False, sep=';')
-    csv_file.seek(0)
-    
-    # Converter para bytes
-    csv_bytes = io.BytesIO()
-    csv_bytes.write(csv_file.getvalue().encode('utf-8-sig'))  # UTF-8 com BOM para Excel
-    csv_bytes.seek(0)
-    
-    # Retornar o arquivo
-    return send_file(
-        csv_bytes,
-        mimetype='text/csv',
-        as_attachment=True,
-        download_name=filename
+    # Enviar o arquivo em streaming
+    resposta = Response(
+        stream_with_context(_gerar_csv(cabecalho, query.yield_per(LOTE_CSV), formatar)),
+        mimetype='text/csv'
     )
+    resposta.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return resposta
 
-@relatorios_bp.route('/admin/pdf', methods=['GET'])
-def relatorio_admin_pdf():
-    """Gera relatório PDF para administração"""
+def _montar_html_admin(args):
+    """Monta o HTML do relatório administrativo.
+
+    Retorna a tupla (html, nome do arquivo PDF). Lança RelatorioInvalido
+    para tipos desconhecidos.
+    """
     # Parâmetros
-    tipo = request.args.get('tipo', 'resumo')  # resumo, tecnicos, cidades
-    data_inicio = request.args.get('data_inicio')
-    data_fim = request.args.get('data_fim')
+    tipo = args.get('tipo', 'resumo')  # resumo, tecnicos, cidades
+    data_inicio = args.get('data_inicio')
+    data_fim = args.get('data_fim')
     
     # Converter datas
     if data_inicio:
@@ -341,51 +380,43 @@ def relatorio_admin_pdf():
     
     # Gerar relatório conforme o tipo
     if tipo == 'resumo':
-        # Consulta para total de ordens
-        query_total = OrdemServico.query
-        if data_inicio:
-            query_total = query_total.filter(OrdemServico.data_criacao >= data_inicio)
-        if data_fim:
-            query_total = query_total.filter(OrdemServico.data_criacao <= data_fim)
-        total_ordens = query_total.count()
-        
-        # Consulta para total por status
-        query_status = db.session.query(
-            OrdemServico.status,
-            func.count(OrdemServico.id).label('total')
-        )
-        if data_inicio:
-            query_status = query_status.filter(OrdemServico.data_criacao >= data_inicio)
-        if data_fim:
-            query_status = query_status.filter(OrdemServico.data_criacao <= data_fim)
-        status_counts = query_status.group_by(OrdemServico.status).all()
-        
-        # Consulta para top 5 técnicos
-        query_tecnicos = db.session.query(
-            Tecnico.nome,
-            func.count(OrdemServico.id).label('total')
-        ).join(
-            OrdemServico, OrdemServico.tecnico_campo_id == Tecnico.id
-        )
-        if data_inicio:
-            query_tecnicos = query_tecnicos.filter(OrdemServico.data_criacao >= data_inicio)
-        if data_fim:
-            query_tecnicos = query_tecnicos.filter(OrdemServico.data_criacao <= data_fim)
-        top_tecnicos = query_tecnicos.group_by(Tecnico.nome).order_by(func.count(OrdemServico.id).desc()).limit(5).all()
+        # Agregações do resumo, guardadas no cache de agregações
+        def calcular_resumo():
+            # Total por status no período (lido do resumo diário)
+            por_status = agregar(['status'], data_inicio, data_fim)
+            status_counts = [(status, total) for status, (total, _) in por_status.items()]
+            
+            # Total de ordens
+            total_ordens = sum(total for _, total in status_counts)
+            
+            # Consulta para top 5 técnicos
+            por_tecnico = subconsulta_agregada(['tecnico_campo_id'], data_inicio, data_fim)
+            top_tecnicos = db.session.query(
+                Tecnico.nome,
+                func.sum(por_tecnico.c.total_os).label('total')
+            ).join(
+                por_tecnico, por_tecnico.c.tecnico_campo_id == Tecnico.id
+            ).group_by(Tecnico.nome).order_by(func.sum(por_tecnico.c.total_os).desc()).limit(5).all()
+            
+            # Consulta para top 5 cidades
+            por_cidade = subconsulta_agregada(['cidade_id'], data_inicio, data_fim)
+            top_cidades = db.session.query(
+                Cidade.nome,
+                Cidade.uf,
+                func.sum(por_cidade.c.total_os).label('total')
+            ).join(
+                por_cidade, por_cidade.c.cidade_id == Cidade.id
+            ).group_by(Cidade.nome, Cidade.uf).order_by(func.sum(por_cidade.c.total_os).desc()).limit(5).all()
+            
+            return (
+                status_counts,
+                total_ordens,
+                [tuple(linha) for linha in top_tecnicos],
+                [tuple(linha) for linha in top_cidades]
+            )
         
-        # Consulta para top 5 cidades
-        query_cidades = db.session.query(
-            Cidade.nome,
-            Cidade.uf,
-            func.count(OrdemServico.id).label('total')
-        ).join(
-            OrdemServico, OrdemServico.cidade_id == Cidade.id
-        )
-        if data_inicio:
-            query_cidades = query_cidades.filter(OrdemServico.data_criacao >= data_inicio)
-        if data_fim:
-            query_cidades = query_cidades.filter(OrdemServico.data_criacao <= data_fim)
-        top_cidades = query_cidades.group_by(Cidade.nome, Cidade.uf).order_by(func.count(OrdemServico.id).desc()).limit(5).all()
+        status_counts, total_ordens, top_tecnicos, top_cidades = obter_cache().obter_ou_calcular(
+            ('relatorio_admin_resumo', data_inicio, data_fim), calcular_resumo)
         
         # Gerar HTML para o relatório
         html_content = f"""
@@ -420,5 +451,208 @@ def relatorio_admin_pdf():
         html_content += "<table><tr><th>Status</th><th>Quantidade</th><th>Percentual</th></tr>"
         for status, total in status_counts:
             percentual = (total / total_ordens) * 100 if total_ordens > 0 else 0
-            htm
-(Content truncated due to size limit. Use line ranges to read in chunks)
\ No newline at end of file
+            html_content += f"<tr><td>{status}</td><td>{total}</td><td>{percentual:.2f}%</td></tr>"
+        html_content += "</table></div>"
+        
+        # Adicionar top 5 técnicos
+        html_content += "<h2>Top 5 Técnicos</h2>"
+        html_content += "<table><tr><th>Técnico</th><th>Total de O.S.</th></tr>"
+        for nome, total in top_tecnicos:
+            html_content += f"<tr><td>{nome}</td><td>{total}</td></tr>"
+        html_content += "</table>"
+        
+        # Adicionar top 5 cidades
+        html_content += "<h2>Top 5 Cidades</h2>"
+        html_content += "<table><tr><th>Cidade</th><th>Total de O.S.</th></tr>"
+        for nome, uf, total in top_cidades:
+            html_content += f"<tr><td>{nome}-{uf}</td><td>{total}</td></tr>"
+        html_content += "</table>"
+        
+        filename = f"relatorio_resumo_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    
+    elif tipo in ('tecnicos', 'cidades'):
+        # Relatório de desempenho por técnico ou por cidade
+        if tipo == 'tecnicos':
+            chave = 'tecnico_campo_id'
+            colunas = [Tecnico.nome, Tecnico.identificacao_campo]
+            entidade = Tecnico
+            cabecalho = ['Técnico', 'Identificação Campo']
+            titulo_secao = "Desempenho por Técnico"
+        else:
+            chave = 'cidade_id'
+            colunas = [Cidade.nome, Cidade.uf]
+            entidade = Cidade
+            cabecalho = ['Cidade', 'UF']
+            titulo_secao = "Desempenho por Cidade"
+        
+        # Totais no período (lidos do resumo diário)
+        subquery = subconsulta_agregada([chave], data_inicio, data_fim)
+        
+        resultados = db.session.query(
+            *colunas,
+            subquery.c.total_os,
+            subquery.c.total_instaladas
+        ).join(
+            subquery, entidade.id == subquery.c[chave]
+        ).order_by(subquery.c.total_os.desc()).all()
+        
+        # Gerar HTML para o relatório
+        html_content = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <title>{titulo_relatorio}</title>
+            <style>
+                body {{ font-family: Arial, sans-serif; margin: 20px; }}
+                h1 {{ color: #333366; font-size: 18px; text-align: center; margin-bottom: 10px; }}
+                h2 {{ color: #333366; font-size: 14px; margin-top: 20px; }}
+                p {{ margin: 5px 0; }}
+                table {{ width: 100%; border-collapse: collapse; margin-bottom: 20px; }}
+                th {{ background-color: #333366; color: white; padding: 8px; text-align: left; font-size: 12px; }}
+                td {{ padding: 8px; border-bottom: 1px solid #ddd; font-size: 11px; }}
+                tr:nth-child(even) {{ background-color: #f2f2f2; }}
+                .footer {{ margin-top: 20px; text-align: center; font-size: 10px; color: #666; }}
+            </style>
+        </head>
+        <body>
+            <h1>{titulo_relatorio}</h1>
+            <p style="text-align: center;">{periodo}</p>
+            <h2>{titulo_secao}</h2>
+            <table>
+                <tr>
+                    <th>{cabecalho[0]}</th>
+                    <th>{cabecalho[1]}</th>
+                    <th>Total de O.S.</th>
+                    <th>Instaladas</th>
+                    <th>Taxa de Conclusão</th>
+                </tr>
+        """
+        
+        for coluna_1, coluna_2, total_os, total_instaladas in resultados:
+            taxa = (total_instaladas / total_os) * 100 if total_os else 0
+            html_content += f"""
+                <tr>
+                    <td>{coluna_1}</td>
+                    <td>{coluna_2 or ''}</td>
+                    <td>{total_os}</td>
+                    <td>{total_instaladas}</td>
+                    <td>{taxa:.2f}%</td>
+                </tr>
+            """
+        html_content += "</table>"
+        
+        filename = f"relatorio_desempenho_{tipo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    
+    else:
+        raise RelatorioInvalido(f'Tipo de relatório inválido: {tipo}')
+    
+    html_content += f"""
+        <div class="footer">
+            Relatório gerado em {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
+        </div>
+    </body>
+    </html>
+    """
+    
+    return html_content, filename
+
+@relatorios_bp.route('/admin/pdf', methods=['GET'])
+def relatorio_admin_pdf():
+    """Gera relatório PDF para administração"""
+    try:
+        html_content, filename = _montar_html_admin(request.args)
+    except RelatorioInvalido as e:
+        return jsonify({'erro': str(e)}), 400
+    
+    # Gerar PDF
+    pdf = _gerar_pdf(html_content)
+    
+    # Criar arquivo temporário
+    pdf_file = io.BytesIO()
+    pdf_file.write(pdf)
+    pdf_file.seek(0)
+    
+    # Retornar o arquivo
+    return send_file(
+        pdf_file,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=filename
+    )
+
+# Relatórios que podem ser gerados de forma assíncrona
+RELATORIOS_ASSINCRONOS = {
+    'tecnicos': _montar_html_tecnicos,
+    'admin': _montar_html_admin
+}
+
+def _job_para_dict(meta):
+    """Converte os metadados do job para a resposta da API"""
+    resultado = {
+        'id': meta['id'],
+        'relatorio': meta['relatorio'],
+        'parametros': meta['parametros'],
+        'status': meta['status'],
+        'criado_em': datetime.fromtimestamp(meta['criado_em']).isoformat(),
+        'status_url': url_for('relatorios.status_job', job_id=meta['id'])
+    }
+    if meta.get('erro'):
+        resultado['erro'] = meta['erro']
+    if meta['status'] == CONCLUIDO:
+        resultado['download_url'] = url_for('relatorios.download_job', job_id=meta['id'])
+    return resultado
+
+@relatorios_bp.route('/jobs', methods=['POST'])
+def criar_job():
+    """Enfileira a geração de um relatório PDF e retorna o id do job"""
+    dados = request.json or {}
+    relatorio = dados.get('relatorio')
+    parametros = dados.get('parametros') or {}
+    
+    if relatorio not in RELATORIOS_ASSINCRONOS:
+        return jsonify({'erro': f'Relatório inválido: {relatorio}'}), 400
+    if not isinstance(parametros, dict):
+        return jsonify({'erro': 'Parâmetros devem ser um objeto'}), 400
+    
+    # As consultas rodam aqui; só a renderização do PDF vai para o pool
+    try:
+        html_content, filename = RELATORIOS_ASSINCRONOS[relatorio](MultiDict(parametros))
+    except (RelatorioInvalido, ValueError) as e:
+        return jsonify({'erro': str(e)}), 400
+    
+    try:
+        meta = current_app.extensions['relatorios_jobs'].enviar(
+            relatorio, parametros, html_content, filename)
+    except FilaCheia as e:
+        return jsonify({'erro': str(e)}), 503
+    
+    resposta = jsonify(_job_para_dict(meta))
+    resposta.status_code = 202
+    resposta.headers['Location'] = url_for('relatorios.status_job', job_id=meta['id'])
+    return resposta
+
+@relatorios_bp.route('/jobs/<job_id>', methods=['GET'])
+def status_job(job_id):
+    """Consulta o status de um job de relatório"""
+    meta = current_app.extensions['relatorios_jobs'].obter(job_id)
+    if meta is None:
+        return jsonify({'erro': 'Job não encontrado ou expirado'}), 404
+    return jsonify(_job_para_dict(meta))
+
+@relatorios_bp.route('/jobs/<job_id>/download', methods=['GET'])
+def download_job(job_id):
+    """Baixa o PDF de um job concluído"""
+    jobs = current_app.extensions['relatorios_jobs']
+    meta = jobs.obter(job_id)
+    if meta is None:
+        return jsonify({'erro': 'Job não encontrado ou expirado'}), 404
+    if meta['status'] != CONCLUIDO:
+        return jsonify({'erro': f"Relatório ainda não disponível (status: {meta['status']})"}), 409
+    
+    return send_file(
+        jobs.caminho_pdf(job_id),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=meta['filename']
+    )
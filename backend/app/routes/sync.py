@@ -0,0 +1,26 @@
+from flask import Blueprint, request, jsonify
+from app.services.sincronizacao import (
+    LIMITE_PADRAO, TokenExpirado, TokenInvalido, sincronizar
+)
+
+sync_bp = Blueprint('sync', __name__)
+
+
+@sync_bp.route('', methods=['GET'])
+def sincronizar_alteracoes():
+    """Ordens, clientes e técnicos alterados desde o token `since` e os ids
+    excluídos. Sem `since`, devolve a carga completa; enquanto `mais` for
+    verdadeiro, repita com o token recebido."""
+    try:
+        limite = int(request.args.get('limite', LIMITE_PADRAO))
+    except ValueError:
+        return jsonify({'erro': 'limite deve ser um número inteiro'}), 400
+    
+    try:
+        return jsonify(sincronizar(request.args.get('since'), limite))
+    except TokenInvalido as e:
+        return jsonify({'erro': str(e)}), 400
+    except TokenExpirado:
+        return jsonify({
+            'erro': 'Token anterior às exclusões guardadas; sincronize novamente sem since'
+        }), 410
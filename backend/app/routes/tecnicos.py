@@ -2,6 +2,12 @@ from flask import Blueprint, request, jsonify
 from app.models import Tecnico, Contato, OrdemServico
 from app import db
 from sqlalchemy import func
+from datetime import datetime
+from app.services.resumo_diario import agregar
+from app.services.cache_agregados import em_cache
+from app.services.serializacao import serializador
+from app.services.etag import etag_colecao, etag_registro, gerar_etag, resposta_condicional, versao_contatos
+from app.services.contato import contatos_por_entidade
 
 tecnicos_bp = Blueprint('tecnicos', __name__)
 
@@ -19,28 +25,48 @@ def listar_tecnicos():
         ativo_bool = ativo.lower() == 'true'
         query = query.filter(Tecnico.ativo == ativo_bool)
     
-    # Executar consulta
-    tecnicos = query.all()
+    # include=contatos anexa os contatos de cada linha
+    incluir_contatos = 'contatos' in request.args.get('include', '').split(',')
     
-    # Converter para dicionários
-    resultado = [tecnico.to_dict() for tecnico in tecnicos]
+    etag = etag_colecao(query, Tecnico)
+    if incluir_contatos:
+        etag = gerar_etag(etag, *versao_contatos('tecnico'))
     
-    return jsonify(resultado)
+    # Executar consulta somente se o cliente não tiver a versão atual
+    def responder():
+        serializar = serializador(Tecnico)
+        resultado = serializar.serializar(serializar.selecionar(query).all())
+        
+        # Contatos da listagem inteira em uma consulta IN
+        if incluir_contatos:
+            contatos = contatos_por_entidade('tecnico', [linha['id'] for linha in resultado])
+            for linha in resultado:
+                linha['contatos'] = contatos[linha['id']]
+        
+        return jsonify(resultado)
+    
+    return resposta_condicional(etag, responder)
 
 @tecnicos_bp.route('/<int:id>', methods=['GET'])
 def obter_tecnico(id):
     """Obtém detalhes de um técnico específico"""
     tecnico = Tecnico.query.get_or_404(id)
     
-    # Obter contatos do técnico
-    contatos = Contato.query.filter_by(entidade_tipo='tecnico', entidade_id=id).all()
-    contatos_dict = [contato.to_dict() for contato in contatos]
+    # A versão inclui os contatos, que fazem parte da resposta
+    etag = etag_registro(tecnico, *versao_contatos('tecnico', id))
     
-    # Montar resposta
-    resultado = tecnico.to_dict()
-    resultado['contatos'] = contatos_dict
+    def responder():
+        # Obter contatos do técnico
+        contatos = Contato.query.filter_by(entidade_tipo='tecnico', entidade_id=id).all()
+        contatos_dict = [contato.to_dict() for contato in contatos]
+        
+        # Montar resposta
+        resultado = tecnico.to_dict()
+        resultado['contatos'] = contatos_dict
+        
+        return jsonify(resultado)
     
-    return jsonify(resultado)
+    return resposta_condicional(etag, responder)
 
 @tecnicos_bp.route('/', methods=['POST'])
 def criar_tecnico():
@@ -170,6 +196,7 @@ def excluir_tecnico(id):
         return jsonify({'erro': str(e)}), 400
 
 @tecnicos_bp.route('/<int:id>/desempenho', methods=['GET'])
+@em_cache
 def desempenho_tecnico(id):
     """Obtém métricas de desempenho de um técnico específico"""
     # Verificar se o técnico existe
@@ -179,36 +206,26 @@ def desempenho_tecnico(id):
     data_inicio = request.args.get('data_inicio')
     data_fim = request.args.get('data_fim')
     
-    # Consulta base para ordens de serviço do técnico
-    query = OrdemServico.query.filter(
-        (OrdemServico.tecnico_campo_id == id) | 
-        (OrdemServico.tecnico_app_id == id)
-    )
+    # Ordens em que o técnico atuou em campo ou no app
+    def do_tecnico(modelo):
+        return (modelo.tecnico_campo_id == id) | (modelo.tecnico_app_id == id)
     
-    # Aplicar filtros de data
+    # Converter datas
     if data_inicio:
-        from datetime import datetime
         data_inicio = datetime.fromisoformat(data_inicio)
-        query = query.filter(OrdemServico.data_criacao >= data_inicio)
     if data_fim:
-        from datetime import datetime
         data_fim = datetime.fromisoformat(data_fim)
-        query = query.filter(OrdemServico.data_criacao <= data_fim)
-    
-    # Total de ordens
-    total_ordens = query.count()
-    
-    # Total por status
-    total_por_status = db.session.query(
-        OrdemServico.status, 
-        func.count(OrdemServico.id)
-    ).filter(
-        (OrdemServico.tecnico_campo_id == id) | 
-        (OrdemServico.tecnico_app_id == id)
-    ).group_by(OrdemServico.status).all()
-    
-    # Total instaladas
-    total_instaladas = query.filter(OrdemServico.status == 'INSTALADA').count()
+    
+    # Totais no período (lidos do resumo diário)
+    no_periodo = agregar(['status'], data_inicio, data_fim, filtro=do_tecnico)
+    total_ordens = sum(total for total, _ in no_periodo.values())
+    total_instaladas = sum(instaladas for _, instaladas in no_periodo.values())
+    
+    # Total por status (todo o histórico)
+    total_por_status = [
+        (status, total) for status, (total, _) in
+        agregar(['status'], filtro=do_tecnico).items()
+    ]
     
     # Taxa de conclusão
     taxa_conclusao = (total_instaladas / total_ordens) * 100 if total_ordens > 0 else 0
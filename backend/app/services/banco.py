@@ -0,0 +1,127 @@
+import os
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from flask_sqlalchemy.session import Session
+
+# Perfis de engine, escolhidos pela variável DB_PERFIL.
+#   pragmas: aplicados a cada conexão SQLite aberta
+#   engine: opções de pool para bancos servidor (Postgres, MySQL)
+#   leitura_separada: consultas de relatório usam uma conexão somente leitura
+PERFIS = {
+    'desenvolvimento': {
+        'pragmas': {},
+        'engine': {},
+        'leitura_separada': False,
+    },
+    'producao': {
+        'pragmas': {
+            # Leitores não bloqueiam o escritor (vários workers do gunicorn)
+            'journal_mode': 'WAL',
+            # Com WAL, NORMAL só arrisca a última transação em queda de energia
+            'synchronous': 'NORMAL',
+            # Espera o lock em vez de falhar com "database is locked"
+            'busy_timeout': 5000,
+            # 64 MB de cache de páginas (valor negativo = KiB)
+            'cache_size': -64000,
+            'mmap_size': 256 * 1024 * 1024,
+            'temp_store': 'MEMORY',
+        },
+        'engine': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_pre_ping': True,
+            'pool_recycle': 1800,
+        },
+        'leitura_separada': True,
+    },
+}
+
+PERFIL_PADRAO = 'desenvolvimento'
+
+# Chave do bind somente leitura em SQLALCHEMY_BINDS
+BIND_LEITURA = 'leitura'
+
+# Pragmas que não se aplicam a uma conexão somente leitura
+PRAGMAS_ESCRITA = ('journal_mode', 'synchronous')
+
+
+def _sqlite_em_arquivo(url):
+    return url.drivername.startswith('sqlite') and url.database not in (None, '', ':memory:')
+
+
+def url_somente_leitura(uri):
+    """URL do mesmo arquivo SQLite aberto em modo somente leitura"""
+    url = sa.engine.make_url(uri)
+    banco = url.database
+    if not banco.startswith('file:'):
+        banco = f'file:{banco}'
+    return url.set(database=banco).update_query_dict({'mode': 'ro', 'uri': 'true'})
+
+
+def configurar_engine(app):
+    """Preenche SQLALCHEMY_ENGINE_OPTIONS e o bind de leitura conforme o perfil"""
+    nome = os.environ.get('DB_PERFIL', PERFIL_PADRAO)
+    if nome not in PERFIS:
+        raise ValueError(f'DB_PERFIL inválido: {nome} (opções: {", ".join(PERFIS)})')
+    perfil = PERFIS[nome]
+    app.config['DB_PERFIL'] = nome
+
+    url = sa.engine.make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if not url.drivername.startswith('sqlite'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(perfil['engine'])
+
+    # Banco de leitura: réplica informada ou o próprio arquivo SQLite em modo ro
+    uri_leitura = os.environ.get('DATABASE_URL_LEITURA')
+    if not uri_leitura and perfil['leitura_separada'] and _sqlite_em_arquivo(url):
+        uri_leitura = url_somente_leitura(app.config['SQLALCHEMY_DATABASE_URI'])
+    if uri_leitura:
+        opcoes = {'url': uri_leitura}
+        if not sa.engine.make_url(uri_leitura).drivername.startswith('sqlite'):
+            opcoes.update(perfil['engine'])
+        app.config['SQLALCHEMY_BINDS'] = {BIND_LEITURA: opcoes}
+
+
+def _registrar_pragmas(engine, pragmas, somente_leitura=False):
+    def aplicar(conexao_dbapi, _registro):
+        cursor = conexao_dbapi.cursor()
+        for nome, valor in pragmas.items():
+            if somente_leitura and nome in PRAGMAS_ESCRITA:
+                continue
+            cursor.execute(f'PRAGMA {nome}={valor}')
+        if somente_leitura:
+            cursor.execute('PRAGMA query_only=ON')
+        cursor.close()
+
+    event.listen(engine, 'connect', aplicar)
+
+
+def init_banco(app, db):
+    """Aplica os pragmas do perfil às conexões SQLite em arquivo"""
+    pragmas = PERFIS[app.config['DB_PERFIL']]['pragmas']
+    with app.app_context():
+        for chave, engine in db.engines.items():
+            if _sqlite_em_arquivo(engine.url):
+                _registrar_pragmas(engine, pragmas, somente_leitura=chave == BIND_LEITURA)
+
+
+class SessaoRoteada(Session):
+    """Sessão que envia as consultas ao bind de leitura quando marcada com
+    usar_somente_leitura() (e o bind estiver configurado). Escritas (flush e
+    INSERT/UPDATE/DELETE) continuam no banco principal."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and self.info.get('somente_leitura') and not self._flushing
+                and not getattr(clause, 'is_dml', False)):
+            engine = self._db.engines.get(BIND_LEITURA)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def usar_somente_leitura(sessao, ativo=True):
+    """Marca (ou desmarca) a sessão da requisição atual para ler do bind de leitura"""
+    if ativo:
+        sessao.info['somente_leitura'] = True
+    else:
+        sessao.info.pop('somente_leitura', None)
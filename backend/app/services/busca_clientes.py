@@ -0,0 +1,197 @@
+import re
+
+from sqlalchemy import DDL, case, column, event, func, literal_column, or_, select, table, text
+
+from app import db
+from app.models import Cliente, Contato
+
+# Índice de busca textual de clientes (SQLite FTS5 com tokenizador trigram):
+# uma linha por cliente (rowid = clientes.id) com o nome, o CPF com e sem
+# pontuação e os valores dos contatos. O trigram permite achar qualquer
+# trecho com 3 ou mais caracteres, como o ilike '%termo%' anterior.
+TABELA_BUSCA = 'busca_clientes'
+
+CRIAR_INDICE = DDL(
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_BUSCA} "
+    "USING fts5(nome, cpf, contatos, tokenize='trigram')"
+).execute_if(dialect='sqlite')
+
+REMOVER_INDICE = DDL(f'DROP TABLE IF EXISTS {TABELA_BUSCA}').execute_if(dialect='sqlite')
+
+# Peso de cada coluna do índice no bm25 (nome, cpf, contatos)
+PESOS_BM25 = (10.0, 5.0, 1.0)
+
+# Clientes reindexados por comando
+LOTE_CLIENTES = 500
+
+_busca = table(TABELA_BUSCA, column('rowid'), column('nome'))
+
+# Resultado de indice_disponivel por engine; esquecido quando as tabelas
+# são criadas ou removidas
+_indice_por_engine = {}
+
+
+def so_digitos(valor):
+    return re.sub(r'\D', '', valor or '')
+
+
+def indice_disponivel(conexao=None):
+    """Indica se o banco tem a tabela FTS5 (somente SQLite)"""
+    conexao = conexao or db.session.connection()
+    if conexao.dialect.name != 'sqlite':
+        return False
+    disponivel = _indice_por_engine.get(conexao.engine)
+    if disponivel is None:
+        disponivel = _indice_por_engine[conexao.engine] = conexao.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :nome"),
+            {'nome': TABELA_BUSCA}
+        ).first() is not None
+    return disponivel
+
+
+def _esquecer_indice(alvo, conexao, **kwargs):
+    _indice_por_engine.pop(conexao.engine, None)
+
+
+def _documentos(conexao, ids):
+    """Linhas do índice para os clientes informados (ids inexistentes são ignorados)"""
+    contatos = {}
+    for entidade_id, valor in conexao.execute(
+            select(Contato.entidade_id, Contato.valor).where(
+                Contato.entidade_tipo == 'cliente', Contato.entidade_id.in_(ids))):
+        contatos.setdefault(entidade_id, []).extend((valor, so_digitos(valor)))
+
+    for id, nome, cpf in conexao.execute(
+            select(Cliente.id, Cliente.nome_completo, Cliente.cpf).where(Cliente.id.in_(ids))):
+        yield {
+            'rowid': id,
+            'nome': nome,
+            'cpf': f'{cpf or ""} {so_digitos(cpf)}',
+            'contatos': ' '.join(contatos.get(id, ()))
+        }
+
+
+def atualizar_clientes(ids, conexao=None):
+    """Regrava no índice as linhas dos clientes informados"""
+    conexao = conexao or db.session.connection()
+    ids = sorted(ids)
+    for i in range(0, len(ids), LOTE_CLIENTES):
+        lote = ids[i:i + LOTE_CLIENTES]
+        conexao.execute(_busca.delete().where(_busca.c.rowid.in_(lote)))
+        documentos = list(_documentos(conexao, lote))
+        if documentos:
+            conexao.execute(
+                text(f'INSERT INTO {TABELA_BUSCA} (rowid, nome, cpf, contatos) '
+                     'VALUES (:rowid, :nome, :cpf, :contatos)'),
+                documentos
+            )
+
+
+def reconstruir(conexao=None):
+    """Recria o índice inteiro a partir de clientes e contatos"""
+    conexao = conexao or db.session.connection()
+    conexao.execute(text(f'DELETE FROM {TABELA_BUSCA}'))
+    ids = list(conexao.scalars(select(Cliente.id).order_by(Cliente.id)))
+    atualizar_clientes(ids, conexao)
+    return len(ids)
+
+
+def _clientes_afetados(session):
+    """Clientes cujo nome, CPF ou contatos mudaram no flush"""
+    ids = set()
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, Cliente):
+            estado = db.inspect(obj)
+            if obj in session.dirty and not any(
+                    estado.attrs[c].history.has_changes() for c in ('nome_completo', 'cpf')):
+                continue
+            ids.add(obj.id)
+        elif isinstance(obj, Contato):
+            # Entidade atual e anterior, caso o contato tenha sido movido
+            estado = db.inspect(obj)
+            tipos = estado.attrs['entidade_tipo'].history.sum() or [obj.entidade_tipo]
+            if 'cliente' in tipos:
+                ids.update(estado.attrs['entidade_id'].history.sum() or [obj.entidade_id])
+    ids.discard(None)
+    return ids
+
+
+def _atualizar_apos_flush(session, flush_context):
+    ids = _clientes_afetados(session)
+    if ids and indice_disponivel(session.connection()):
+        atualizar_clientes(ids, session.connection())
+
+
+def _relevancia(termo):
+    """Ordem dos resultados: nome que começa com o termo, palavra do nome que
+    começa com o termo, nome que contém o termo, CPF e, por fim, contatos"""
+    termo = termo.lower()
+    nome = func.lower(Cliente.nome_completo)
+    cpf = func.coalesce(Cliente.cpf, '')
+    digitos = so_digitos(termo)
+    condicoes_cpf = [func.instr(func.lower(cpf), termo) > 0]
+    if digitos:
+        cpf_digitos = func.replace(func.replace(func.replace(cpf, '.', ''), '-', ''), '/', '')
+        condicoes_cpf.append(func.instr(cpf_digitos, digitos) > 0)
+    return case(
+        (func.instr(nome, termo) == 1, 0),
+        (func.instr(' ' + nome, ' ' + termo) > 0, 1),
+        (func.instr(nome, termo) > 0, 2),
+        (or_(*condicoes_cpf), 3),
+        else_=4
+    )
+
+
+def _pagina_do_indice(termo, pagina, limite):
+    """Página de ids já ordenada no próprio índice: nome que começa com o
+    termo, palavra do nome que começa com o termo e, depois, o bm25 (nome
+    pesa mais que CPF e contatos)"""
+    # Termo como frase: casa com qualquer trecho (trigramas consecutivos)
+    frase = '"' + termo.replace('"', '""') + '"'
+    nome = func.lower(_busca.c.nome)
+    termo = termo.lower()
+    faixa = case(
+        (func.instr(nome, termo) == 1, 0),
+        (func.instr(' ' + nome, ' ' + termo) > 0, 1),
+        else_=2
+    )
+    pontuacao = func.bm25(literal_column(TABELA_BUSCA), *PESOS_BM25)
+    return select(
+        _busca.c.rowid.label('id'), faixa.label('faixa'), pontuacao.label('pontuacao')
+    ).where(
+        literal_column(TABELA_BUSCA).op('MATCH')(frase)
+    ).order_by(faixa, pontuacao, _busca.c.rowid).limit(limite).offset((pagina - 1) * limite).subquery()
+
+
+def buscar(termo, pagina=1, limite=100):
+    """Consulta de clientes que contêm o termo no nome, CPF ou contatos,
+    ordenada por relevância e paginada"""
+    if indice_disponivel():
+        # Ordenação e paginação dentro da consulta FTS5: só os ids da página
+        # chegam à tabela de clientes
+        ids = _pagina_do_indice(termo, pagina, limite)
+        return Cliente.query.join(ids, ids.c.id == Cliente.id).order_by(
+            ids.c.faixa, ids.c.pontuacao, ids.c.id)
+
+    # Sem FTS5 (outros bancos): uma única consulta com ilike
+    padrao = f'%{termo}%'
+    por_contato = select(Contato.entidade_id).where(
+        Contato.entidade_tipo == 'cliente', Contato.valor.ilike(padrao))
+    query = Cliente.query.filter(or_(
+        Cliente.nome_completo.ilike(padrao),
+        Cliente.cpf.ilike(padrao),
+        Cliente.id.in_(por_contato)
+    ))
+    query = query.order_by(_relevancia(termo), func.length(Cliente.nome_completo), Cliente.id)
+    return query.limit(limite).offset((pagina - 1) * limite)
+
+
+def init_busca_clientes(app):
+    """Cria o índice junto com as tabelas e o mantém em sincronia por eventos"""
+    if not event.contains(Cliente.__table__, 'after_create', CRIAR_INDICE):
+        event.listen(Cliente.__table__, 'after_create', CRIAR_INDICE)
+        event.listen(Cliente.__table__, 'before_drop', REMOVER_INDICE)
+        event.listen(Cliente.__table__, 'after_create', _esquecer_indice)
+        event.listen(Cliente.__table__, 'after_drop', _esquecer_indice)
+    if not event.contains(db.session, 'after_flush', _atualizar_apos_flush):
+        event.listen(db.session, 'after_flush', _atualizar_apos_flush)
@@ -0,0 +1,183 @@
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from app import db
+
+
+class CacheAgregados:
+    """Cache LRU com TTL para resultados de agregações.
+
+    Invalidado por completo sempre que ordens de serviço mudam. Como cada
+    worker do gunicorn tem seu próprio cache, a invalidação também toca um
+    arquivo marcador: os demais workers comparam o mtime dele a cada leitura
+    e descartam o conteúdo quando ele é mais novo que a última limpeza.
+    """
+
+    def __init__(self, max_itens=256, ttl=300, marcador=None):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self.marcador = marcador
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self._versao_marcador = self._ler_marcador()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirados = 0
+        self.invalidacoes = 0
+
+    def _ler_marcador(self):
+        if not self.marcador:
+            return 0
+        try:
+            return os.stat(self.marcador).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def _sincronizar(self):
+        # Invalidação feita por outro worker
+        versao = self._ler_marcador()
+        if versao != self._versao_marcador:
+            self._itens.clear()
+            self._versao_marcador = versao
+
+    def obter(self, chave):
+        """Retorna o valor em cache ou None"""
+        with self._lock:
+            self._sincronizar()
+            item = self._itens.get(chave)
+            if item is None:
+                self.misses += 1
+                return None
+            valor, expira_em = item
+            if expira_em < time.monotonic():
+                del self._itens[chave]
+                self.expirados += 1
+                self.misses += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.hits += 1
+            return valor
+
+    def guardar(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = (valor, time.monotonic() + self.ttl)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self.evictions += 1
+
+    def obter_ou_calcular(self, chave, calcular):
+        valor = self.obter(chave)
+        if valor is None:
+            valor = calcular()
+            self.guardar(chave, valor)
+        return valor
+
+    def invalidar(self):
+        """Descarta todo o conteúdo, neste e nos demais workers"""
+        with self._lock:
+            self._itens.clear()
+            self.invalidacoes += 1
+            if self.marcador:
+                with open(self.marcador, 'a'):
+                    os.utime(self.marcador)
+                self._versao_marcador = self._ler_marcador()
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'itens': len(self._itens),
+                'max_itens': self.max_itens,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'taxa_acerto': round(self.hits / consultas * 100, 2) if consultas else 0,
+                'evictions': self.evictions,
+                'expirados': self.expirados,
+                'invalidacoes': self.invalidacoes
+            }
+
+
+def obter_cache():
+    return current_app.extensions['cache_agregados']
+
+
+def chave_requisicao():
+    """Chave normalizada: endpoint, argumentos da rota e filtros não vazios"""
+    filtros = tuple(sorted(
+        (nome, valor) for nome, valor in request.args.items(multi=True) if valor != ''
+    ))
+    return (request.endpoint, tuple(sorted((request.view_args or {}).items())), filtros)
+
+
+def em_cache(view):
+    """Decorator que guarda a resposta JSON (status 200) da rota no cache"""
+    @wraps(view)
+    def decorated(*args, **kwargs):
+        cache = obter_cache()
+        chave = chave_requisicao()
+
+        corpo = cache.obter(chave)
+        if corpo is not None:
+            return Response(corpo, mimetype='application/json')
+
+        resposta = current_app.make_response(view(*args, **kwargs))
+        if resposta.status_code == 200 and resposta.is_json:
+            cache.guardar(chave, resposta.get_data())
+        return resposta
+    return decorated
+
+
+def _invalidar_apos_alteracao(mapper, connection, target):
+    # Limpa na primeira alteração da transação e marca a sessão para limpar
+    # de novo após o commit, evitando que uma leitura concorrente recoloque
+    # dados anteriores à transação
+    info = (object_session(target) or db.session).info
+    if not info.get('cache_agregados_sujo'):
+        info['cache_agregados_sujo'] = True
+        obter_cache().invalidar()
+
+
+def _invalidar_apos_commit(session):
+    if session.info.pop('cache_agregados_sujo', False):
+        obter_cache().invalidar()
+
+
+def _descartar_apos_rollback(session, transacao_anterior):
+    # Só quando a transação externa termina: o rollback de um savepoint
+    # mantém as demais alterações pendentes
+    if not session.in_transaction():
+        session.info.pop('cache_agregados_sujo', None)
+
+
+def init_cache_agregados(app):
+    """Cria o cache de agregações e registra a invalidação por eventos"""
+    from app.models import OrdemServico, Tecnico, Cidade
+
+    marcador = app.config.get('CACHE_AGREGADOS_MARCADOR') or os.path.join(
+        tempfile.gettempdir(), 'dashboard_os_cache_agregados')
+    app.extensions['cache_agregados'] = CacheAgregados(
+        max_itens=app.config['CACHE_AGREGADOS_MAX'],
+        ttl=app.config['CACHE_AGREGADOS_TTL'],
+        marcador=marcador
+    )
+
+    # Ordens alteram os totais; técnicos e cidades alteram os nomes exibidos
+    for modelo in (OrdemServico, Tecnico, Cidade):
+        for evento in ('after_insert', 'after_update', 'after_delete'):
+            if not event.contains(modelo, evento, _invalidar_apos_alteracao):
+                event.listen(modelo, evento, _invalidar_apos_alteracao)
+    if not event.contains(db.session, 'after_commit', _invalidar_apos_commit):
+        event.listen(db.session, 'after_commit', _invalidar_apos_commit)
+    if not event.contains(db.session, 'after_soft_rollback', _descartar_apos_rollback):
+        event.listen(db.session, 'after_soft_rollback', _descartar_apos_rollback)
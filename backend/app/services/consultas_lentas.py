@@ -0,0 +1,280 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from datetime import date, datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+from flask import current_app, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Log de consultas lentas: cada comando acima do limite vira uma linha JSON
+# com o SQL normalizado, os parâmetros mascarados, a duração, a rota de
+# origem e o plano de execução (EXPLAIN) obtido logo após o comando.
+LOGGER = 'dashboard_os.consultas_lentas'
+
+# Conjuntos de parâmetros registrados em um executemany
+MAX_CONJUNTOS_PARAMETROS = 3
+
+# Comandos cujo plano pode ser pedido sem executá-los de novo
+_COM_PLANO = re.compile(r'^\s*(SELECT|WITH|UPDATE|DELETE|INSERT\s+INTO\s+\S+\s+SELECT)\b', re.I)
+
+# Textos registrados sem máscara: só valores conhecidos que não identificam
+# ninguém (status das ordens e UFs) e datas ISO. Qualquer outro texto, mesmo
+# curto e em maiúsculas como um nome, é mascarado
+STATUS_CONHECIDOS = frozenset({'PENDENTE', 'AGENDADA', 'INSTALADA', 'CANCELADA'})
+UFS = frozenset({
+    'AC', 'AL', 'AM', 'AP', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MG', 'MS', 'MT', 'PA',
+    'PB', 'PE', 'PI', 'PR', 'RJ', 'RN', 'RO', 'RR', 'RS', 'SC', 'SE', 'SP', 'TO',
+})
+_DATA_ISO = re.compile(r'^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?$')
+
+_LITERAL_TEXTO = re.compile(r"'(?:[^']|'')*'")
+_LITERAL_NUMERO = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_ESPACOS = re.compile(r'\s+')
+_LISTA_PARAMETROS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+
+class ArquivoRotativoCompartilhado(RotatingFileHandler):
+    """RotatingFileHandler seguro entre processos (workers do gunicorn).
+
+    Cada gravação acontece sob um flock no arquivo .lock; se outro processo
+    já rotacionou o arquivo, o stream é reaberto antes de gravar.
+    """
+
+    def __init__(self, caminho, **kwargs):
+        super().__init__(caminho, **kwargs)
+        self._trava = open(caminho + '.lock', 'a')
+
+    def _reabrir_se_rotacionado(self):
+        try:
+            atual = os.stat(self.baseFilename).st_ino
+        except FileNotFoundError:
+            atual = None
+        if self.stream is None or atual != os.fstat(self.stream.fileno()).st_ino:
+            if self.stream is not None:
+                self.stream.close()
+            self.stream = self._open()
+
+    def emit(self, registro):
+        if fcntl is None:
+            return super().emit(registro)
+        fcntl.flock(self._trava, fcntl.LOCK_EX)
+        try:
+            self._reabrir_se_rotacionado()
+            super().emit(registro)
+        finally:
+            fcntl.flock(self._trava, fcntl.LOCK_UN)
+
+    def close(self):
+        super().close()
+        self._trava.close()
+
+
+def normalizar_sql(sql):
+    """SQL sem literais e com espaços e listas IN compactados"""
+    sql = _LITERAL_TEXTO.sub('?', sql)
+    sql = _LITERAL_NUMERO.sub('?', sql)
+    sql = _ESPACOS.sub(' ', sql).strip()
+    return _LISTA_PARAMETROS.sub('(?, ...)', sql)
+
+
+def assinatura(sql_normalizado):
+    return hashlib.sha1(sql_normalizado.encode('utf-8')).hexdigest()[:12]
+
+
+def mascarar(valor):
+    """Mantém números, datas e códigos; textos livres (nomes, CPF, telefone,
+    endereço) viram só o tipo e o tamanho"""
+    if valor is None or isinstance(valor, (bool, int, float)):
+        return valor
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, str):
+        seguro = valor in STATUS_CONHECIDOS or valor in UFS or _DATA_ISO.match(valor)
+        return valor if seguro else f'<texto:{len(valor)}>'
+    if isinstance(valor, bytes):
+        return f'<bytes:{len(valor)}>'
+    return f'<{type(valor).__name__}>'
+
+
+def mascarar_parametros(parametros, executemany=False):
+    if executemany:
+        return {
+            'conjuntos': len(parametros),
+            'primeiros': [mascarar_parametros(p) for p in parametros[:MAX_CONJUNTOS_PARAMETROS]],
+        }
+    if isinstance(parametros, dict):
+        return {chave: mascarar(valor) for chave, valor in parametros.items()}
+    if isinstance(parametros, (list, tuple)):
+        return [mascarar(valor) for valor in parametros]
+    return mascarar(parametros)
+
+
+def capturar_plano(conexao, sql, parametros, executemany=False):
+    """Plano de execução do comando, em um cursor separado (não executa o comando)"""
+    if not _COM_PLANO.match(sql):
+        return None
+    if executemany:
+        parametros = parametros[0] if parametros else ()
+    dialeto = conexao.dialect.name
+    prefixo = 'EXPLAIN QUERY PLAN ' if dialeto == 'sqlite' else 'EXPLAIN '
+    cursor = conexao.connection.cursor()
+    try:
+        cursor.execute(prefixo + sql, parametros)
+        linhas = cursor.fetchall()
+    except Exception as e:
+        return [f'EXPLAIN falhou: {e}']
+    finally:
+        cursor.close()
+    if dialeto == 'sqlite':
+        # (id, parent, notused, detail)
+        return [linha[-1] for linha in linhas]
+    return [' '.join(str(coluna) for coluna in linha) for linha in linhas]
+
+
+class LogConsultasLentas:
+    """Mede cada comando SQL e registra os que passam do limite"""
+
+    def __init__(self, limite_ms, caminho, max_bytes=10 * 1024 * 1024, backups=5):
+        self.limite_ms = limite_ms
+        self.caminho = caminho
+        self.logger = logging.getLogger(LOGGER)
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        if not any(getattr(h, 'baseFilename', None) == os.path.abspath(caminho)
+                   for h in self.logger.handlers):
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+            handler = ArquivoRotativoCompartilhado(caminho, maxBytes=max_bytes, backupCount=backups,
+                                                   encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self.logger.addHandler(handler)
+
+    def arquivos(self):
+        """Arquivo atual e os rotacionados, do mais antigo para o mais novo"""
+        rotacionados = []
+        diretorio = os.path.dirname(os.path.abspath(self.caminho))
+        nome = os.path.basename(self.caminho)
+        for arquivo in os.listdir(diretorio):
+            sufixo = arquivo[len(nome) + 1:]
+            if arquivo.startswith(nome + '.') and sufixo.isdigit():
+                rotacionados.append((int(sufixo), os.path.join(diretorio, arquivo)))
+        return [caminho for _, caminho in sorted(rotacionados, reverse=True)] + [self.caminho]
+
+    def registrar(self, conexao, sql, parametros, executemany, duracao_ms):
+        normalizado = normalizar_sql(sql)
+        entrada = {
+            'momento': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'duracao_ms': round(duracao_ms, 3),
+            'assinatura': assinatura(normalizado),
+            'sql': normalizado,
+            'parametros': mascarar_parametros(parametros, executemany),
+            'rota': None,
+            'pid': os.getpid(),
+        }
+        if has_request_context():
+            entrada['rota'] = {'endpoint': request.endpoint, 'metodo': request.method,
+                               'caminho': request.path}
+        entrada['plano'] = capturar_plano(conexao, sql, parametros, executemany)
+        self.logger.info(json.dumps(entrada, ensure_ascii=False, default=str))
+
+    def resumo(self, limite=20, desde=None):
+        """Comandos agrupados pela assinatura, ordenados pelo tempo total"""
+        grupos = {}
+        for arquivo in self.arquivos():
+            try:
+                f = open(arquivo, encoding='utf-8')
+            except FileNotFoundError:
+                continue
+            with f:
+                for linha in f:
+                    try:
+                        entrada = json.loads(linha)
+                    except ValueError:
+                        continue
+                    if desde and entrada['momento'] < desde:
+                        continue
+                    grupo = grupos.get(entrada['assinatura'])
+                    if grupo is None:
+                        grupo = grupos[entrada['assinatura']] = {
+                            'assinatura': entrada['assinatura'],
+                            'sql': entrada['sql'],
+                            'ocorrencias': 0,
+                            'total_ms': 0.0,
+                            'max_ms': 0.0,
+                            'rotas': {},
+                        }
+                    grupo['ocorrencias'] += 1
+                    grupo['total_ms'] += entrada['duracao_ms']
+                    grupo['max_ms'] = max(grupo['max_ms'], entrada['duracao_ms'])
+                    # Entradas em ordem cronológica: ficam os dados da mais recente
+                    grupo['ultima_ocorrencia'] = entrada['momento']
+                    grupo['ultimos_parametros'] = entrada['parametros']
+                    grupo['plano'] = entrada.get('plano')
+                    rota = (entrada.get('rota') or {}).get('endpoint') or 'fora de requisição'
+                    grupo['rotas'][rota] = grupo['rotas'].get(rota, 0) + 1
+
+        ordenados = sorted(grupos.values(), key=lambda g: g['total_ms'], reverse=True)
+        for grupo in ordenados:
+            grupo['total_ms'] = round(grupo['total_ms'], 3)
+            grupo['media_ms'] = round(grupo['total_ms'] / grupo['ocorrencias'], 3)
+        return {
+            'limite_ms': self.limite_ms,
+            'comandos_distintos': len(ordenados),
+            'ocorrencias': sum(g['ocorrencias'] for g in ordenados),
+            'comandos': ordenados[:limite],
+        }
+
+
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('consultas_lentas_inicio', []).append(time.perf_counter())
+
+
+def _depois(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get('consultas_lentas_inicio')
+    if not inicios:
+        return
+    duracao_ms = (time.perf_counter() - inicios.pop()) * 1000
+    log = current_app.extensions.get('consultas_lentas') if has_app_context() else None
+    if log is not None and duracao_ms >= log.limite_ms:
+        try:
+            log.registrar(conn, statement, parameters, executemany, duracao_ms)
+        except Exception:
+            logging.getLogger(__name__).exception('Falha ao registrar consulta lenta')
+
+
+def _erro(contexto_excecao):
+    conexao = contexto_excecao.connection
+    if conexao is not None:
+        inicios = conexao.info.get('consultas_lentas_inicio')
+        if inicios:
+            inicios.pop()
+
+
+def init_consultas_lentas(app):
+    """Ativa o log se CONSULTAS_LENTAS_MS for maior que zero"""
+    limite_ms = app.config['CONSULTAS_LENTAS_MS']
+    if limite_ms <= 0:
+        return
+
+    log = LogConsultasLentas(
+        limite_ms,
+        app.config['CONSULTAS_LENTAS_ARQUIVO'],
+        max_bytes=app.config['CONSULTAS_LENTAS_MAX_BYTES'],
+        backups=app.config['CONSULTAS_LENTAS_BACKUPS']
+    )
+    app.extensions['consultas_lentas'] = log
+
+    for evento, funcao in (('before_cursor_execute', _antes),
+                           ('after_cursor_execute', _depois),
+                           ('handle_error', _erro)):
+        if not event.contains(Engine, evento, funcao):
+            event.listen(Engine, evento, funcao)
@@ -0,0 +1,181 @@
+from sqlalchemy import (
+    String, case, cast, delete, event, func, insert, literal, select, union_all, update
+)
+
+from app import db
+from app.models import ContadorOrdem, OrdemServico
+
+# Contadores totais (sem período) de ordens por status, técnico de campo e
+# cidade. Cada flush soma +1/-1 nas linhas afetadas: uma mudança de status
+# tira uma ordem do status antigo e a coloca no novo (e ajusta as instaladas
+# do técnico e da cidade). `flask contadores verificar` compara a tabela com
+# uma recontagem completa.
+DIMENSOES = ('status', 'tecnico_campo_id', 'cidade_id')
+
+# Dimensões cujo valor é um id (guardado como texto)
+DIMENSOES_ID = ('tecnico_campo_id', 'cidade_id')
+
+
+def _converter(dimensao, valor):
+    return int(valor) if dimensao in DIMENSOES_ID else valor
+
+
+def somar(deltas, valores, sinal):
+    """Acumula em deltas a entrada (sinal=1) ou saída (sinal=-1) de uma ordem
+    com os valores informados ({dimensão: valor})"""
+    instalada = 1 if valores['status'] == 'INSTALADA' else 0
+    for dimensao in DIMENSOES:
+        delta = deltas.setdefault((dimensao, str(valores[dimensao])), [0, 0])
+        delta[0] += sinal
+        delta[1] += sinal * instalada
+
+
+# Bancos com INSERT ... ON CONFLICT DO UPDATE; nos demais cada chave é
+# atualizada com UPDATE e inserida se não existia
+UPSERT_NATIVO = ('postgresql', 'sqlite')
+
+
+def _upsert(dialeto):
+    tabela = ContadorOrdem.__table__
+    if dialeto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as insert_dialeto
+    else:
+        from sqlalchemy.dialects.sqlite import insert as insert_dialeto
+    comando = insert_dialeto(tabela)
+    return comando.on_conflict_do_update(
+        index_elements=['dimensao', 'valor'],
+        set_={
+            'total': tabela.c.total + comando.excluded.total,
+            'total_instaladas': tabela.c.total_instaladas + comando.excluded.total_instaladas,
+        }
+    )
+
+
+def _atualizar_ou_inserir(conexao, linhas):
+    """Upsert portável: UPDATE somando o delta e INSERT das chaves que não
+    tinham linha"""
+    tabela = ContadorOrdem.__table__
+    for linha in linhas:
+        resultado = conexao.execute(
+            update(tabela)
+            .where(tabela.c.dimensao == linha['dimensao'], tabela.c.valor == linha['valor'])
+            .values(total=tabela.c.total + linha['total'],
+                    total_instaladas=tabela.c.total_instaladas + linha['total_instaladas']))
+        if resultado.rowcount == 0:
+            conexao.execute(insert(tabela).values(**linha))
+
+
+def aplicar(deltas, conexao=None):
+    """Grava os deltas acumulados com um único upsert (executemany)"""
+    conexao = conexao or db.session.connection()
+    linhas = [
+        {'dimensao': dimensao, 'valor': valor, 'total': total, 'total_instaladas': instaladas}
+        for (dimensao, valor), (total, instaladas) in deltas.items()
+        if total or instaladas
+    ]
+    if not linhas:
+        return
+    if conexao.dialect.name in UPSERT_NATIVO:
+        conexao.execute(_upsert(conexao.dialect.name), linhas)
+    else:
+        _atualizar_ou_inserir(conexao, linhas)
+    if any(linha['total'] < 0 for linha in linhas):
+        # Técnicos e cidades sem nenhuma ordem saem da tabela
+        conexao.execute(delete(ContadorOrdem.__table__).where(ContadorOrdem.total == 0))
+
+
+def valores_anteriores(estado, campos=DIMENSOES):
+    """Valores dos campos antes das alterações pendentes do objeto"""
+    valores = {}
+    for campo in campos:
+        historico = estado.attrs[campo].history
+        if historico.deleted:
+            valores[campo] = historico.deleted[0]
+        elif historico.unchanged:
+            valores[campo] = historico.unchanged[0]
+        else:
+            valores[campo] = getattr(estado.obj(), campo)
+    return valores
+
+
+def _deltas_do_flush(session):
+    deltas = {}
+    for obj in session.new:
+        if isinstance(obj, OrdemServico):
+            somar(deltas, {d: getattr(obj, d) for d in DIMENSOES}, 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, OrdemServico):
+            somar(deltas, valores_anteriores(db.inspect(obj)), -1)
+
+    for obj in session.dirty:
+        if not isinstance(obj, OrdemServico) or obj in session.deleted:
+            continue
+        estado = db.inspect(obj)
+        if not any(estado.attrs[d].history.has_changes() for d in DIMENSOES):
+            continue
+        somar(deltas, valores_anteriores(estado), -1)
+        somar(deltas, {d: getattr(obj, d) for d in DIMENSOES}, 1)
+    return deltas
+
+
+def _atualizar_apos_flush(session, flush_context):
+    deltas = _deltas_do_flush(session)
+    if deltas:
+        aplicar(deltas, session.connection())
+
+
+def init_contadores(app):
+    """Mantém os contadores atualizados na mesma transação das alterações"""
+    if not event.contains(db.session, 'after_flush', _atualizar_apos_flush):
+        event.listen(db.session, 'after_flush', _atualizar_apos_flush)
+
+
+def contagens(dimensao):
+    """{valor: (total, total_instaladas)} de uma dimensão"""
+    return {
+        _converter(dimensao, valor): (total, instaladas)
+        for valor, total, instaladas in db.session.execute(
+            select(ContadorOrdem.valor, ContadorOrdem.total, ContadorOrdem.total_instaladas)
+            .where(ContadorOrdem.dimensao == dimensao))
+    }
+
+
+def _select_recontagem():
+    """Recontagem completa a partir de ordens_servico, no formato da tabela"""
+    instaladas = func.sum(case((OrdemServico.status == 'INSTALADA', 1), else_=0))
+    return union_all(*[
+        select(
+            literal(dimensao).label('dimensao'),
+            cast(getattr(OrdemServico, dimensao), String).label('valor'),
+            func.count(OrdemServico.id).label('total'),
+            instaladas.label('total_instaladas')
+        ).group_by(getattr(OrdemServico, dimensao))
+        for dimensao in DIMENSOES
+    ])
+
+
+def reconstruir(conexao=None):
+    """Recalcula todos os contadores a partir de ordens_servico"""
+    conexao = conexao or db.session.connection()
+    conexao.execute(delete(ContadorOrdem.__table__))
+    conexao.execute(insert(ContadorOrdem.__table__).from_select(
+        ['dimensao', 'valor', 'total', 'total_instaladas'], _select_recontagem()))
+
+
+def divergencias(conexao=None):
+    """Compara a tabela com uma recontagem completa.
+
+    Retorna [(dimensao, valor, (total, instaladas) gravado, recontado)] só
+    para os valores que diferem.
+    """
+    conexao = conexao or db.session.connection()
+    recontado = {(d, v): (int(t), int(i or 0)) for d, v, t, i in conexao.execute(_select_recontagem())}
+    gravado = {(d, v): (t, i) for d, v, t, i in conexao.execute(
+        select(ContadorOrdem.dimensao, ContadorOrdem.valor,
+               ContadorOrdem.total, ContadorOrdem.total_instaladas))}
+    return [
+        (dimensao, valor, gravado.get((dimensao, valor), (0, 0)), recontado.get((dimensao, valor), (0, 0)))
+        for dimensao, valor in sorted(gravado.keys() | recontado.keys())
+        if gravado.get((dimensao, valor), (0, 0)) != recontado.get((dimensao, valor), (0, 0))
+    ]
@@ -4,6 +4,10 @@ from datetime import datetime
 class Contato(db.Model):
     """Modelo para Contatos"""
     __tablename__ = 'contatos'
+    __table_args__ = (
+        # Busca dos contatos de uma entidade (relação polimórfica)
+        db.Index('ix_contatos_entidade', 'entidade_tipo', 'entidade_id', 'principal'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     entidade_tipo = db.Column(db.String(20), nullable=False)  # 'cliente', 'tecnico', 'fornecedor'
@@ -31,3 +35,44 @@ class Contato(db.Model):
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
+
+
+def subconsulta_contato_principal(entidade_tipo):
+    """Subconsulta com um único contato por entidade: o principal ou, na falta
+    dele, o primeiro cadastrado. Colunas: entidade_id, valor."""
+    from sqlalchemy import func, case
+    
+    posicao = func.row_number().over(
+        partition_by=Contato.entidade_id,
+        order_by=(case((Contato.principal == True, 0), else_=1), Contato.id)
+    ).label('posicao')
+    
+    contatos = db.session.query(
+        Contato.entidade_id,
+        Contato.valor,
+        posicao
+    ).filter(Contato.entidade_tipo == entidade_tipo).subquery()
+    
+    return db.session.query(
+        contatos.c.entidade_id,
+        contatos.c.valor
+    ).filter(contatos.c.posicao == 1).subquery()
+
+
+# Quantidade máxima de ids por consulta IN
+LOTE_IDS = 500
+
+
+def contatos_por_entidade(entidade_tipo, ids):
+    """Contatos de várias entidades do mesmo tipo, buscados com IN em vez de
+    uma consulta por entidade. Retorna {entidade_id: [contato_dict, ...]}."""
+    ids = list(ids)
+    resultado = {id: [] for id in ids}
+    for i in range(0, len(ids), LOTE_IDS):
+        contatos = Contato.query.filter(
+            Contato.entidade_tipo == entidade_tipo,
+            Contato.entidade_id.in_(ids[i:i + LOTE_IDS])
+        ).order_by(Contato.id).all()
+        for contato in contatos:
+            resultado[contato.entidade_id].append(contato.to_dict())
+    return resultado
@@ -1,96 +1,153 @@
-import pandas as pd
+"""Converte a planilha geral de ordens de serviço nos arquivos JSON do dashboard.
+
+Uso:
+    python -m app.services.converter_dados PLANILHA.xlsx [--saida DIRETORIO]
+"""
+import argparse
 import json
 import os
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Aba CONSOLIDADO: colunas lidas (pela posição) e seus nomes
+COLUNAS_CONSOLIDADO = [
+    'status', 'data', 'os', 'tecnico_campo', 'fez_rua', 'baixou_app',
+    'tecnico_app', 'nome_cliente', 'celular', 'endereco', 'bairro',
+    'cidade', 'uf', 'referencia', 'cpf', 'cep'
+]
+
+# Tudo é texto, exceto a data; evita a inferência de tipos do pandas e
+# preserva zeros à esquerda em OS, CPF, CEP e celular
+TIPOS_CONSOLIDADO = {coluna: str for coluna in COLUNAS_CONSOLIDADO if coluna != 'data'}
+
+ABA_CONSOLIDADO = 'CONSOLIDADO'
+ABA_TECNICOS = 'TÉCNICOS'
+ABA_KITS = 'CONTAGEM DE KITS E INSTALAÇÕES-'
+
+# Diretório de saída padrão para os arquivos JSON
+SAIDA_PADRAO = os.path.dirname(os.path.abspath(__file__))
+
+
+@contextmanager
+def etapa(nome, tempos):
+    """Mede a duração de uma etapa e guarda em tempos[nome]"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tempos[nome] = time.perf_counter() - inicio
+
+
+def salvar_json(dados, diretorio, nome_arquivo):
+    with open(os.path.join(diretorio, nome_arquivo), 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+
+
+def ler_consolidado(planilha):
+    """Lê a aba CONSOLIDADO só com as colunas usadas e tipos explícitos"""
+    df = pd.read_excel(
+        planilha,
+        sheet_name=ABA_CONSOLIDADO,
+        usecols=range(len(COLUNAS_CONSOLIDADO)),
+        names=COLUNAS_CONSOLIDADO,
+        header=0,
+        dtype=TIPOS_CONSOLIDADO
+    )
+    return df
+
+
+def contar_por(serie, nome):
+    """Total de linhas por valor não vazio, na ordem da primeira ocorrência"""
+    serie = serie[serie.notna() & (serie != '')]
+    totais = serie.groupby(serie, sort=False).size()
+    return [{nome: valor, 'total': int(total)} for valor, total in totais.items()]
+
+
+def agregar_consolidado(df):
+    """Totais por cidade, técnico de campo e dia, com um groupby por agregado"""
+    # Datas convertidas uma única vez (inválidas viram NaT e são ignoradas)
+    datas = pd.to_datetime(df['data'], errors='coerce').dt.strftime('%Y-%m-%d')
+    return {
+        'dados_cidades.json': contar_por(df['cidade'], 'cidade'),
+        'dados_tecnicos_count.json': contar_por(df['tecnico_campo'], 'tecnico'),
+        'dados_datas.json': contar_por(datas, 'data'),
+    }
+
+
+def registros_consolidado(df):
+    """Linhas da aba no formato do dados_os.json"""
+    saida = df.fillna('')
+    saida['data'] = saida['data'].astype(str)
+    return saida.to_dict(orient='records')
+
+
+def converter(caminho_planilha, diretorio_saida=SAIDA_PADRAO):
+    """Gera os arquivos JSON a partir da planilha e retorna o tempo de cada etapa"""
+    tempos = {}
+    os.makedirs(diretorio_saida, exist_ok=True)
+
+    # O arquivo é aberto uma única vez para todas as abas
+    with etapa('abrir planilha', tempos):
+        planilha = pd.ExcelFile(caminho_planilha)
+
+    with planilha:
+        # Converter dados da aba CONSOLIDADO
+        df_consolidado = None
+        try:
+            with etapa('ler CONSOLIDADO', tempos):
+                df_consolidado = ler_consolidado(planilha)
+            with etapa('gravar dados_os.json', tempos):
+                salvar_json(registros_consolidado(df_consolidado), diretorio_saida, 'dados_os.json')
+            print('Arquivo JSON de OS criado com sucesso')
+        except Exception as e:
+            print(f"Erro ao processar aba {ABA_CONSOLIDADO}: {e}")
+
+        # Converter as abas copiadas sem transformação
+        for aba, nome_arquivo, descricao in (
+                (ABA_TECNICOS, 'dados_tecnicos.json', 'técnicos'),
+                (ABA_KITS, 'dados_kits.json', 'kits')):
+            try:
+                with etapa(f'ler {aba}', tempos):
+                    df = planilha.parse(aba).fillna('')
+                with etapa(f'gravar {nome_arquivo}', tempos):
+                    salvar_json(df.to_dict(orient='records'), diretorio_saida, nome_arquivo)
+                print(f'Arquivo JSON de {descricao} criado com sucesso')
+            except Exception as e:
+                print(f"Erro ao processar aba {aba}: {e}")
+
+    # Gerar dados agregados para o dashboard
+    if df_consolidado is not None:
+        try:
+            with etapa('agregar', tempos):
+                agregados = agregar_consolidado(df_consolidado)
+            with etapa('gravar agregados', tempos):
+                for nome_arquivo, dados in agregados.items():
+                    salvar_json(dados, diretorio_saida, nome_arquivo)
+            print('Arquivos JSON de dados agregados criados com sucesso')
+        except Exception as e:
+            print(f"Erro ao gerar dados agregados: {e}")
+
+    return tempos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Converte a planilha geral de OS nos arquivos JSON do dashboard')
+    parser.add_argument('planilha', help='Caminho do arquivo .xlsx')
+    parser.add_argument('--saida', default=SAIDA_PADRAO,
+                        help='Diretório dos arquivos JSON (padrão: %(default)s)')
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    tempos = converter(args.planilha, args.saida)
+
+    print('\nTempo por etapa:')
+    for nome, duracao in tempos.items():
+        print(f'  {nome:<45} {duracao:8.3f}s')
+    print(f'  {"total":<45} {time.perf_counter() - inicio:8.3f}s')
+
 
-# Diretório de saída para os arquivos JSON
-output_dir = os.path.dirname(os.path.abspath(__file__))
-
-# Caminho do arquivo Excel
-excel_file = '/home/ubuntu/upload/PLANILHA GERAL O.S MAIO COM PAINEL G-DRIVE-ATT .xlsx'
-
-# Converter dados da aba CONSOLIDADO
-try:
-    df_consolidado = pd.read_excel(excel_file, sheet_name='CONSOLIDADO')
-    df_consolidado.columns = [
-        'status', 'data', 'os', 'tecnico_campo', 'fez_rua', 'baixou_app', 
-        'tecnico_app', 'nome_cliente', 'celular', 'endereco', 'bairro', 
-        'cidade', 'uf', 'referencia', 'cpf', 'cep'
-    ]
-    df_consolidado = df_consolidado.fillna('')
-    df_consolidado['data'] = df_consolidado['data'].astype(str)
-    json_data = df_consolidado.to_dict(orient='records')
-    
-    with open(os.path.join(output_dir, 'dados_os.json'), 'w', encoding='utf-8') as f:
-        json.dump(json_data, f, ensure_ascii=False, indent=2)
-    print('Arquivo JSON de OS criado com sucesso')
-except Exception as e:
-    print(f"Erro ao processar aba CONSOLIDADO: {e}")
-
-# Converter dados da aba TÉCNICOS
-try:
-    df_tecnicos = pd.read_excel(excel_file, sheet_name='TÉCNICOS')
-    df_tecnicos = df_tecnicos.fillna('')
-    json_tecnicos = df_tecnicos.to_dict(orient='records')
-    
-    with open(os.path.join(output_dir, 'dados_tecnicos.json'), 'w', encoding='utf-8') as f:
-        json.dump(json_tecnicos, f, ensure_ascii=False, indent=2)
-    print('Arquivo JSON de técnicos criado com sucesso')
-except Exception as e:
-    print(f"Erro ao processar aba TÉCNICOS: {e}")
-
-# Converter dados da aba CONTAGEM DE KITS E INSTALAÇÕES
-try:
-    df_kits = pd.read_excel(excel_file, sheet_name='CONTAGEM DE KITS E INSTALAÇÕES-')
-    df_kits = df_kits.fillna('')
-    json_kits = df_kits.to_dict(orient='records')
-    
-    with open(os.path.join(output_dir, 'dados_kits.json'), 'w', encoding='utf-8') as f:
-        json.dump(json_kits, f, ensure_ascii=False, indent=2)
-    print('Arquivo JSON de kits criado com sucesso')
-except Exception as e:
-    print(f"Erro ao processar aba CONTAGEM DE KITS E INSTALAÇÕES-: {e}")
-
-# Gerar dados agregados para o dashboard
-try:
-    # Dados por cidade
-    cidades = df_consolidado['cidade'].unique()
-    dados_cidades = []
-    
-    for cidade in cidades:
-        if cidade:  # Ignorar valores vazios
-            count = len(df_consolidado[df_consolidado['cidade'] == cidade])
-            dados_cidades.append({'cidade': cidade, 'total': count})
-    
-    with open(os.path.join(output_dir, 'dados_cidades.json'), 'w', encoding='utf-8') as f:
-        json.dump(dados_cidades, f, ensure_ascii=False, indent=2)
-    
-    # Dados por técnico
-    tecnicos = df_consolidado['tecnico_campo'].unique()
-    dados_tecnicos_count = []
-    
-    for tecnico in tecnicos:
-        if tecnico:  # Ignorar valores vazios
-            count = len(df_consolidado[df_consolidado['tecnico_campo'] == tecnico])
-            dados_tecnicos_count.append({'tecnico': tecnico, 'total': count})
-    
-    with open(os.path.join(output_dir, 'dados_tecnicos_count.json'), 'w', encoding='utf-8') as f:
-        json.dump(dados_tecnicos_count, f, ensure_ascii=False, indent=2)
-    
-    # Dados por data
-    df_consolidado['data_formatada'] = pd.to_datetime(df_consolidado['data'], errors='coerce')
-    df_consolidado['data_formatada'] = df_consolidado['data_formatada'].dt.strftime('%Y-%m-%d')
-    
-    datas = df_consolidado['data_formatada'].dropna().unique()
-    dados_datas = []
-    
-    for data in datas:
-        if data:  # Ignorar valores vazios
-            count = len(df_consolidado[df_consolidado['data_formatada'] == data])
-            dados_datas.append({'data': data, 'total': count})
-    
-    with open(os.path.join(output_dir, 'dados_datas.json'), 'w', encoding='utf-8') as f:
-        json.dump(dados_datas, f, ensure_ascii=False, indent=2)
-    
-    print('Arquivos JSON de dados agregados criados com sucesso')
-except Exception as e:
-    print(f"Erro ao gerar dados agregados: {e}")
+if __name__ == '__main__':
+    main()
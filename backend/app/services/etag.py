@@ -0,0 +1,55 @@
+import hashlib
+
+from flask import request, Response
+from sqlalchemy import func
+
+from app import db
+from app.services.cache_agregados import chave_requisicao
+
+
+def gerar_etag(*partes):
+    """ETag curta a partir de valores que identificam a versão dos dados"""
+    return hashlib.sha1(repr(partes).encode('utf-8')).hexdigest()
+
+
+def etag_colecao(query, modelo):
+    """Validador de uma listagem: max(updated_at) e count() com os mesmos
+    filtros da consulta, junto com o endpoint e os parâmetros da requisição.
+    Custa uma consulta agregada, sem carregar nenhuma linha."""
+    ultima_alteracao, total = query.with_entities(
+        func.max(modelo.updated_at), func.count(modelo.id)
+    ).order_by(None).one()
+    return gerar_etag(chave_requisicao(), ultima_alteracao, total)
+
+
+def etag_registro(registro, *extras):
+    """Validador de um registro: id e updated_at (mais dados relacionados)"""
+    return gerar_etag(type(registro).__name__, registro.id, registro.updated_at, *extras)
+
+
+def versao_contatos(entidade_tipo, entidade_id=None):
+    """max(updated_at) e count() dos contatos da entidade (ou de todas as
+    entidades do tipo), sem carregá-los"""
+    from app.models import Contato
+    
+    query = db.session.query(
+        func.max(Contato.updated_at), func.count(Contato.id)
+    ).filter(Contato.entidade_tipo == entidade_tipo)
+    if entidade_id is not None:
+        query = query.filter(Contato.entidade_id == entidade_id)
+    return query.one()
+
+
+def resposta_condicional(etag, gerar_resposta):
+    """Retorna 304 se o cliente já tem a versão atual; senão gera a resposta
+    e anexa a ETag"""
+    if request.if_none_match.contains_weak(etag):
+        resposta = Response(status=304)
+        resposta.set_etag(etag, weak=True)
+        return resposta
+
+    resposta = gerar_resposta()
+    if isinstance(resposta, tuple):
+        return resposta
+    resposta.set_etag(etag, weak=True)
+    return resposta
@@ -0,0 +1,339 @@
+import json
+import os
+import queue
+import threading
+import time
+from datetime import date, datetime
+
+from flask import current_app, has_app_context
+from sqlalchemy import delete, event, func, insert, select
+
+from app import db
+from app.models import EventoOrdem, OrdemServico
+from app.services.contadores_ordens import valores_anteriores
+
+# Feed de alterações de ordens (GET /api/ordens/stream, Server-Sent Events).
+#
+# Cada flush grava os eventos em eventos_ordens na mesma transação da
+# alteração. Em cada processo, uma única thread (greenlet, com o worker
+# gevent) lê os eventos novos da tabela e os distribui para as conexões
+# abertas, já filtrados; o commit no próprio processo a acorda na hora e os
+# commits de outros workers são vistos em até EVENTOS_ORDENS_INTERVALO
+# segundos. A tabela guarda os últimos EVENTOS_ORDENS_RETENCAO eventos, que
+# servem para retomar a conexão a partir do Last-Event-ID.
+#
+# No PostgreSQL uma transação pode pegar um id menor e confirmar depois de
+# outra com id maior. Os ids pulados viram lacunas, procuradas de novo a cada
+# leitura por até ESPERA_LACUNA segundos (depois disso a transação é dada como
+# desfeita). No SQLite, com um único escritor, não há lacunas.
+CRIADA = 'ordem_criada'
+ATUALIZADA = 'ordem_atualizada'
+EXCLUIDA = 'ordem_excluida'
+
+# Evento enviado quando o cliente perdeu eventos e precisa recarregar as listas
+REINICIAR = 'reiniciar'
+
+# Campos da ordem enviados em cada evento
+CAMPOS = ('id', 'numero_os', 'status', 'tecnico_campo_id', 'tecnico_app_id', 'cidade_id',
+          'data_criacao', 'data_vencimento', 'data_instalacao')
+
+# Campos usados nos filtros; nas atualizações os valores anteriores também
+# são enviados, para que quem filtra veja a ordem sair do filtro
+CAMPOS_FILTRO = ('status', 'tecnico_campo_id', 'cidade_id')
+
+# Eventos lidos por consulta da thread de distribuição
+LOTE = 500
+
+# Por quanto tempo (s) um id pulado ainda é procurado, e quantos no máximo
+ESPERA_LACUNA = 60
+MAX_LACUNAS = 1000
+
+
+def _valor(valor):
+    return valor.isoformat() if isinstance(valor, (datetime, date)) else valor
+
+
+def resumo_ordem(valores):
+    return {campo: _valor(valores.get(campo)) for campo in CAMPOS}
+
+
+def _eventos_do_flush(session):
+    eventos = []
+    for obj in session.new:
+        if isinstance(obj, OrdemServico):
+            eventos.append((CRIADA, resumo_ordem({c: getattr(obj, c) for c in CAMPOS})))
+
+    for obj in session.deleted:
+        if isinstance(obj, OrdemServico):
+            anteriores = valores_anteriores(db.inspect(obj), CAMPOS)
+            eventos.append((EXCLUIDA, resumo_ordem(anteriores)))
+
+    for obj in session.dirty:
+        if not isinstance(obj, OrdemServico) or obj in session.deleted:
+            continue
+        if not session.is_modified(obj, include_collections=False):
+            continue
+        estado = db.inspect(obj)
+        dados = resumo_ordem({c: getattr(obj, c) for c in CAMPOS})
+        alterados = [c for c in CAMPOS_FILTRO if estado.attrs[c].history.has_changes()]
+        if alterados:
+            anteriores = valores_anteriores(estado, alterados)
+            dados['anterior'] = {campo: _valor(anteriores[campo]) for campo in alterados}
+        eventos.append((ATUALIZADA, dados))
+    return eventos
+
+
+def registrar(eventos, conexao=None):
+    """Grava os eventos [(tipo, dados da ordem)] e descarta os mais antigos
+    que a retenção"""
+    if not eventos:
+        return
+    conexao = conexao or db.session.connection()
+    agora = datetime.utcnow()
+    conexao.execute(insert(EventoOrdem.__table__), [
+        {'tipo': tipo, 'ordem_id': dados['id'], 'momento': agora,
+         'dados': json.dumps(dados, ensure_ascii=False, separators=(',', ':'))}
+        for tipo, dados in eventos
+    ])
+
+    retencao = current_app.config['EVENTOS_ORDENS_RETENCAO'] if has_app_context() else None
+    if retencao:
+        ultimo = conexao.execute(select(func.max(EventoOrdem.id))).scalar()
+        conexao.execute(delete(EventoOrdem.__table__).where(EventoOrdem.id <= ultimo - retencao))
+
+    # Acorda a distribuição deste processo após o commit
+    db.session.info['eventos_ordens_pendentes'] = True
+
+
+def _registrar_apos_flush(session, flush_context):
+    eventos = _eventos_do_flush(session)
+    if eventos:
+        registrar(eventos, session.connection())
+
+
+def _avisar_apos_commit(session):
+    if session.info.pop('eventos_ordens_pendentes', False) and has_app_context():
+        canal = current_app.extensions.get('eventos_ordens')
+        if canal is not None:
+            canal.acordar()
+
+
+def _descartar_apos_rollback(session):
+    session.info.pop('eventos_ordens_pendentes', None)
+
+
+class Filtros:
+    """Filtros de uma conexão; uma atualização passa se os valores novos ou
+    os anteriores corresponderem"""
+
+    def __init__(self, tecnico_id=None, cidade_id=None, status=None):
+        self.valores = {
+            campo: valor for campo, valor in (
+                ('tecnico_campo_id', tecnico_id), ('cidade_id', cidade_id), ('status', status))
+            if valor is not None
+        }
+
+    def aceita(self, dados):
+        if not self.valores:
+            return True
+        anteriores = dict(dados, **dados.get('anterior', {}))
+        return all(dados.get(campo) == valor for campo, valor in self.valores.items()) or \
+            all(anteriores.get(campo) == valor for campo, valor in self.valores.items())
+
+
+class Evento:
+    __slots__ = ('id', 'tipo', 'dados', 'ordem', 'tardio')
+
+    def __init__(self, id, tipo, dados, tardio=False):
+        self.id = id
+        self.tipo = tipo
+        self.dados = dados
+        self.ordem = json.loads(dados)
+        # Confirmado depois de um evento de id maior (lacuna preenchida)
+        self.tardio = tardio
+
+    def formatar(self):
+        """Bloco no formato text/event-stream"""
+        return f'id: {self.id}\nevent: {self.tipo}\ndata: {self.dados}\n\n'
+
+
+class Assinatura:
+    """Fila de eventos de uma conexão; se o cliente não acompanhar, a fila
+    enche, a assinatura é marcada como atrasada e a conexão é encerrada com
+    o evento REINICIAR"""
+
+    def __init__(self, filtros, tamanho):
+        self.filtros = filtros
+        self.fila = queue.Queue(tamanho)
+        self.atrasada = False
+
+    def proximo(self, espera):
+        """Próximo evento da fila, None se nada chegou em `espera` segundos
+        ou REINICIAR se a fila transbordou (depois de esvaziá-la)"""
+        try:
+            return self.fila.get(timeout=0 if self.atrasada else espera)
+        except queue.Empty:
+            return REINICIAR if self.atrasada else None
+
+    def entregar(self, evento):
+        if self.atrasada or not self.filtros.aceita(evento.ordem):
+            return
+        try:
+            self.fila.put_nowait(evento)
+        except queue.Full:
+            self.atrasada = True
+
+
+class CanalEventos:
+    """Distribui os eventos novos da tabela para as conexões do processo"""
+
+    def __init__(self, app, intervalo=1.0, tamanho_fila=1000):
+        self.app = app
+        self.intervalo = intervalo
+        self.tamanho_fila = tamanho_fila
+        self._assinaturas = set()
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._ultimo_id = 0
+        self._lacunas = {}  # id pulado -> quando foi notado
+        self._pid = None
+
+    def acordar(self):
+        self._acordar.set()
+
+    def ultimo_id(self):
+        return db.session.execute(select(func.max(EventoOrdem.id))).scalar() or 0
+
+    def assinar(self, filtros):
+        assinatura = Assinatura(filtros, self.tamanho_fila)
+        with self._lock:
+            if not self._assinaturas:
+                # Sem conexões a thread não consulta a tabela: retoma do fim
+                self._ultimo_id = self.ultimo_id()
+                self._lacunas.clear()
+            self._assinaturas.add(assinatura)
+            # Depois de um fork (workers do gunicorn) a thread não existe
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._distribuir, name='eventos-ordens', daemon=True).start()
+        return assinatura
+
+    def cancelar(self, assinatura):
+        with self._lock:
+            self._assinaturas.discard(assinatura)
+
+    def _distribuir(self):
+        while True:
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            try:
+                with self.app.app_context():
+                    if self.distribuir_novos() == LOTE:
+                        self._acordar.set()
+            except Exception:
+                self.app.logger.exception('Falha ao ler eventos de ordens')
+
+    def distribuir_novos(self):
+        """Uma leitura: entrega as lacunas preenchidas e os eventos após o
+        último lido. Retorna quantos eventos novos foram lidos."""
+        with self._lock:
+            assinaturas = list(self._assinaturas)
+        if not assinaturas:
+            return 0
+        colunas = (EventoOrdem.id, EventoOrdem.tipo, EventoOrdem.dados)
+
+        tardios = []
+        if self._lacunas:
+            limite = time.monotonic() - ESPERA_LACUNA
+            for id in [id for id, momento in self._lacunas.items() if momento < limite]:
+                del self._lacunas[id]
+            if self._lacunas:
+                tardios = db.session.execute(
+                    select(*colunas).where(EventoOrdem.id.in_(list(self._lacunas)))
+                    .order_by(EventoOrdem.id)).all()
+
+        novos = db.session.execute(
+            select(*colunas).where(EventoOrdem.id > self._ultimo_id)
+            .order_by(EventoOrdem.id).limit(LOTE)).all()
+
+        for linha in tardios:
+            del self._lacunas[linha.id]
+            self._entregar(assinaturas, Evento(*linha, tardio=True))
+        for linha in novos:
+            if linha.id > self._ultimo_id + 1 and self._ultimo_id:
+                agora = time.monotonic()
+                inicio = max(self._ultimo_id + 1, linha.id - MAX_LACUNAS)
+                self._lacunas.update(dict.fromkeys(range(inicio, linha.id), agora))
+            self._entregar(assinaturas, Evento(*linha))
+            self._ultimo_id = linha.id
+        if len(self._lacunas) > MAX_LACUNAS:
+            for id in sorted(self._lacunas)[:len(self._lacunas) - MAX_LACUNAS]:
+                del self._lacunas[id]
+        return len(novos)
+
+    @staticmethod
+    def _entregar(assinaturas, evento):
+        for assinatura in assinaturas:
+            assinatura.entregar(evento)
+
+    def pendentes(self, desde, filtros):
+        """Eventos após `desde` ainda guardados na tabela. Retorna
+        (eventos, completo); completo é False se algum já foi descartado."""
+        primeiro = db.session.execute(select(func.min(EventoOrdem.id))).scalar()
+        completo = primeiro is None or primeiro <= desde + 1
+        eventos = []
+        for linha in db.session.execute(
+                select(EventoOrdem.id, EventoOrdem.tipo, EventoOrdem.dados)
+                .where(EventoOrdem.id > desde).order_by(EventoOrdem.id)):
+            evento = Evento(*linha)
+            if filtros.aceita(evento.ordem):
+                eventos.append(evento)
+        return eventos, completo
+
+
+def _reiniciar():
+    return f'event: {REINICIAR}\ndata: {{}}\n\n'
+
+
+def gerar_stream(canal, assinatura, pendentes, completo, enviado, heartbeat):
+    """Corpo text/event-stream de uma conexão: os eventos pendentes e depois
+    os novos, com um comentário a cada `heartbeat` segundos sem eventos (que
+    também detecta o cliente desconectado)"""
+    try:
+        yield 'retry: 3000\n\n'
+        if not completo:
+            yield _reiniciar()
+        ja_enviados = set()
+        for evento in pendentes:
+            yield evento.formatar()
+            ja_enviados.add(evento.id)
+            enviado = evento.id
+        while True:
+            evento = assinatura.proximo(heartbeat)
+            if evento is None:
+                yield ': keep-alive\n\n'
+            elif evento == REINICIAR:
+                yield _reiniciar()
+                return
+            elif evento.id in ja_enviados:
+                # Já enviado entre os pendentes
+                continue
+            elif evento.tardio or evento.id > enviado:
+                yield evento.formatar()
+                enviado = max(enviado, evento.id)
+    finally:
+        canal.cancelar(assinatura)
+
+
+def init_eventos_ordens(app):
+    """Grava os eventos de ordens a cada flush e cria o canal do processo"""
+    app.extensions['eventos_ordens'] = CanalEventos(
+        app,
+        intervalo=app.config['EVENTOS_ORDENS_INTERVALO'],
+        tamanho_fila=app.config['EVENTOS_ORDENS_FILA_MAX']
+    )
+    for evento_sessao, funcao in (('after_flush', _registrar_apos_flush),
+                                  ('after_commit', _avisar_apos_commit),
+                                  ('after_rollback', _descartar_apos_rollback)):
+        if not event.contains(db.session, evento_sessao, funcao):
+            event.listen(db.session, evento_sessao, funcao)
@@ -0,0 +1,136 @@
+import os
+import time
+
+from flask import g, has_request_context, request
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram,
+                               REGISTRY, generate_latest, multiprocess)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Métricas por requisição, rotuladas pelo endpoint do Flask (ex.:
+# ordens.listar_ordens) para manter a cardinalidade limitada.
+#
+# Com vários workers do gunicorn, PROMETHEUS_MULTIPROC_DIR aponta para um
+# diretório compartilhado onde cada processo grava seus valores em arquivos
+# mapeados em memória; /api/metrics soma os arquivos de todos os workers
+# (ver gunicorn.conf.py).
+ROTULOS = ('metodo', 'endpoint')
+
+REQUISICOES = Counter(
+    'http_requisicoes_total', 'Requisições atendidas', ROTULOS + ('status',))
+DURACAO = Histogram(
+    'http_requisicao_duracao_segundos', 'Tempo até o fim da resposta', ROTULOS,
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+TAMANHO = Histogram(
+    'http_resposta_bytes', 'Tamanho do corpo da resposta', ROTULOS,
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864))
+SQL_COMANDOS = Histogram(
+    'sql_comandos_por_requisicao', 'Comandos SQL executados por requisição', ROTULOS,
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250, 1000))
+SQL_DURACAO = Histogram(
+    'sql_duracao_segundos_por_requisicao', 'Tempo gasto em SQL por requisição', ROTULOS,
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+
+# Endpoint usado quando a URL não corresponde a nenhuma rota (404, 405)
+SEM_ROTA = 'sem_rota'
+
+
+class MedicaoRequisicao:
+    """Números acumulados durante uma requisição"""
+
+    __slots__ = ('inicio', 'sql_comandos', 'sql_segundos', 'bytes')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.sql_comandos = 0
+        self.sql_segundos = 0.0
+        self.bytes = 0
+
+
+def _antes_do_sql(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'medicao' in g:
+        conn.info.setdefault('metricas_inicio_sql', []).append(time.perf_counter())
+
+
+def _depois_do_sql(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get('metricas_inicio_sql')
+    if inicios and has_request_context() and 'medicao' in g:
+        g.medicao.sql_comandos += 1
+        g.medicao.sql_segundos += time.perf_counter() - inicios.pop()
+
+
+def _erro_no_sql(contexto_excecao):
+    # Comando que falhou: descarta o início sem contar
+    conexao = contexto_excecao.connection
+    if conexao is not None:
+        inicios = conexao.info.get('metricas_inicio_sql')
+        if inicios:
+            inicios.pop()
+
+
+def _registrar(medicao, metodo, endpoint, status):
+    DURACAO.labels(metodo, endpoint).observe(time.perf_counter() - medicao.inicio)
+    TAMANHO.labels(metodo, endpoint).observe(medicao.bytes)
+    SQL_COMANDOS.labels(metodo, endpoint).observe(medicao.sql_comandos)
+    SQL_DURACAO.labels(metodo, endpoint).observe(medicao.sql_segundos)
+    REQUISICOES.labels(metodo, endpoint, str(status)).inc()
+
+
+def _contar_bytes(pedacos, medicao, ao_terminar):
+    """Repassa os pedaços de uma resposta em streaming contando os bytes"""
+    try:
+        for pedaco in pedacos:
+            medicao.bytes += len(pedaco)
+            yield pedaco
+    finally:
+        fechar = getattr(pedacos, 'close', None)
+        if fechar is not None:
+            fechar()
+        ao_terminar()
+
+
+def _iniciar_medicao():
+    g.medicao = MedicaoRequisicao()
+
+
+def _finalizar_medicao(resposta):
+    medicao = g.get('medicao')
+    if medicao is None:
+        return resposta
+
+    metodo = request.method
+    endpoint = request.endpoint or SEM_ROTA
+    status = resposta.status_code
+
+    def registrar():
+        _registrar(medicao, metodo, endpoint, status)
+
+    if resposta.is_streamed and resposta.content_length is None:
+        # Duração, bytes e SQL só são conhecidos quando o último pedaço sai
+        resposta.response = _contar_bytes(resposta.response, medicao, registrar)
+    else:
+        medicao.bytes = resposta.content_length or 0
+        registrar()
+    return resposta
+
+
+def exportar():
+    """Corpo e content-type de /api/metrics, somando todos os workers"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+    else:
+        registro = REGISTRY
+    return generate_latest(registro), CONTENT_TYPE_LATEST
+
+
+def init_metricas(app):
+    """Registra a medição de cada requisição e dos comandos SQL"""
+    for evento, funcao in (('before_cursor_execute', _antes_do_sql),
+                           ('after_cursor_execute', _depois_do_sql),
+                           ('handle_error', _erro_no_sql)):
+        if not event.contains(Engine, evento, funcao):
+            event.listen(Engine, evento, funcao)
+
+    app.before_request(_iniciar_medicao)
+    app.after_request(_finalizar_medicao)
@@ -0,0 +1,292 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import insert, select
+
+from app import db
+from app.models import OrdemServico, Cliente, Tecnico, Cidade
+from app.services.resumo_diario import atualizar_dias
+from app.services import contadores_ordens, eventos_ordens
+from app.services.cache_agregados import obter_cache
+
+# Campos exigidos na criação de uma ordem de serviço
+CAMPOS_OBRIGATORIOS = ['numero_os', 'status', 'data_criacao', 'data_vencimento',
+                       'cliente_id', 'tecnico_campo_id', 'cidade_id']
+
+CAMPOS_DATA = ['data_criacao', 'data_vencimento', 'data_instalacao']
+
+# Aceitam só true/false do JSON (ausentes valem False)
+CAMPOS_BOOLEANOS = ['fez_na_rua', 'baixou_no_app']
+
+# Chaves estrangeiras: campo -> modelo referenciado
+CHAVES_ESTRANGEIRAS = {
+    'cliente_id': Cliente,
+    'tecnico_campo_id': Tecnico,
+    'tecnico_app_id': Tecnico,
+    'cidade_id': Cidade,
+}
+
+# Linhas por comando INSERT e máximo de valores por consulta IN
+LOTE_INSERCAO = 500
+LOTE_IN = 500
+
+
+class LoteInvalido(ValueError):
+    """Corpo da requisição em lote ilegível ou grande demais"""
+
+
+def ler_linhas(requisicao, maximo):
+    """Lê as linhas de um array JSON ou de NDJSON (uma ordem por linha).
+
+    No NDJSON cada linha é lida do stream à medida que chega; uma linha com
+    JSON inválido vira um erro daquela linha, não da requisição inteira.
+    Retorna uma lista de (dados, erro).
+    """
+    tipo = requisicao.mimetype
+    if tipo in ('application/x-ndjson', 'application/ndjson', 'application/jsonl'):
+        linhas = []
+        for bruta in requisicao.stream:
+            bruta = bruta.strip()
+            if not bruta:
+                continue
+            if len(linhas) >= maximo:
+                raise LoteInvalido(f'Lote excede o máximo de {maximo} ordens')
+            try:
+                linhas.append((json.loads(bruta), None))
+            except ValueError as e:
+                linhas.append((None, f'JSON inválido: {e}'))
+        return linhas
+
+    dados = requisicao.get_json(silent=True)
+    if not isinstance(dados, list):
+        raise LoteInvalido('Envie um array JSON ou NDJSON (application/x-ndjson)')
+    if len(dados) > maximo:
+        raise LoteInvalido(f'Lote excede o máximo de {maximo} ordens')
+    return [(item, None) for item in dados]
+
+
+def _existentes(coluna, valores):
+    """Valores de `coluna` presentes no banco, com uma consulta IN por lote"""
+    valores = list(valores)
+    encontrados = set()
+    for i in range(0, len(valores), LOTE_IN):
+        encontrados.update(db.session.scalars(
+            select(coluna).where(coluna.in_(valores[i:i + LOTE_IN]))))
+    return encontrados
+
+
+def _normalizar(dados):
+    """Converte tipos de uma linha e retorna (linha, erros)"""
+    erros = [f'Campo obrigatório ausente: {campo}' for campo in CAMPOS_OBRIGATORIOS
+             if dados.get(campo) in (None, '')]
+    if erros:
+        return None, erros
+
+    linha = {
+        'numero_os': str(dados['numero_os']),
+        'status': str(dados['status']),
+        'tecnico_app_id': dados.get('tecnico_app_id'),
+        'observacoes': dados.get('observacoes'),
+    }
+
+    for campo in CAMPOS_BOOLEANOS:
+        valor = dados.get(campo, False)
+        if isinstance(valor, bool):
+            linha[campo] = valor
+        else:
+            erros.append(f'{campo} deve ser true ou false: {valor!r}')
+
+    for campo in CAMPOS_DATA:
+        valor = dados.get(campo)
+        if valor in (None, ''):
+            linha[campo] = None
+            continue
+        try:
+            linha[campo] = datetime.fromisoformat(valor) if isinstance(valor, str) else None
+        except ValueError:
+            linha[campo] = None
+        if linha[campo] is None:
+            erros.append(f'Data inválida em {campo}: {valor}')
+
+    for campo in CHAVES_ESTRANGEIRAS:
+        valor = dados.get(campo)
+        if valor is None:
+            linha[campo] = None
+            continue
+        try:
+            linha[campo] = int(valor)
+        except (TypeError, ValueError):
+            erros.append(f'{campo} deve ser um número inteiro: {valor}')
+
+    return linha, erros
+
+
+def validar(linhas):
+    """Valida todas as linhas de uma vez.
+
+    Chaves estrangeiras e números de OS já cadastrados são conferidos com
+    uma consulta IN por tabela para o lote inteiro. Retorna a lista de
+    (linha normalizada ou None, erros), na ordem recebida.
+    """
+    resultado = []
+    for dados, erro in linhas:
+        if erro:
+            resultado.append((None, [erro]))
+        elif not isinstance(dados, dict):
+            resultado.append((None, ['Cada ordem deve ser um objeto JSON']))
+        else:
+            resultado.append(_normalizar(dados))
+
+    validas = [linha for linha, erros in resultado if not erros]
+
+    # Uma consulta por tabela referenciada
+    encontrados = {}
+    for modelo in set(CHAVES_ESTRANGEIRAS.values()):
+        campos = [c for c, m in CHAVES_ESTRANGEIRAS.items() if m is modelo]
+        ids = {linha[c] for linha in validas for c in campos if linha[c] is not None}
+        encontrados[modelo] = _existentes(modelo.id, ids)
+
+    numeros = [linha['numero_os'] for linha in validas]
+    cadastrados = _existentes(OrdemServico.numero_os, set(numeros))
+    vistos = set()
+
+    for linha, erros in resultado:
+        if erros:
+            continue
+        for campo, modelo in CHAVES_ESTRANGEIRAS.items():
+            if linha[campo] is not None and linha[campo] not in encontrados[modelo]:
+                erros.append(f'{campo} não encontrado: {linha[campo]}')
+        if linha['numero_os'] in cadastrados:
+            erros.append(f'numero_os já cadastrado: {linha["numero_os"]}')
+        elif linha['numero_os'] in vistos:
+            erros.append(f'numero_os repetido no lote: {linha["numero_os"]}')
+        vistos.add(linha['numero_os'])
+
+    return resultado
+
+
+def inserir(linhas, lote=LOTE_INSERCAO):
+    """Insere as linhas validadas com executemany, em lotes, na transação
+    atual. Retorna os ids criados, na ordem das linhas."""
+    tabela = OrdemServico.__table__
+    agora = datetime.utcnow()
+    ids = []
+    for i in range(0, len(linhas), lote):
+        parametros = [dict(linha, created_at=agora, updated_at=agora) for linha in linhas[i:i + lote]]
+        ids.extend(db.session.execute(
+            insert(tabela).returning(tabela.c.id, sort_by_parameter_order=True),
+            parametros
+        ).scalars())
+
+    # Inserções em massa não passam pelos eventos do ORM
+    atualizar_dias(linha['data_criacao'] for linha in linhas)
+    deltas = {}
+    for linha in linhas:
+        contadores_ordens.somar(deltas, linha, 1)
+    contadores_ordens.aplicar(deltas)
+    eventos_ordens.registrar([
+        (eventos_ordens.CRIADA, eventos_ordens.resumo_ordem(dict(linha, id=id)))
+        for linha, id in zip(linhas, ids)
+    ])
+    return ids
+
+
+def criar_em_lote(linhas, tudo_ou_nada=False):
+    """Valida e insere um lote de ordens.
+
+    Retorna (resultados por linha, quantidade criada). Com tudo_ou_nada,
+    qualquer erro impede a inserção de todas as linhas.
+    """
+    validadas = validar(linhas)
+    validas = [linha for linha, erros in validadas if not erros]
+    falhou = len(validas) < len(validadas)
+
+    ids = []
+    if validas and not (tudo_ou_nada and falhou):
+        try:
+            ids = inserir(validas)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        obter_cache().invalidar()
+
+    resultados = []
+    criados = iter(ids)
+    for numero, (linha, erros) in enumerate(validadas):
+        if erros:
+            resultados.append({'linha': numero, 'status': 'erro', 'erros': erros})
+        elif ids:
+            resultados.append({'linha': numero, 'status': 'criada', 'id': next(criados),
+                               'numero_os': linha['numero_os']})
+        else:
+            resultados.append({'linha': numero, 'status': 'nao_criada', 'numero_os': linha['numero_os']})
+    return resultados, len(ids)
+
+
+def _resolver_ids(ids, numeros_os):
+    """Converte números de OS em ids (uma consulta IN por lote).
+    Retorna (ids, números não encontrados)."""
+    ids = list(dict.fromkeys(ids))
+    numeros_os = list(dict.fromkeys(str(numero) for numero in numeros_os))
+    encontrados = {}
+    for i in range(0, len(numeros_os), LOTE_IN):
+        for numero, id in db.session.execute(
+                select(OrdemServico.numero_os, OrdemServico.id).where(
+                    OrdemServico.numero_os.in_(numeros_os[i:i + LOTE_IN]))):
+            encontrados[numero] = id
+    ausentes = [numero for numero in numeros_os if numero not in encontrados]
+    return list(dict.fromkeys(ids + list(encontrados.values()))), ausentes
+
+
+def atualizar_status(ids, numeros_os, valores, lote=LOTE_IN):
+    """Aplica os valores (status e flags) às ordens com um UPDATE ... WHERE id
+    IN (...) por lote, em uma única transação.
+
+    Retorna (atualizadas, não encontradas). O resumo diário, os contadores e
+    o feed de eventos são atualizados e o cache de agregações invalidado uma
+    única vez para o lote inteiro.
+    """
+    ids, ausentes = _resolver_ids(ids, numeros_os)
+    tabela = OrdemServico.__table__
+    valores = dict(valores, updated_at=datetime.utcnow())
+
+    atualizados = set()
+    dias = set()
+    deltas = {}
+    eventos = []
+    dimensoes = [tabela.c[d] for d in contadores_ordens.DIMENSOES]
+    campos = [tabela.c[c] for c in eventos_ordens.CAMPOS]
+    try:
+        for i in range(0, len(ids), lote):
+            parte = ids[i:i + lote]
+            # Valores anteriores, para mover os contadores
+            anteriores = {linha.id: linha._asdict() for linha in db.session.execute(
+                select(tabela.c.id, *dimensoes).where(tabela.c.id.in_(parte)))}
+            for linha in db.session.execute(
+                    tabela.update().where(tabela.c.id.in_(parte)).values(**valores)
+                    .returning(*campos)):
+                atualizados.add(linha.id)
+                dias.add(linha.data_criacao)
+                anterior = anteriores[linha.id]
+                contadores_ordens.somar(deltas, anterior, -1)
+                contadores_ordens.somar(deltas, dict(anterior, **valores), 1)
+
+                dados = eventos_ordens.resumo_ordem(linha._asdict())
+                if anterior['status'] != linha.status:
+                    dados['anterior'] = {'status': anterior['status']}
+                eventos.append((eventos_ordens.ATUALIZADA, dados))
+
+        # O UPDATE em massa não passa pelos eventos do ORM
+        atualizar_dias(dias)
+        contadores_ordens.aplicar(deltas)
+        eventos_ordens.registrar(eventos)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    if atualizados:
+        obter_cache().invalidar()
+
+    ausentes.extend(id for id in ids if id not in atualizados and id not in ausentes)
+    return len(atualizados), ausentes
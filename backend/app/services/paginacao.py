@@ -0,0 +1,75 @@
+import base64
+import json
+from datetime import datetime
+
+from flask import current_app
+
+# Tamanho padrão e máximo de página para paginação por cursor
+LIMITE_PADRAO = 100
+LIMITE_MAXIMO = 1000
+
+# Quantidade de linhas lidas do banco por vez no modo streaming
+LOTE_STREAMING = 500
+
+
+class CursorInvalido(ValueError):
+    """Cursor de paginação malformado ou adulterado"""
+
+
+def codificar_cursor(data_criacao, id):
+    """Gera um cursor opaco a partir da chave (data_criacao, id) da última linha"""
+    bruto = json.dumps([data_criacao.isoformat(), id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(bruto.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Recupera a chave (data_criacao, id) de um cursor gerado por codificar_cursor"""
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        bruto = base64.urlsafe_b64decode(cursor + preenchimento).decode('utf-8')
+        data_criacao, id = json.loads(bruto)
+        return datetime.fromisoformat(data_criacao), int(id)
+    except (ValueError, TypeError) as e:
+        raise CursorInvalido(f'Cursor inválido: {cursor}') from e
+
+
+def paginar_por_cursor(query, coluna_data, coluna_id, cursor=None, limite=LIMITE_PADRAO):
+    """Aplica paginação keyset sobre (coluna_data, coluna_id).
+
+    Retorna a lista de objetos da página e o cursor da próxima página
+    (None quando não há mais resultados).
+    """
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+
+    if cursor:
+        data_cursor, id_cursor = decodificar_cursor(cursor)
+        query = query.filter(
+            (coluna_data > data_cursor) |
+            ((coluna_data == data_cursor) & (coluna_id > id_cursor))
+        )
+
+    # Busca uma linha a mais para saber se existe próxima página
+    itens = query.order_by(coluna_data, coluna_id).limit(limite + 1).all()
+
+    proximo_cursor = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        ultimo = itens[-1]
+        proximo_cursor = codificar_cursor(
+            getattr(ultimo, coluna_data.key), getattr(ultimo, coluna_id.key))
+
+    return itens, proximo_cursor
+
+
+def gerar_array_json(query, serializar, lote=LOTE_STREAMING):
+    """Gera um array JSON em pedaços, lendo as linhas do banco em lotes"""
+    dumps = current_app.json.dumps
+    yield '['
+    primeiro = True
+    for item in query.yield_per(lote):
+        if primeiro:
+            primeiro = False
+            yield dumps(serializar(item))
+        else:
+            yield ',' + dumps(serializar(item))
+    yield ']'
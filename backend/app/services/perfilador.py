@@ -0,0 +1,245 @@
+import cProfile
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import g, request
+
+# Perfil (cProfile) de requisições individuais, pedido com ?__profile=1 e o
+# token de administrador, ou por amostragem (1 a cada PERFIL_AMOSTRAGEM).
+# Cada perfil gera três arquivos com o mesmo nome base
+# (<momento>_<endpoint>_<pid>):
+#   .pstats     para pstats/snakeviz
+#   .collapsed  pilhas no formato do flamegraph.pl / speedscope
+#   .json       metadados exibidos na listagem
+PARAMETRO = '__profile'
+CABECALHO = 'X-Perfil'
+
+EXTENSOES = ('.pstats', '.collapsed', '.json')
+
+# Blueprints que nunca são perfilados (a própria listagem dos perfis)
+IGNORADOS = ('admin',)
+
+# Rotas que nunca são perfiladas: conexões SSE ficam abertas indefinidamente
+# e prenderiam o perfil do processo
+ENDPOINTS_IGNORADOS = ('ordens.stream_ordens',)
+
+# Um perfil ativo por processo: o cProfile é global ao interpretador (no 3.11
+# um segundo enable() substitui o primeiro em silêncio) e greenlets do gevent
+# compartilham a mesma thread
+_perfil_ativo = threading.Lock()
+
+# Ramos com menos tempo que isso (em segundos) são omitidos das pilhas
+TEMPO_MINIMO_PILHA = 1e-6
+PROFUNDIDADE_MAXIMA = 200
+
+_NOME_VALIDO = re.compile(r'^[\w.\-]+$')
+
+
+def nome_valido(nome):
+    return bool(_NOME_VALIDO.match(nome)) and nome.endswith(EXTENSOES)
+
+
+def _quadro(funcao):
+    arquivo, linha, nome = funcao
+    if arquivo == '~':
+        # Funções embutidas: ('~', 0, "<method 'execute' of ...>")
+        return nome.replace(';', ',')
+    return f'{nome} ({os.path.basename(arquivo)}:{linha})'.replace(';', ',')
+
+
+def pilhas_colapsadas(estatisticas):
+    """Converte as estatísticas do cProfile em pilhas colapsadas (µs).
+
+    O cProfile só guarda as arestas chamador -> chamado, então o tempo de
+    cada função é distribuído entre os caminhos na proporção do tempo
+    acumulado de cada aresta (mesma aproximação do flameprof/gprof2dot).
+    """
+    dados = estatisticas.stats
+    chamados = {}
+    for funcao, (_cc, _nc, _tt, _ct, chamadores) in dados.items():
+        for chamador, (_ccc, _ncc, _ttc, ct_aresta) in chamadores.items():
+            chamados.setdefault(chamador, []).append((funcao, ct_aresta))
+
+    linhas = {}
+
+    def visitar(funcao, caminho, tempo):
+        _cc, _nc, tt, ct, _chamadores = dados[funcao]
+        if ct <= 0 or tempo < TEMPO_MINIMO_PILHA or len(caminho) > PROFUNDIDADE_MAXIMA:
+            return
+        caminho = caminho + (_quadro(funcao),)
+        proprio = tt * tempo / ct
+        if proprio >= TEMPO_MINIMO_PILHA:
+            chave = ';'.join(caminho)
+            linhas[chave] = linhas.get(chave, 0) + proprio
+        for chamado, ct_aresta in chamados.get(funcao, ()):
+            if _quadro(chamado) in caminho:
+                continue  # recursão: o tempo já está no ramo atual
+            visitar(chamado, caminho, tempo * ct_aresta / ct)
+
+    raizes = [f for f, (_cc, _nc, _tt, _ct, chamadores) in dados.items() if not chamadores]
+    for raiz in raizes:
+        visitar(raiz, (), dados[raiz][3])
+
+    return [f'{pilha} {round(tempo * 1e6)}' for pilha, tempo in sorted(linhas.items())
+            if round(tempo * 1e6) > 0]
+
+
+class Perfilador:
+    """Liga o cProfile nas requisições escolhidas e grava os resultados"""
+
+    def __init__(self, diretorio, amostragem=0, max_perfis=200):
+        self.diretorio = diretorio
+        self.amostragem = amostragem
+        self.max_perfis = max_perfis
+        os.makedirs(diretorio, exist_ok=True)
+
+    def motivo(self):
+        """Por que perfilar a requisição atual (ou None)"""
+        from app.routes.auth import token_valido
+
+        if request.blueprint in IGNORADOS or request.endpoint in ENDPOINTS_IGNORADOS:
+            return None
+        if request.args.get(PARAMETRO) == '1' and token_valido():
+            return 'parametro'
+        if self.amostragem > 0 and random.random() < 1 / self.amostragem:
+            return 'amostragem'
+        return None
+
+    def gravar(self, perfil, metadados):
+        """Grava .pstats, .collapsed e .json; retorna o nome base"""
+        momento = datetime.now(timezone.utc)
+        nome = f'{momento:%Y%m%dT%H%M%S%fZ}_{metadados["endpoint"]}_{os.getpid()}'
+        base = os.path.join(self.diretorio, nome)
+
+        perfil.dump_stats(base + '.pstats')
+        estatisticas = pstats.Stats(perfil)
+        with open(base + '.collapsed', 'w', encoding='utf-8') as f:
+            f.write('\n'.join(pilhas_colapsadas(estatisticas)) + '\n')
+
+        metadados = dict(metadados, nome=nome, momento=momento.isoformat(timespec='milliseconds'),
+                         chamadas=estatisticas.total_calls)
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump(metadados, f, ensure_ascii=False)
+
+        self.limpar()
+        return nome
+
+    def listar(self, endpoint=None):
+        """Metadados dos perfis gravados, do mais novo para o mais antigo"""
+        perfis = []
+        for arquivo in sorted(os.listdir(self.diretorio), reverse=True):
+            if not arquivo.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.diretorio, arquivo), encoding='utf-8') as f:
+                    metadados = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if endpoint and metadados.get('endpoint') != endpoint:
+                continue
+            perfis.append(metadados)
+        return perfis
+
+    def limpar(self):
+        """Mantém só os max_perfis mais recentes"""
+        nomes = sorted(arquivo[:-len('.json')] for arquivo in os.listdir(self.diretorio)
+                       if arquivo.endswith('.json'))
+        for nome in nomes[:max(0, len(nomes) - self.max_perfis)]:
+            for extensao in EXTENSOES:
+                try:
+                    os.remove(os.path.join(self.diretorio, nome + extensao))
+                except FileNotFoundError:
+                    pass
+
+
+def _desligar(perfil):
+    perfil.disable()
+    _perfil_ativo.release()
+
+
+def _encerrar(perfilador, perfil, medicao):
+    _desligar(perfil)
+    duracao = time.perf_counter() - medicao['inicio']
+    metadados = {k: v for k, v in medicao.items() if k != 'inicio'}
+    metadados['duracao_ms'] = round(duracao * 1000, 3)
+    try:
+        return perfilador.gravar(perfil, metadados)
+    except OSError:
+        # Falha ao gravar o perfil não deve derrubar a requisição
+        logging.getLogger(__name__).exception('Falha ao gravar o perfil da requisição')
+        return None
+
+
+def _perfilar_em_stream(pedacos, perfilador, perfil, medicao):
+    """Mantém o perfil ligado enquanto o corpo em streaming é gerado"""
+    try:
+        yield from pedacos
+    finally:
+        fechar = getattr(pedacos, 'close', None)
+        if fechar is not None:
+            fechar()
+        _encerrar(perfilador, perfil, medicao)
+
+
+def init_perfilador(app):
+    """Registra os hooks de perfil por requisição"""
+    perfilador = Perfilador(
+        app.config['PERFIL_DIR'],
+        amostragem=app.config['PERFIL_AMOSTRAGEM'],
+        max_perfis=app.config['PERFIL_MAX']
+    )
+    app.extensions['perfilador'] = perfilador
+
+    @app.before_request
+    def _iniciar_perfil():
+        motivo = perfilador.motivo()
+        if motivo is None:
+            return
+        if not _perfil_ativo.acquire(blocking=False):
+            # Outra requisição sendo perfilada em paralelo
+            return
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # Python 3.12+: outro profiler ligado fora deste módulo
+            _perfil_ativo.release()
+            return
+        g.perfil = perfil
+        g.perfil_medicao = {
+            'inicio': time.perf_counter(),
+            'endpoint': request.endpoint or 'sem_rota',
+            'metodo': request.method,
+            'caminho': request.path,
+            'motivo': motivo,
+        }
+
+    @app.after_request
+    def _finalizar_perfil(resposta):
+        perfil = g.pop('perfil', None)
+        if perfil is None:
+            return resposta
+        medicao = g.pop('perfil_medicao')
+        medicao['status'] = resposta.status_code
+
+        if resposta.is_streamed and resposta.content_length is None:
+            resposta.response = _perfilar_em_stream(resposta.response, perfilador, perfil, medicao)
+        else:
+            nome = _encerrar(perfilador, perfil, medicao)
+            if nome:
+                resposta.headers[CABECALHO] = nome
+        return resposta
+
+    @app.teardown_request
+    def _descartar_perfil(erro=None):
+        # after_request não rodou (erro antes da resposta): libera o perfil
+        perfil = g.pop('perfil', None)
+        if perfil is not None:
+            _desligar(perfil)
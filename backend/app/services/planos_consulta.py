@@ -0,0 +1,97 @@
+from sqlalchemy import event
+
+# Rotas que filtram ou agregam ordens de serviço e clientes. Cada uma deve
+# ser atendida por um índice: nenhuma consulta pode cair em varredura
+# completa das tabelas em TABELAS.
+ROTAS_VERIFICADAS = [
+    '/api/ordens/?status=PENDENTE',
+    '/api/ordens/?tecnico_id=1',
+    '/api/ordens/?cidade_id=1',
+    '/api/ordens/?data_inicio=2024-01-01&data_fim=2024-12-31',
+    '/api/ordens/?limite=50',
+    '/api/ordens/?status=PENDENTE&limite=50',
+    '/api/ordens/?tecnico_id=1&data_inicio=2024-01-01&limite=50',
+    '/api/ordens/proximas-vencimento',
+    '/api/ordens/metricas',
+    '/api/ordens/serie?intervalo=semana',
+    '/api/ordens/serie?intervalo=mes&agrupar=tecnico&data_inicio=2024-01-01T10:00',
+    '/api/dashboard/resumo',
+    '/api/dashboard/resumo?data_inicio=2024-01-01T10:00&data_fim=2024-12-31T12:00',
+    '/api/sync?limite=100',
+    '/api/clientes/1',
+    '/api/clientes/?cidade_id=1',
+    '/api/clientes/?cidade_id=1&include=contatos',
+    '/api/clientes/busca?termo=maria',
+    '/api/tecnicos/1',
+    '/api/tecnicos/?include=contatos',
+    '/api/tecnicos/1/desempenho',
+    '/api/tecnicos/1/desempenho?data_inicio=2024-01-01&data_fim=2024-12-31',
+    '/api/relatorios/tecnicos/pdf',
+    '/api/relatorios/tecnicos/pdf?tecnico_id=1',
+    '/api/relatorios/tecnicos/pdf?cidade_id=1',
+    '/api/relatorios/admin/csv?tipo=os&data_inicio=2024-01-01',
+    '/api/relatorios/admin/csv?tipo=tecnicos',
+    '/api/relatorios/admin/csv?tipo=tecnicos&data_inicio=2024-01-01',
+    '/api/relatorios/admin/csv?tipo=cidades',
+    '/api/relatorios/admin/csv?tipo=cidades&data_inicio=2024-01-01',
+    '/api/relatorios/admin/pdf?tipo=resumo',
+    '/api/relatorios/admin/pdf?tipo=resumo&data_inicio=2024-01-01',
+    '/api/relatorios/admin/pdf?tipo=tecnicos&data_inicio=2024-01-01',
+    '/api/relatorios/admin/pdf?tipo=cidades&data_inicio=2024-01-01',
+]
+
+TABELAS = ('ordens_servico', 'clientes', 'contatos')
+
+
+def varredura_completa(linha_plano):
+    """Indica se uma linha do EXPLAIN QUERY PLAN é um SCAN sem índice em uma
+    das TABELAS"""
+    partes = linha_plano.split()
+    return (
+        len(partes) >= 2 and partes[0] == 'SCAN' and partes[1] in TABELAS
+        and 'INDEX' not in partes
+    )
+
+
+def capturar_consultas(app, db, url):
+    """Executa a rota pelo test client e retorna as consultas SQL emitidas"""
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith('SELECT'):
+            consultas.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        with app.test_client() as cliente:
+            try:
+                cliente.get(url)
+            except Exception:
+                # Erros de renderização não invalidam as consultas já emitidas
+                pass
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+
+    return consultas
+
+
+def verificar_planos(app, db, rotas=None):
+    """Roda EXPLAIN QUERY PLAN em cada consulta das rotas sobre as TABELAS.
+
+    Retorna a lista de (rota, sql, plano) que caíram em varredura completa.
+    Só funciona em SQLite.
+    """
+    problemas = []
+    for url in rotas or ROTAS_VERIFICADAS:
+        for statement, parameters in capturar_consultas(app, db, url):
+            if not any(tabela in statement for tabela in TABELAS):
+                continue
+            with db.engine.connect() as conexao:
+                plano = [
+                    linha[-1] for linha in conexao.exec_driver_sql(
+                        f'EXPLAIN QUERY PLAN {statement}', parameters
+                    )
+                ]
+            if any(varredura_completa(linha) for linha in plano):
+                problemas.append((url, statement, plano))
+    return problemas
@@ -0,0 +1,159 @@
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+# Estados de um job de relatório
+PENDENTE = 'pendente'
+CONCLUIDO = 'concluido'
+ERRO = 'erro'
+
+
+class FilaCheia(RuntimeError):
+    """Limite de jobs pendentes atingido"""
+
+
+def _escrever_json(caminho, dados):
+    """Grava o JSON de forma atômica (arquivo temporário + rename)"""
+    temporario = f'{caminho}.{os.getpid()}.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def renderizar_pdf(html, caminho_pdf, caminho_meta):
+    """Executado no processo do pool: gera o PDF e atualiza os metadados do job"""
+    with open(caminho_meta, encoding='utf-8') as f:
+        meta = json.load(f)
+
+    try:
+        from weasyprint import HTML
+
+        temporario = f'{caminho_pdf}.tmp'
+        HTML(string=html).write_pdf(target=temporario)
+        os.replace(temporario, caminho_pdf)
+        meta['status'] = CONCLUIDO
+    except Exception as e:
+        meta['status'] = ERRO
+        meta['erro'] = str(e)
+
+    meta['concluido_em'] = time.time()
+    _escrever_json(caminho_meta, meta)
+
+
+class GerenciadorJobs:
+    """Fila de geração de PDFs fora do ciclo da requisição.
+
+    O estado de cada job fica em disco (<id>.json e <id>.pdf no diretório
+    configurado), de modo que qualquer worker do gunicorn consegue responder
+    à consulta de status e ao download. Artefatos mais antigos que o TTL são
+    removidos.
+    """
+
+    def __init__(self, diretorio, workers=2, fila_max=20, ttl=3600):
+        self.diretorio = diretorio
+        self.workers = workers
+        self.fila_max = fila_max
+        self.ttl = ttl
+        self._executor = None
+        self._pid = None
+        self._pendentes = 0
+        self._lock = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _obter_executor(self):
+        # O pool é criado sob demanda em cada processo (após o fork do gunicorn)
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            self._pid = os.getpid()
+            self._pendentes = 0
+        return self._executor
+
+    def _caminhos(self, job_id):
+        base = os.path.join(self.diretorio, job_id)
+        return f'{base}.pdf', f'{base}.json'
+
+    def _finalizado(self, _futuro):
+        with self._lock:
+            self._pendentes -= 1
+
+    def enviar(self, relatorio, parametros, html, filename):
+        """Enfileira a renderização e retorna os metadados do job criado"""
+        self.limpar_expirados()
+
+        with self._lock:
+            executor = self._obter_executor()
+            if self._pendentes >= self.fila_max:
+                raise FilaCheia(f'Limite de {self.fila_max} relatórios pendentes atingido')
+            self._pendentes += 1
+
+        job_id = uuid.uuid4().hex
+        caminho_pdf, caminho_meta = self._caminhos(job_id)
+        meta = {
+            'id': job_id,
+            'relatorio': relatorio,
+            'parametros': parametros,
+            'filename': filename,
+            'status': PENDENTE,
+            'criado_em': time.time()
+        }
+        _escrever_json(caminho_meta, meta)
+
+        try:
+            futuro = executor.submit(renderizar_pdf, html, caminho_pdf, caminho_meta)
+        except Exception:
+            self._finalizado(None)
+            os.remove(caminho_meta)
+            raise
+        futuro.add_done_callback(self._finalizado)
+        return meta
+
+    def obter(self, job_id):
+        """Retorna os metadados do job ou None se não existir/expirou"""
+        # Evita que o id seja usado para acessar outros caminhos
+        if not job_id.isalnum():
+            return None
+
+        _, caminho_meta = self._caminhos(job_id)
+        try:
+            with open(caminho_meta, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if time.time() - meta['criado_em'] > self.ttl:
+            return None
+        return meta
+
+    def caminho_pdf(self, job_id):
+        return self._caminhos(job_id)[0]
+
+    def limpar_expirados(self):
+        """Remove metadados e PDFs com mais tempo que o TTL"""
+        limite = time.time() - self.ttl
+        for nome in os.listdir(self.diretorio):
+            caminho = os.path.join(self.diretorio, nome)
+            try:
+                if os.path.getmtime(caminho) < limite:
+                    os.remove(caminho)
+            except FileNotFoundError:
+                pass
+
+
+def init_jobs(app):
+    """Cria o gerenciador de jobs de relatório a partir da configuração da app"""
+    diretorio = app.config.get('RELATORIOS_JOBS_DIR') or os.path.join(
+        tempfile.gettempdir(), 'dashboard_os_relatorios')
+    app.extensions['relatorios_jobs'] = GerenciadorJobs(
+        diretorio,
+        workers=app.config['RELATORIOS_JOBS_WORKERS'],
+        fila_max=app.config['RELATORIOS_JOBS_FILA_MAX'],
+        ttl=app.config['RELATORIOS_JOBS_TTL']
+    )
@@ -0,0 +1,213 @@
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import Date, event, func, case, and_, or_, select, type_coerce, union_all, delete, insert
+
+from app import db
+from app.models import OrdemServico, ResumoDiarioOrdem
+
+# Colunas de OrdemServico que alteram o resumo diário quando modificadas
+COLUNAS_RESUMO = ('status', 'tecnico_campo_id', 'tecnico_app_id', 'cidade_id', 'data_criacao')
+
+# Dimensões pelas quais o resumo pode ser agrupado ('dia' é o dia de criação)
+DIMENSOES = ('status', 'tecnico_campo_id', 'tecnico_app_id', 'cidade_id', 'dia')
+
+# Quantidade de dias recalculados por comando
+LOTE_DIAS = 100
+
+
+def _select_agregado_ordens(condicao=None):
+    """SELECT que agrega ordens_servico por dia e dimensões, no formato do resumo"""
+    consulta = select(
+        func.date(OrdemServico.data_criacao),
+        OrdemServico.status,
+        OrdemServico.tecnico_campo_id,
+        OrdemServico.tecnico_app_id,
+        OrdemServico.cidade_id,
+        func.count(OrdemServico.id),
+        func.sum(case((OrdemServico.status == 'INSTALADA', 1), else_=0))
+    )
+    if condicao is not None:
+        consulta = consulta.where(condicao)
+    return consulta.group_by(
+        func.date(OrdemServico.data_criacao),
+        OrdemServico.status,
+        OrdemServico.tecnico_campo_id,
+        OrdemServico.tecnico_app_id,
+        OrdemServico.cidade_id
+    )
+
+
+def _insert_resumo(consulta):
+    return insert(ResumoDiarioOrdem.__table__).from_select(
+        ['dia', 'status', 'tecnico_campo_id', 'tecnico_app_id', 'cidade_id',
+         'total', 'total_instaladas'],
+        consulta
+    )
+
+
+def reconstruir(conexao=None):
+    """Recalcula o resumo diário inteiro a partir de ordens_servico"""
+    conexao = conexao or db.session.connection()
+    conexao.execute(delete(ResumoDiarioOrdem.__table__))
+    conexao.execute(_insert_resumo(_select_agregado_ordens()))
+
+
+def atualizar_dias(dias, conexao=None):
+    """Recalcula apenas os dias informados (atualização incremental)"""
+    conexao = conexao or db.session.connection()
+    dias = sorted({d.date() if isinstance(d, datetime) else d for d in dias if d})
+
+    for i in range(0, len(dias), LOTE_DIAS):
+        lote = dias[i:i + LOTE_DIAS]
+        conexao.execute(
+            delete(ResumoDiarioOrdem.__table__).where(ResumoDiarioOrdem.dia.in_(lote))
+        )
+        # Um intervalo por dia para aproveitar o índice em data_criacao
+        intervalos = or_(*[
+            and_(
+                OrdemServico.data_criacao >= datetime.combine(dia, time.min),
+                OrdemServico.data_criacao < datetime.combine(dia + timedelta(days=1), time.min)
+            )
+            for dia in lote
+        ])
+        conexao.execute(_insert_resumo(_select_agregado_ordens(intervalos)))
+
+
+def _dias_afetados(session):
+    """Dias de criação (antigos e novos) das ordens alteradas no flush"""
+    dias = set()
+    for obj in session.new:
+        if isinstance(obj, OrdemServico):
+            dias.add(obj.data_criacao)
+
+    for obj in session.dirty | session.deleted:
+        if not isinstance(obj, OrdemServico):
+            continue
+        estado = db.inspect(obj)
+        if obj not in session.deleted and not any(
+                estado.attrs[c].history.has_changes() for c in COLUNAS_RESUMO):
+            continue
+        # Dia antigo e novo, caso data_criacao tenha mudado
+        valores = estado.attrs['data_criacao'].history.sum()
+        dias.update(valores if valores else (obj.data_criacao,))
+    return dias
+
+
+def _atualizar_apos_flush(session, flush_context):
+    if session.info.get('resumo_diario_desativado'):
+        return
+    dias = _dias_afetados(session)
+    if dias:
+        atualizar_dias(dias, session.connection())
+
+
+def init_resumo_diario(app):
+    """Mantém o resumo diário atualizado na mesma transação das alterações"""
+    if not event.contains(db.session, 'after_flush', _atualizar_apos_flush):
+        event.listen(db.session, 'after_flush', _atualizar_apos_flush)
+
+
+def _coluna(modelo, dimensao):
+    """Coluna da dimensão no resumo ou em ordens_servico"""
+    if dimensao == 'dia' and modelo is OrdemServico:
+        # Sem CAST: no SQLite CAST(... AS DATE) vira número
+        return type_coerce(func.date(OrdemServico.data_criacao), Date)
+    return getattr(modelo, dimensao)
+
+
+def _intervalos(data_inicio, data_fim):
+    """Divide o período em dias completos (lidos do resumo) e bordas parciais
+    (lidas de ordens_servico).
+
+    Retorna (usar_resumo, primeiro_dia, dia_final_exclusivo, bordas), onde
+    os dias podem ser None (sem limite) e bordas é uma lista de (inicio, fim)
+    inclusivos.
+    """
+    # Parâmetros vazios na query string equivalem a sem limite
+    data_inicio = data_inicio or None
+    data_fim = data_fim or None
+
+    if data_inicio is None:
+        primeiro_dia = None
+    elif data_inicio.time() == time.min:
+        primeiro_dia = data_inicio.date()
+    else:
+        primeiro_dia = data_inicio.date() + timedelta(days=1)
+
+    # data_criacao <= data_fim: só os dias anteriores ao de data_fim são completos
+    dia_final = data_fim.date() if data_fim is not None else None
+
+    if primeiro_dia is not None and dia_final is not None and primeiro_dia >= dia_final:
+        return False, None, None, [(data_inicio, data_fim)]
+
+    bordas = []
+    if data_inicio is not None and data_inicio.time() != time.min:
+        bordas.append((data_inicio, datetime.combine(primeiro_dia, time.min) - timedelta(microseconds=1)))
+    if data_fim is not None:
+        bordas.append((datetime.combine(dia_final, time.min), data_fim))
+    return True, primeiro_dia, dia_final, bordas
+
+
+def subconsulta_agregada(dimensoes, data_inicio=None, data_fim=None, filtro=None):
+    """Subconsulta com total_os e total_instaladas agrupados pelas dimensões.
+
+    Lê os dias completos do resumo diário e só as bordas parciais do período
+    diretamente de ordens_servico, de modo que o custo é proporcional ao
+    número de dias e não ao número de ordens.
+
+    dimensoes: nomes de colunas em DIMENSOES
+    filtro: função que recebe o modelo (ResumoDiarioOrdem ou OrdemServico) e
+        retorna uma condição sobre as dimensões
+    """
+    usar_resumo, primeiro_dia, dia_final, bordas = _intervalos(data_inicio, data_fim)
+    partes = []
+
+    # Dias completos: resumo diário
+    if usar_resumo:
+        colunas = [_coluna(ResumoDiarioOrdem, d).label(d) for d in dimensoes]
+        consulta = select(
+            *colunas,
+            func.sum(ResumoDiarioOrdem.total).label('total_os'),
+            func.sum(ResumoDiarioOrdem.total_instaladas).label('total_instaladas')
+        )
+        if primeiro_dia is not None:
+            consulta = consulta.where(ResumoDiarioOrdem.dia >= primeiro_dia)
+        if dia_final is not None:
+            consulta = consulta.where(ResumoDiarioOrdem.dia < dia_final)
+        if filtro is not None:
+            consulta = consulta.where(filtro(ResumoDiarioOrdem))
+        partes.append(consulta.group_by(*colunas))
+
+    # Bordas parciais: ordens_servico
+    if bordas:
+        colunas = [_coluna(OrdemServico, d).label(d) for d in dimensoes]
+        consulta = select(
+            *colunas,
+            func.count(OrdemServico.id).label('total_os'),
+            func.sum(case((OrdemServico.status == 'INSTALADA', 1), else_=0)).label('total_instaladas')
+        ).where(or_(*[
+            and_(OrdemServico.data_criacao >= inicio, OrdemServico.data_criacao <= fim)
+            for inicio, fim in bordas
+        ]))
+        if filtro is not None:
+            consulta = consulta.where(filtro(OrdemServico))
+        partes.append(consulta.group_by(*colunas))
+
+    uniao = (partes[0] if len(partes) == 1 else union_all(*partes)).subquery()
+    colunas = [uniao.c[d] for d in dimensoes]
+    return select(
+        *colunas,
+        func.sum(uniao.c.total_os).label('total_os'),
+        func.sum(uniao.c.total_instaladas).label('total_instaladas')
+    ).group_by(*colunas).subquery('agregado')
+
+
+def agregar(dimensoes, data_inicio=None, data_fim=None, filtro=None):
+    """Executa subconsulta_agregada e retorna {chave: (total_os, total_instaladas)}"""
+    agregado = subconsulta_agregada(dimensoes, data_inicio, data_fim, filtro)
+    resultado = {}
+    for linha in db.session.execute(select(agregado)):
+        chave = tuple(linha[:len(dimensoes)])
+        resultado[chave[0] if len(dimensoes) == 1 else chave] = (
+            int(linha.total_os or 0), int(linha.total_instaladas or 0))
+    return resultado
@@ -0,0 +1,105 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from app import db
+
+
+class SerializadorLinhas:
+    """Serializa linhas (tuplas) de um modelo no mesmo formato do to_dict().
+
+    Seleciona somente as colunas usadas, sem montar objetos ORM, e converte
+    com uma especificação calculada uma única vez por modelo: apenas as
+    colunas de data passam por isoformat(), o restante é copiado como está.
+    """
+
+    def __init__(self, modelo, campos):
+        self.modelo = modelo
+        self.campos = tuple(campos)
+        self.colunas = [getattr(modelo, campo) for campo in self.campos]
+        self._datas = tuple(
+            i for i, coluna in enumerate(self.colunas)
+            if isinstance(coluna.type, (db.DateTime, db.Date))
+        )
+
+    def selecionar(self, query):
+        """Troca as entidades da consulta pelas colunas serializadas"""
+        return query.with_entities(*self.colunas)
+
+    def __call__(self, linha):
+        if not self._datas:
+            return dict(zip(self.campos, linha))
+        valores = list(linha)
+        for i in self._datas:
+            valor = valores[i]
+            if valor is not None:
+                valores[i] = valor.isoformat()
+        return dict(zip(self.campos, valores))
+
+    def serializar(self, linhas):
+        return [self(linha) for linha in linhas]
+
+
+# Campos de cada modelo, na ordem do respectivo to_dict()
+CAMPOS = {
+    'OrdemServico': (
+        'id', 'numero_os', 'status', 'data_criacao', 'data_instalacao',
+        'data_vencimento', 'cliente_id', 'tecnico_campo_id', 'tecnico_app_id',
+        'cidade_id', 'fez_na_rua', 'baixou_no_app', 'observacoes',
+        'created_at', 'updated_at'
+    ),
+    'Cliente': (
+        'id', 'nome_completo', 'cpf', 'endereco', 'bairro', 'cidade_id', 'uf',
+        'cep', 'ponto_referencia', 'created_at', 'updated_at'
+    ),
+    'Tecnico': (
+        'id', 'nome', 'identificacao_campo', 'identificacao_app', 'ativo',
+        'created_at', 'updated_at'
+    ),
+    'Cidade': ('id', 'nome', 'uf', 'regiao', 'created_at', 'updated_at'),
+}
+
+_serializadores = {}
+
+
+def serializador(modelo):
+    """Retorna o serializador (criado uma única vez) do modelo"""
+    if modelo not in _serializadores:
+        _serializadores[modelo] = SerializadorLinhas(modelo, CAMPOS[modelo.__name__])
+    return _serializadores[modelo]
+
+
+class ProviderOrjson(DefaultJSONProvider):
+    """Provider JSON do Flask que codifica com orjson.
+
+    Mantém a saída do provider padrão: chaves ordenadas e os tipos que o
+    orjson não trata (datas, Decimal, ...) passam pelo default() do Flask.
+    """
+
+    _opcoes = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+               | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def _codificar(self, obj, indentar=False):
+        opcoes = self._opcoes | (orjson.OPT_INDENT_2 if indentar else 0)
+        return orjson.dumps(obj, default=self.default, option=opcoes)
+
+    def dumps(self, obj, **kwargs):
+        return self._codificar(obj, indentar=kwargs.get('indent') is not None).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indentar = self.compact is None and self._app.debug or self.compact is False
+        return self._app.response_class(
+            self._codificar(obj, indentar) + b'\n', mimetype=self.mimetype)
+
+
+def init_serializacao(app):
+    """Usa o orjson para codificar as respostas JSON quando estiver instalado"""
+    if orjson is not None:
+        app.json = ProviderOrjson(app)
@@ -0,0 +1,147 @@
+from datetime import date, timedelta
+
+from sqlalchemy import Date, Integer, String, cast, func, select
+
+from app import db
+from app.models import Cidade, Tecnico
+from app.services.resumo_diario import subconsulta_agregada
+
+# Série temporal de ordens criadas: os dias do resumo diário são agrupados
+# em períodos no próprio SQL (strftime no SQLite, date_trunc no PostgreSQL),
+# então o tamanho da resposta depende do número de períodos e não do número
+# de ordens. Séries longas ainda são reduzidas com LTTB.
+INTERVALOS = ('dia', 'semana', 'mes', 'trimestre')
+
+# agrupar= na query string -> (dimensão do resumo, modelo com o nome)
+AGRUPAMENTOS = {
+    'status': ('status', None),
+    'tecnico': ('tecnico_campo_id', Tecnico),
+    'cidade': ('cidade_id', Cidade),
+}
+
+MAX_PONTOS_PADRAO = 500
+MIN_PONTOS = 3
+MAX_PONTOS = 5000
+
+_TRUNC_POSTGRES = {'semana': 'week', 'mes': 'month', 'trimestre': 'quarter'}
+
+
+def inicio_do_periodo(coluna, intervalo, dialeto):
+    """Expressão SQL com o primeiro dia do período (semanas começam na segunda)"""
+    if intervalo == 'dia':
+        return coluna
+    if dialeto == 'postgresql':
+        return cast(func.date_trunc(_TRUNC_POSTGRES[intervalo], coluna), Date)
+    if intervalo == 'semana':
+        # Volta 6 dias e avança até a próxima segunda (ou fica, se já for)
+        return func.date(coluna, '-6 days', 'weekday 1')
+    if intervalo == 'mes':
+        return func.date(coluna, 'start of month')
+    # Trimestre: início do mês menos (mês - 1) % 3 meses
+    return func.date(coluna, 'start of month',
+                     func.printf('-%d months', (cast(func.strftime('%m', coluna), Integer) - 1) % 3))
+
+
+def proximo_periodo(dia, intervalo):
+    if intervalo == 'dia':
+        return dia + timedelta(days=1)
+    if intervalo == 'semana':
+        return dia + timedelta(days=7)
+    meses = 1 if intervalo == 'mes' else 3
+    ano, mes = divmod(dia.month - 1 + meses, 12)
+    return date(dia.year + ano, mes + 1, 1)
+
+
+def completar_periodos(pontos, intervalo):
+    """Insere com zero os períodos sem ordens entre o primeiro e o último"""
+    if not pontos:
+        return []
+    existentes = {ponto['data']: ponto for ponto in pontos}
+    completos = []
+    dia = pontos[0]['data']
+    while dia <= pontos[-1]['data']:
+        completos.append(existentes.get(dia) or {'data': dia, 'total': 0, 'instaladas': 0})
+        dia = proximo_periodo(dia, intervalo)
+    return completos
+
+
+def lttb(pontos, limite, x=lambda p: p['data'].toordinal(), y=lambda p: p['total']):
+    """Largest-Triangle-Three-Buckets: reduz a série a `limite` pontos
+    mantendo o primeiro, o último e, em cada faixa, o ponto que forma o maior
+    triângulo com o escolhido na faixa anterior e a média da faixa seguinte"""
+    if limite >= len(pontos) or limite < MIN_PONTOS:
+        return list(pontos)
+
+    escolhidos = [pontos[0]]
+    tamanho_faixa = (len(pontos) - 2) / (limite - 2)
+    anterior = pontos[0]
+    for i in range(limite - 2):
+        inicio = int(i * tamanho_faixa) + 1
+        fim = int((i + 1) * tamanho_faixa) + 1
+
+        # Média da faixa seguinte (ou o último ponto, na última faixa)
+        seguinte = pontos[fim:min(int((i + 2) * tamanho_faixa) + 1, len(pontos))] or [pontos[-1]]
+        media_x = sum(x(p) for p in seguinte) / len(seguinte)
+        media_y = sum(y(p) for p in seguinte) / len(seguinte)
+
+        ax, ay = x(anterior), y(anterior)
+        maior_area, melhor = -1, None
+        for ponto in pontos[inicio:fim]:
+            area = abs((ax - media_x) * (y(ponto) - ay) - (ax - x(ponto)) * (media_y - ay))
+            if area > maior_area:
+                maior_area, melhor = area, ponto
+        escolhidos.append(melhor)
+        anterior = melhor
+    escolhidos.append(pontos[-1])
+    return escolhidos
+
+
+def _como_data(valor):
+    # SQLite devolve texto; PostgreSQL, date
+    return valor if isinstance(valor, date) else date.fromisoformat(valor)
+
+
+def gerar_serie(intervalo='dia', agrupar=None, max_pontos=MAX_PONTOS_PADRAO,
+                data_inicio=None, data_fim=None):
+    """Uma série por valor do agrupamento (ou uma só, sem agrupamento), cada
+    uma já completada e reduzida a max_pontos"""
+    dimensao, modelo = AGRUPAMENTOS[agrupar] if agrupar else (None, None)
+    agregado = subconsulta_agregada(['dia'] + ([dimensao] if dimensao else []),
+                                    data_inicio, data_fim)
+
+    dialeto = db.session.connection().dialect.name
+    periodo = inicio_do_periodo(agregado.c.dia, intervalo, dialeto).label('periodo')
+    colunas = [periodo]
+    if dimensao:
+        colunas.append(agregado.c[dimensao].label('chave'))
+        colunas.append((modelo.nome if modelo is not None else cast(agregado.c[dimensao], String))
+                       .label('nome'))
+
+    consulta = select(
+        *colunas,
+        func.sum(agregado.c.total_os).label('total_os'),
+        func.sum(agregado.c.total_instaladas).label('total_instaladas')
+    ).select_from(agregado)
+    if modelo is not None:
+        consulta = consulta.outerjoin(modelo, modelo.id == agregado.c[dimensao])
+    consulta = consulta.group_by(*colunas).order_by(periodo)
+
+    series = {}
+    for linha in db.session.execute(consulta):
+        chave = linha.chave if dimensao else None
+        serie = series.get(chave)
+        if serie is None:
+            serie = series[chave] = {'chave': chave, 'nome': linha.nome if dimensao else None,
+                                     'pontos': []}
+        serie['pontos'].append({'data': _como_data(linha.periodo), 'total': int(linha.total_os or 0),
+                                'instaladas': int(linha.total_instaladas or 0)})
+
+    resultado = []
+    for serie in series.values():
+        pontos = completar_periodos(serie['pontos'], intervalo)
+        serie['periodos'] = len(pontos)
+        serie['total'] = sum(p['total'] for p in pontos)
+        serie['pontos'] = [dict(p, data=p['data'].isoformat()) for p in lttb(pontos, max_pontos)]
+        resultado.append(serie)
+    resultado.sort(key=lambda s: -s['total'])
+    return resultado
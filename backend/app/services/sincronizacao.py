@@ -0,0 +1,161 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import delete, event, insert, select
+
+from app import db
+from app.models import Cliente, Exclusao, OrdemServico, Tecnico
+from app.services.serializacao import serializador
+
+# Sincronização incremental (GET /api/sync): as linhas alteradas desde o
+# token, pela ordem (updated_at, id), e as exclusões registradas em
+# `exclusoes`, pela ordem (momento, id). O token guarda a posição de cada
+# fonte, então a resposta cresce com o número de alterações e não com o
+# tamanho das tabelas; sem token, a primeira resposta é a carga completa,
+# paginada da mesma forma.
+#
+# Só são lidas alterações até SYNC_MARGEM segundos atrás: uma transação que
+# grava updated_at e confirma um pouco depois ainda é vista na próxima
+# sincronização.
+
+# Nome na resposta -> modelo
+ENTIDADES = {'ordens': OrdemServico, 'clientes': Cliente, 'tecnicos': Tecnico}
+
+_NOMES = {modelo.__tablename__: nome for nome, modelo in ENTIDADES.items()}
+
+LIMITE_PADRAO = 1000
+LIMITE_MAXIMO = 10000
+
+VERSAO_TOKEN = 1
+
+
+class TokenInvalido(ValueError):
+    """Token de sincronização malformado ou adulterado"""
+
+
+class TokenExpirado(Exception):
+    """Token mais antigo que as exclusões guardadas: é preciso recomeçar"""
+
+
+def codificar_token(posicoes):
+    """Token opaco com a posição (momento, id) de cada fonte; id None indica
+    que tudo até o momento já foi lido"""
+    bruto = json.dumps({
+        'v': VERSAO_TOKEN,
+        'p': {fonte: [momento.isoformat(), id] for fonte, (momento, id) in posicoes.items()}
+    }, separators=(',', ':'))
+    return base64.urlsafe_b64encode(bruto.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_token(token):
+    try:
+        preenchimento = '=' * (-len(token) % 4)
+        dados = json.loads(base64.urlsafe_b64decode(token + preenchimento).decode('utf-8'))
+        if dados['v'] != VERSAO_TOKEN:
+            raise ValueError(dados['v'])
+        posicoes = {}
+        for fonte in (*ENTIDADES, 'exclusoes'):
+            momento, id = dados['p'][fonte]
+            posicoes[fonte] = (datetime.fromisoformat(momento), None if id is None else int(id))
+        return posicoes
+    except (ValueError, TypeError, KeyError) as e:
+        raise TokenInvalido(f'Token inválido: {token}') from e
+
+
+def _pagina(colunas, coluna_momento, coluna_id, posicao, corte, limite):
+    """Linhas após a posição e até o corte, no máximo `limite`. Retorna
+    (linhas, nova posição, há mais)"""
+    consulta = select(*colunas).where(coluna_momento <= corte)
+    if posicao is not None:
+        momento, id = posicao
+        if id is None:
+            consulta = consulta.where(coluna_momento > momento)
+        else:
+            # O >= isolado deixa o índice limitar a faixa
+            consulta = consulta.where(coluna_momento >= momento,
+                                      (coluna_momento > momento) | (coluna_id > id))
+    linhas = db.session.execute(
+        consulta.order_by(coluna_momento, coluna_id).limit(limite + 1)).all()
+
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        ultima = linhas[-1]._mapping
+        return linhas, (ultima[coluna_momento.key], ultima[coluna_id.key]), True
+    return linhas, (corte, None), False
+
+
+def sincronizar(token=None, limite=LIMITE_PADRAO):
+    """Alterações e exclusões desde o token, com o próximo token"""
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+    agora = datetime.utcnow()
+    corte = agora - timedelta(seconds=current_app.config['SYNC_MARGEM'])
+
+    if token:
+        posicoes = decodificar_token(token)
+        dias = current_app.config['SYNC_EXCLUSOES_DIAS']
+        if dias and posicoes['exclusoes'][0] < agora - timedelta(days=dias):
+            raise TokenExpirado()
+    else:
+        # Carga completa: as exclusões anteriores não interessam
+        posicoes = dict.fromkeys(ENTIDADES)
+        posicoes['exclusoes'] = (corte, None)
+
+    resultado = {'mais': False}
+    novas = {}
+
+    # Exclusões antes das linhas: um id excluído e recriado em seguida
+    # (SQLite reaproveita o maior id) aparece como linha, não como exclusão
+    linhas, novas['exclusoes'], mais = _pagina(
+        (Exclusao.tabela, Exclusao.registro_id, Exclusao.momento, Exclusao.id),
+        Exclusao.momento, Exclusao.id, posicoes['exclusoes'], corte, limite)
+    resultado['mais'] |= mais
+    excluidos = {nome: [] for nome in ENTIDADES}
+    for tabela, registro_id, _momento, _id in linhas:
+        if tabela in _NOMES:
+            excluidos[_NOMES[tabela]].append(registro_id)
+
+    for nome, modelo in ENTIDADES.items():
+        serializar = serializador(modelo)
+        linhas, novas[nome], mais = _pagina(
+            serializar.colunas, modelo.updated_at, modelo.id, posicoes[nome], corte, limite)
+        resultado['mais'] |= mais
+        resultado[nome] = serializar.serializar(linhas)
+        presentes = {linha['id'] for linha in resultado[nome]}
+        excluidos[nome] = [id for id in excluidos[nome] if id not in presentes]
+
+    resultado['excluidos'] = excluidos
+    resultado['token'] = codificar_token(novas)
+    return resultado
+
+
+def registrar(exclusoes, conexao=None):
+    """Grava as exclusões [(tabela, id)] e descarta as mais antigas que a
+    retenção"""
+    if not exclusoes:
+        return
+    conexao = conexao or db.session.connection()
+    agora = datetime.utcnow()
+    conexao.execute(insert(Exclusao.__table__), [
+        {'tabela': tabela, 'registro_id': registro_id, 'momento': agora}
+        for tabela, registro_id in exclusoes
+    ])
+
+    dias = current_app.config['SYNC_EXCLUSOES_DIAS'] if has_app_context() else None
+    if dias:
+        conexao.execute(delete(Exclusao.__table__).where(
+            Exclusao.momento < agora - timedelta(days=dias)))
+
+
+def _registrar_apos_flush(session, flush_context):
+    exclusoes = [(obj.__tablename__, obj.id) for obj in session.deleted
+                 if isinstance(obj, tuple(ENTIDADES.values()))]
+    if exclusoes:
+        registrar(exclusoes, session.connection())
+
+
+def init_sincronizacao(app):
+    """Registra as exclusões de ordens, clientes e técnicos a cada flush"""
+    if not event.contains(db.session, 'after_flush', _registrar_apos_flush):
+        event.listen(db.session, 'after_flush', _registrar_apos_flush)
@@ -0,0 +1,6 @@
+"""Benchmarks de latência dos endpoints da API.
+
+    python -m benchmarks.dados --tamanho 100k       # gera (ou reaproveita) a base
+    python -m benchmarks.executar --tamanho 100k    # mede e grava o JSON
+    python -m benchmarks.comparar antes.json depois.json
+"""
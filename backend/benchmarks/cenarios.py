@@ -0,0 +1,211 @@
+"""Cenários medidos: uma ou mais requisições para cada rota dos blueprints.
+
+As rotas que alteram dados trabalham sobre registros criados pelo próprio
+benchmark (os POST guardam os ids criados e os DELETE removem esses mesmos
+registros), então a base gerada só cresce com o que o benchmark cria.
+"""
+import itertools
+import json
+import threading
+
+from datetime import timedelta
+
+from benchmarks.dados import REFERENCIA
+
+# Repetições máximas de cenários que leem a tabela inteira
+REPETICOES_PESADO = 5
+
+
+class Cenario:
+    """Uma requisição medida repetidamente.
+
+    url e corpo podem ser funções do número da repetição (para gerar números
+    de OS únicos, por exemplo); ao_responder recebe o JSON de cada resposta.
+    """
+
+    def __init__(self, nome, metodo, url, corpo=None, pesado=False, ao_responder=None):
+        self.nome = nome
+        self.metodo = metodo
+        self.url = url
+        self.corpo = corpo
+        self.pesado = pesado
+        self.ao_responder = ao_responder
+
+    def montar(self, numero):
+        url = self.url(numero) if callable(self.url) else self.url
+        corpo = self.corpo(numero) if callable(self.corpo) else self.corpo
+        return url, corpo
+
+
+class Criados:
+    """Ids criados pelos POST e consumidos pelos DELETE, entre threads"""
+
+    def __init__(self):
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def guardar(self, tipo):
+        def guardar_id(dados):
+            if isinstance(dados, dict) and 'id' in dados:
+                with self._lock:
+                    self._ids.setdefault(tipo, []).append(dados['id'])
+        return guardar_id
+
+    def proximo(self, tipo):
+        with self._lock:
+            ids = self._ids.get(tipo)
+            return ids.pop(0) if ids else 0
+
+    def algum(self, tipo, padrao):
+        with self._lock:
+            ids = self._ids.get(tipo)
+            return ids[-1] if ids else padrao
+
+
+def descobrir(requisitar):
+    """Ids e valores existentes na base, obtidos pela própria API"""
+    def primeiro(url):
+        status, _cabecalhos, corpo = requisitar('GET', url, None)
+        if status != 200:
+            raise RuntimeError(f'{url} respondeu {status}')
+        dados = json.loads(corpo)
+        if isinstance(dados, dict) and 'itens' not in dados:
+            return dados
+        itens = dados['itens'] if isinstance(dados, dict) else dados
+        if not itens:
+            raise RuntimeError(f'{url} não retornou registros; gere a base antes')
+        return itens[0]
+
+    ordem = primeiro('/api/ordens/?limite=1')
+    cliente = primeiro(f'/api/clientes/{ordem["cliente_id"]}')
+    return {
+        'ordem': ordem,
+        'cliente': cliente,
+        'tecnico_id': ordem['tecnico_campo_id'],
+        'cidade_id': ordem['cidade_id'],
+        'termo_busca': cliente['nome_completo'].split()[-1][-4:],
+    }
+
+
+def montar_cenarios(base, prefixo='BENCH'):
+    """Lista de cenários na ordem de execução (leituras antes das escritas).
+
+    prefixo diferencia os números de OS criados em execuções distintas sobre
+    a mesma base.
+    """
+    criados = Criados()
+    ordem = base['ordem']
+    tecnico_id = base['tecnico_id']
+    cidade_id = base['cidade_id']
+    inicio = (REFERENCIA - timedelta(days=30)).date().isoformat()
+    fim = REFERENCIA.date().isoformat()
+    contador_lote = itertools.count()
+
+    def nova_ordem(numero):
+        return {
+            'numero_os': f'{prefixo}-{numero:07d}',
+            'status': 'PENDENTE',
+            'data_criacao': REFERENCIA.isoformat(),
+            'data_vencimento': (REFERENCIA + timedelta(days=7)).isoformat(),
+            'cliente_id': ordem['cliente_id'],
+            'tecnico_campo_id': tecnico_id,
+            'cidade_id': cidade_id,
+        }
+
+    def lote_ordens(_numero, tamanho=100):
+        lote = next(contador_lote)
+        return [dict(nova_ordem(0), numero_os=f'{prefixo}-L{lote:05d}-{i:03d}') for i in range(tamanho)]
+
+    return [
+        # Ordens
+        Cenario('ordens.listar (completa)', 'GET', '/api/ordens/', pesado=True),
+        Cenario('ordens.listar (stream)', 'GET', '/api/ordens/?stream=1', pesado=True),
+        Cenario('ordens.listar (cursor 100)', 'GET', '/api/ordens/?limite=100'),
+        Cenario('ordens.listar (filtros)', 'GET',
+                f'/api/ordens/?status=PENDENTE&cidade_id={cidade_id}&data_inicio={inicio}&limite=100'),
+        Cenario('ordens.obter', 'GET', f'/api/ordens/{ordem["id"]}'),
+        Cenario('ordens.proximas_vencimento', 'GET', '/api/ordens/proximas-vencimento?dias=7'),
+        Cenario('ordens.metricas', 'GET', '/api/ordens/metricas'),
+        Cenario('ordens.metricas (periodo)', 'GET',
+                f'/api/ordens/metricas?data_inicio={inicio}&data_fim={fim}'),
+        Cenario('dashboard.resumo', 'GET', '/api/dashboard/resumo'),
+        Cenario('dashboard.resumo (periodo)', 'GET',
+                f'/api/dashboard/resumo?data_inicio={inicio}&data_fim={fim}'),
+        Cenario('ordens.serie (semana)', 'GET', '/api/ordens/serie?intervalo=semana'),
+        Cenario('ordens.serie (dia, por tecnico)', 'GET',
+                '/api/ordens/serie?intervalo=dia&agrupar=tecnico&max_pontos=100'),
+        Cenario('sync (primeira pagina)', 'GET', '/api/sync?limite=1000'),
+
+        # Clientes
+        Cenario('clientes.listar', 'GET', f'/api/clientes/?cidade_id={cidade_id}'),
+        Cenario('clientes.listar (contatos)', 'GET',
+                f'/api/clientes/?cidade_id={cidade_id}&include=contatos'),
+        Cenario('clientes.obter', 'GET', f'/api/clientes/{ordem["cliente_id"]}'),
+        Cenario('clientes.buscar', 'GET', f'/api/clientes/busca?termo={base["termo_busca"]}'),
+
+        # Técnicos
+        Cenario('tecnicos.listar', 'GET', '/api/tecnicos/?include=contatos'),
+        Cenario('tecnicos.obter', 'GET', f'/api/tecnicos/{tecnico_id}'),
+        Cenario('tecnicos.desempenho', 'GET', f'/api/tecnicos/{tecnico_id}/desempenho'),
+
+        # Cidades
+        Cenario('cidades.listar', 'GET', '/api/cidades/'),
+        Cenario('cidades.obter', 'GET', f'/api/cidades/{cidade_id}'),
+        Cenario('cidades.ufs', 'GET', '/api/cidades/ufs'),
+        Cenario('cidades.regioes', 'GET', '/api/cidades/regioes'),
+
+        # Relatórios
+        Cenario('relatorios.admin_csv (os)', 'GET',
+                f'/api/relatorios/admin/csv?tipo=os&data_inicio={inicio}&data_fim={fim}'),
+        Cenario('relatorios.admin_csv (tecnicos)', 'GET', '/api/relatorios/admin/csv?tipo=tecnicos'),
+        Cenario('relatorios.admin_csv (cidades)', 'GET', '/api/relatorios/admin/csv?tipo=cidades'),
+        Cenario('relatorios.admin_pdf', 'GET', '/api/relatorios/admin/pdf?tipo=resumo', pesado=True),
+        Cenario('relatorios.tecnicos_pdf', 'GET', '/api/relatorios/tecnicos/pdf?dias=30', pesado=True),
+        Cenario('relatorios.criar_job', 'POST', '/api/relatorios/jobs',
+                corpo={'relatorio': 'tecnicos', 'parametros': {'dias': 30}}, pesado=True,
+                ao_responder=criados.guardar('job')),
+        Cenario('relatorios.status_job', 'GET',
+                lambda _n: f'/api/relatorios/jobs/{criados.algum("job", "inexistente")}'),
+        Cenario('relatorios.download_job', 'GET',
+                lambda _n: f'/api/relatorios/jobs/{criados.algum("job", "inexistente")}/download'),
+
+        # Escritas
+        Cenario('ordens.criar', 'POST', '/api/ordens/', corpo=nova_ordem,
+                ao_responder=criados.guardar('ordem')),
+        Cenario('ordens.atualizar', 'PUT', lambda _n: f'/api/ordens/{criados.algum("ordem", ordem["id"])}',
+                corpo=lambda n: {'observacoes': f'benchmark {n}'}),
+        Cenario('ordens.criar_em_lote (100)', 'POST', '/api/ordens/bulk', corpo=lote_ordens),
+        Cenario('ordens.atualizar_status (100)', 'PATCH', '/api/ordens/status',
+                corpo=lambda n: {'numeros_os': [f'{prefixo}-L00000-{i:03d}' for i in range(100)],
+                                 'status': ('AGENDADA', 'PENDENTE')[n % 2]}),
+        Cenario('ordens.excluir', 'DELETE', lambda _n: f'/api/ordens/{criados.proximo("ordem")}'),
+
+        Cenario('clientes.criar', 'POST', '/api/clientes/',
+                corpo=lambda n: {'nome_completo': f'Cliente Benchmark {prefixo} {n}', 'endereco': 'Rua A',
+                                 'bairro': 'Centro', 'cidade_id': cidade_id, 'uf': 'SP'},
+                ao_responder=criados.guardar('cliente')),
+        Cenario('clientes.atualizar', 'PUT',
+                lambda _n: f'/api/clientes/{criados.algum("cliente", ordem["cliente_id"])}',
+                corpo=lambda n: {'bairro': f'Bairro {n}'}),
+        Cenario('clientes.excluir', 'DELETE', lambda _n: f'/api/clientes/{criados.proximo("cliente")}'),
+
+        Cenario('tecnicos.criar', 'POST', '/api/tecnicos/',
+                corpo=lambda n: {'nome': f'Técnico Benchmark {prefixo} {n}',
+                                 'contatos': [{'tipo': 'celular', 'valor': f'(11) 9{n:08d}'}]},
+                ao_responder=criados.guardar('tecnico')),
+        Cenario('tecnicos.atualizar', 'PUT',
+                lambda _n: f'/api/tecnicos/{criados.algum("tecnico", tecnico_id)}',
+                corpo=lambda n: {'identificacao_campo': f'B{n}'}),
+        Cenario('tecnicos.excluir', 'DELETE', lambda _n: f'/api/tecnicos/{criados.proximo("tecnico")}'),
+
+        Cenario('cidades.criar', 'POST', '/api/cidades/',
+                corpo=lambda n: {'nome': f'Cidade Benchmark {prefixo} {n}', 'uf': 'SP'},
+                ao_responder=criados.guardar('cidade')),
+        Cenario('cidades.atualizar', 'PUT',
+                lambda _n: f'/api/cidades/{criados.algum("cidade", cidade_id)}',
+                corpo=lambda n: {'regiao': f'Região {n % 5}'}),
+        Cenario('cidades.excluir', 'DELETE', lambda _n: f'/api/cidades/{criados.proximo("cidade")}'),
+
+        Cenario('status', 'GET', '/api/status'),
+        Cenario('status.cache', 'GET', '/api/status/cache'),
+    ]
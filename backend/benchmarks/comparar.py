@@ -0,0 +1,76 @@
+"""Compara dois resultados de benchmarks.executar e aponta regressões.
+
+Uso:
+    python -m benchmarks.comparar ANTES.json DEPOIS.json [--tolerancia 0.2]
+
+Sai com código 1 se algum cenário piorou além da tolerância no p95 ou
+passou a executar mais comandos SQL.
+"""
+import argparse
+import json
+import sys
+
+# Diferenças de latência abaixo disso são ruído, qualquer que seja o percentual
+MINIMO_MS = 2.0
+
+
+def _indexar(relatorio):
+    return {(r['tamanho'], r['modo'], r['cenario']): r for r in relatorio['resultados']}
+
+
+def comparar(antes, depois, tolerancia=0.2, metrica='p95'):
+    """Retorna as linhas da comparação e a lista de regressões"""
+    anteriores = _indexar(antes)
+    linhas, regressoes = [], []
+    for chave, atual in _indexar(depois).items():
+        anterior = anteriores.get(chave)
+        if anterior is None:
+            continue
+        tempo_antes = anterior['latencia_ms'][metrica]
+        tempo_depois = atual['latencia_ms'][metrica]
+        variacao = (tempo_depois - tempo_antes) / tempo_antes if tempo_antes else 0
+        sql_antes = anterior['sql_por_requisicao']['media']
+        sql_depois = atual['sql_por_requisicao']['media']
+
+        motivos = []
+        if variacao > tolerancia and tempo_depois - tempo_antes > MINIMO_MS:
+            motivos.append(f'{metrica} +{variacao:.0%}')
+        if sql_depois > sql_antes:
+            motivos.append(f'SQL {sql_antes:g} -> {sql_depois:g}')
+
+        linha = (chave, tempo_antes, tempo_depois, variacao, sql_antes, sql_depois, motivos)
+        linhas.append(linha)
+        if motivos:
+            regressoes.append(linha)
+    return linhas, regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compara dois resultados de benchmark')
+    parser.add_argument('antes')
+    parser.add_argument('depois')
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help='Piora relativa aceita na latência (padrão: %(default)s = 20%%)')
+    parser.add_argument('--metrica', choices=('p50', 'p95', 'p99'), default='p95')
+    args = parser.parse_args(argv)
+
+    with open(args.antes, encoding='utf-8') as f:
+        antes = json.load(f)
+    with open(args.depois, encoding='utf-8') as f:
+        depois = json.load(f)
+
+    linhas, regressoes = comparar(antes, depois, args.tolerancia, args.metrica)
+    for (tamanho, modo, cenario), tempo_antes, tempo_depois, variacao, sql_antes, sql_depois, motivos in linhas:
+        marcador = 'PIOROU' if motivos else ''
+        print(f'{tamanho:>5} {modo:<9} {cenario:<38} {tempo_antes:9.2f} -> {tempo_depois:9.2f}ms '
+              f'({variacao:+6.0%})  SQL {sql_antes:g} -> {sql_depois:g}  {marcador}')
+
+    if regressoes:
+        print(f'\n{len(regressoes)} cenário(s) com regressão:', file=sys.stderr)
+        for (tamanho, modo, cenario), *_resto, motivos in regressoes:
+            print(f'  {tamanho} {modo} {cenario}: {", ".join(motivos)}', file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Gerador determinístico das bases SQLite usadas nos benchmarks.
+
+Uso:
+    python -m benchmarks.dados --tamanho 10k|100k|1m [--diretorio DIR] [--recriar]
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import select, text
+
+# Quantidade de ordens de serviço de cada base
+TAMANHOS = {
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+}
+
+# Semente e data de referência fixas: a mesma base em qualquer máquina
+SEMENTE = 20240101
+REFERENCIA = datetime(2024, 12, 31, 18, 0, 0)
+
+# Versão do gerador; mudar invalida as bases já geradas
+VERSAO = 3
+
+DIRETORIO_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.dados')
+
+
+def caminho_base(tamanho, diretorio=DIRETORIO_PADRAO):
+    return os.path.join(diretorio, f'ordens_{tamanho}.db')
+
+
+def _caminho_metadados(caminho):
+    return caminho + '.json'
+
+
+def metadados(tamanho):
+    return {'tamanho': tamanho, 'ordens': TAMANHOS[tamanho], 'semente': SEMENTE,
+            'referencia': REFERENCIA.isoformat(), 'versao': VERSAO}
+
+
+def base_atualizada(caminho, tamanho):
+    """Indica se o arquivo existe e foi gerado com os parâmetros atuais"""
+    if not os.path.exists(caminho):
+        return False
+    try:
+        with open(_caminho_metadados(caminho), encoding='utf-8') as f:
+            return json.load(f) == metadados(tamanho)
+    except (OSError, ValueError):
+        return False
+
+
+def _contatos_tecnicos(carregador):
+    """Um celular e um e-mail por técnico sintético"""
+    from app import db
+    from app.services.contato import Contato
+    from seed import inserir_em_lotes
+
+    com_contato = set(db.session.scalars(
+        select(Contato.entidade_id).where(Contato.entidade_tipo == 'tecnico')))
+    contatos = []
+    for nome, id in sorted(carregador.tecnicos.items()):
+        if id in com_contato or not nome.startswith('Técnico Sintético'):
+            continue
+        contatos.append({'entidade_tipo': 'tecnico', 'entidade_id': id, 'tipo': 'celular',
+                         'valor': f'(11) 98{id:07d}', 'principal': True})
+        contatos.append({'entidade_tipo': 'tecnico', 'entidade_id': id, 'tipo': 'email',
+                         'valor': f'tecnico{id}@exemplo.com.br', 'principal': False})
+    carregador._contar('contatos', inserir_em_lotes(Contato, contatos, carregador.lote))
+
+
+def gerar(tamanho, diretorio=DIRETORIO_PADRAO, recriar=False):
+    """Gera a base do tamanho informado e retorna o caminho do arquivo.
+
+    A base é reaproveitada se já existir com os mesmos parâmetros. Roda em
+    um processo com DATABASE_URL apontando para o arquivo, pois a aplicação
+    lê a URL na criação.
+    """
+    caminho = caminho_base(tamanho, diretorio)
+    if not recriar and base_atualizada(caminho, tamanho):
+        return caminho
+
+    os.makedirs(diretorio, exist_ok=True)
+    for arquivo in (caminho, caminho + '-wal', caminho + '-shm', _caminho_metadados(caminho)):
+        if os.path.exists(arquivo):
+            os.remove(arquivo)
+
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(caminho)}'
+    from app import create_app, db
+    from app.services.busca_clientes import indice_disponivel, reconstruir as reconstruir_busca
+    from app.services.resumo_diario import reconstruir
+    from app.services.contadores_ordens import reconstruir as reconstruir_contadores
+    from seed import Carregador
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        inicio = time.perf_counter()
+        carregador = Carregador(lote=5000)
+        carregador.gerar_sinteticas(TAMANHOS[tamanho], semente=SEMENTE, referencia=REFERENCIA)
+        _contatos_tecnicos(carregador)
+        reconstruir()
+        reconstruir_contadores()
+        if indice_disponivel():
+            reconstruir_busca()
+        db.session.commit()
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+
+        for nome, total in carregador.totais.items():
+            print(f'{nome.capitalize()} inseridos: {total}')
+        print(f'Base {tamanho} gerada em {time.perf_counter() - inicio:.2f}s: {caminho}')
+
+    with open(_caminho_metadados(caminho), 'w', encoding='utf-8') as f:
+        json.dump(metadados(tamanho), f)
+    return caminho
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gera a base SQLite dos benchmarks')
+    parser.add_argument('--tamanho', choices=TAMANHOS, default='10k')
+    parser.add_argument('--diretorio', default=DIRETORIO_PADRAO,
+                        help='Onde guardar as bases (padrão: %(default)s)')
+    parser.add_argument('--recriar', action='store_true', help='Gera de novo mesmo se já existir')
+    args = parser.parse_args(argv)
+    print(gerar(args.tamanho, args.diretorio, args.recriar))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+"""Mede a latência de todas as rotas da API e grava o resultado em JSON.
+
+Uso:
+    python -m benchmarks.executar [--tamanho 10k] [--modo cliente|gunicorn|ambos]
+                                  [--repeticoes 30] [--saida resultado.json]
+
+Cada cenário roda primeiro pelo test client do Flask (sem rede, no mesmo
+processo) e depois por um gunicorn real. Para cada um são registrados p50,
+p95 e p99 da latência, vazão, comandos SQL por requisição e pico de RSS.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+from benchmarks.cenarios import REPETICOES_PESADO, descobrir, montar_cenarios
+from benchmarks.dados import TAMANHOS, gerar
+from benchmarks.medicao import CABECALHO_RSS, CABECALHO_SQL
+
+DIRETORIO_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODOS = ('cliente', 'gunicorn')
+
+# Mesmo worker em todas as medições, para que os números sejam comparáveis
+WORKER_GUNICORN = 'sync'
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) com interpolação linear entre as amostras"""
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+
+class ClienteFlask:
+    """Requisições pelo test client do Flask, no mesmo processo"""
+
+    def __init__(self, app):
+        self.cliente = app.test_client()
+
+    def __call__(self, metodo, url, corpo):
+        resposta = self.cliente.open(url, method=metodo, json=corpo)
+        dados = resposta.get_data()
+        return resposta.status_code, resposta.headers, dados
+
+
+class ClienteHttp:
+    """Requisições HTTP para um servidor real; uma conexão por thread"""
+
+    def __init__(self, host, porta):
+        self.host = host
+        self.porta = porta
+        self._local = threading.local()
+
+    def __call__(self, metodo, url, corpo):
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = self._local.conexao = http.client.HTTPConnection(self.host, self.porta, timeout=600)
+        cabecalhos = {}
+        if corpo is not None:
+            corpo = json.dumps(corpo).encode()
+            cabecalhos['Content-Type'] = 'application/json'
+        try:
+            conexao.request(metodo, url, body=corpo, headers=cabecalhos)
+            resposta = conexao.getresponse()
+            dados = resposta.read()
+        except (http.client.HTTPException, OSError):
+            # O worker sync do gunicorn fecha a conexão; tenta uma vez com outra
+            conexao.close()
+            conexao.request(metodo, url, body=corpo, headers=cabecalhos)
+            resposta = conexao.getresponse()
+            dados = resposta.read()
+        return resposta.status, resposta.headers, dados
+
+
+def medir(cenario, requisitar, repeticoes, aquecimento, concorrencia, numeros):
+    """Executa o cenário e retorna as estatísticas"""
+    if cenario.pesado:
+        repeticoes = min(repeticoes, REPETICOES_PESADO)
+        aquecimento = min(aquecimento, 1)
+
+    def executar_uma():
+        url, corpo = cenario.montar(next(numeros))
+        inicio = time.perf_counter()
+        status, cabecalhos, dados = requisitar(cenario.metodo, url, corpo)
+        duracao = time.perf_counter() - inicio
+        if cenario.ao_responder and status < 300:
+            try:
+                cenario.ao_responder(json.loads(dados))
+            except ValueError:
+                pass
+        return (duracao, status, int(cabecalhos.get(CABECALHO_SQL, 0)),
+                int(cabecalhos.get(CABECALHO_RSS, 0)), len(dados))
+
+    for _ in range(aquecimento):
+        executar_uma()
+
+    inicio = time.perf_counter()
+    if concorrencia > 1:
+        with ThreadPoolExecutor(concorrencia) as executor:
+            amostras = list(executor.map(lambda _i: executar_uma(), range(repeticoes)))
+    else:
+        amostras = [executar_uma() for _ in range(repeticoes)]
+    total = time.perf_counter() - inicio
+
+    latencias = [amostra[0] * 1000 for amostra in amostras]
+    status = {}
+    for amostra in amostras:
+        status[str(amostra[1])] = status.get(str(amostra[1]), 0) + 1
+    sql = [amostra[2] for amostra in amostras]
+
+    return {
+        'requisicoes': len(amostras),
+        'status': status,
+        'latencia_ms': {
+            'p50': round(percentil(latencias, 50), 3),
+            'p95': round(percentil(latencias, 95), 3),
+            'p99': round(percentil(latencias, 99), 3),
+            'media': round(sum(latencias) / len(latencias), 3),
+            'min': round(min(latencias), 3),
+            'max': round(max(latencias), 3),
+        },
+        'vazao_rps': round(len(amostras) / total, 2) if total else None,
+        'sql_por_requisicao': {'media': round(sum(sql) / len(sql), 2), 'max': max(sql)},
+        'rss_pico_kb': max(amostra[3] for amostra in amostras),
+        'bytes_resposta': max(amostra[4] for amostra in amostras),
+    }
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def servidor_gunicorn(caminho_banco, workers, porta=None):
+    """Sobe um gunicorn com a aplicação instrumentada e espera ficar pronto.
+
+    O gunicorn.conf.py de backend/ é ignorado (-c /dev/null): o worker é
+    sempre WORKER_GUNICORN e as métricas ficam num diretório próprio, sem
+    apagar o de um servidor que esteja rodando na mesma máquina.
+    """
+    porta = porta or _porta_livre()
+    metricas = tempfile.mkdtemp(prefix='bench_metricas_')
+    ambiente = dict(os.environ, DATABASE_URL=f'sqlite:///{caminho_banco}',
+                    PROMETHEUS_MULTIPROC_DIR=metricas)
+    processo = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.devnull,
+         '--worker-class', WORKER_GUNICORN, '--workers', str(workers), '--timeout', '600',
+         '--bind', f'127.0.0.1:{porta}', 'benchmarks.servidor:app'],
+        cwd=DIRETORIO_BACKEND, env=ambiente
+    )
+    try:
+        limite = time.monotonic() + 60
+        while True:
+            if processo.poll() is not None:
+                raise RuntimeError(f'gunicorn encerrou com código {processo.returncode}')
+            try:
+                conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=2)
+                conexao.request('GET', '/api/status')
+                if conexao.getresponse().status == 200:
+                    break
+            except OSError:
+                pass
+            if time.monotonic() > limite:
+                raise RuntimeError('gunicorn não respondeu em 60s')
+            time.sleep(0.2)
+        yield ClienteHttp('127.0.0.1', porta)
+    finally:
+        processo.terminate()
+        try:
+            processo.wait(10)
+        except subprocess.TimeoutExpired:
+            processo.kill()
+        shutil.rmtree(metricas, ignore_errors=True)
+
+
+@contextmanager
+def copia_da_base(caminho):
+    """Cópia descartável da base, para que as escritas não alterem a original"""
+    with tempfile.TemporaryDirectory(prefix='bench_') as diretorio:
+        destino = os.path.join(diretorio, os.path.basename(caminho))
+        shutil.copyfile(caminho, destino)
+        yield destino
+
+
+@contextmanager
+def cliente_flask(caminho_banco):
+    os.environ['DATABASE_URL'] = f'sqlite:///{caminho_banco}'
+    from benchmarks.medicao import criar_app
+    app = criar_app()
+    app.config['TESTING'] = True
+    yield ClienteFlask(app)
+
+
+def executar_modo(modo, caminho_base, args):
+    """Roda todos os cenários em um modo e retorna a lista de resultados"""
+    with copia_da_base(caminho_base) as caminho:
+        if modo == 'cliente':
+            contexto, concorrencia = cliente_flask(caminho), 1
+        else:
+            contexto, concorrencia = servidor_gunicorn(caminho, args.workers), args.concorrencia
+
+        with contexto as requisitar:
+            cenarios = montar_cenarios(descobrir(requisitar))
+            resultados = []
+            for cenario in cenarios:
+                if args.cenarios and not any(filtro in cenario.nome for filtro in args.cenarios):
+                    continue
+                numeros = itertools.count()
+                estatisticas = medir(cenario, requisitar, args.repeticoes, args.aquecimento,
+                                     concorrencia, numeros)
+                latencia = estatisticas['latencia_ms']
+                print(f'  {cenario.nome:<38} p50 {latencia["p50"]:9.2f}ms  p95 {latencia["p95"]:9.2f}ms  '
+                      f'p99 {latencia["p99"]:9.2f}ms  {estatisticas["vazao_rps"]:8.1f} req/s  '
+                      f'SQL {estatisticas["sql_por_requisicao"]["media"]:6.1f}  '
+                      f'RSS {estatisticas["rss_pico_kb"] / 1024:7.1f} MiB', file=sys.stderr)
+                resultados.append(dict(
+                    cenario=cenario.nome, metodo=cenario.metodo,
+                    url=cenario.montar(0)[0], modo=modo, concorrencia=concorrencia,
+                    **estatisticas
+                ))
+            return resultados
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=DIRETORIO_BACKEND,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de latência dos endpoints')
+    parser.add_argument('--tamanho', choices=TAMANHOS, action='append',
+                        help='Tamanho da base (pode repetir; padrão: 10k)')
+    parser.add_argument('--modo', choices=MODOS + ('ambos',), default='ambos')
+    parser.add_argument('--repeticoes', type=int, default=30, help='Requisições medidas por cenário')
+    parser.add_argument('--aquecimento', type=int, default=2, help='Requisições descartadas por cenário')
+    parser.add_argument('--workers', type=int, default=2, help='Workers do gunicorn')
+    parser.add_argument('--concorrencia', type=int, default=4,
+                        help='Requisições simultâneas contra o gunicorn')
+    parser.add_argument('--cenario', dest='cenarios', action='append',
+                        help='Roda só os cenários cujo nome contém o texto (pode repetir)')
+    parser.add_argument('--saida', help='Arquivo JSON do resultado (padrão: stdout)')
+    args = parser.parse_args(argv)
+
+    tamanhos = args.tamanho or ['10k']
+    modos = MODOS if args.modo == 'ambos' else (args.modo,)
+
+    resultados = []
+    for tamanho in tamanhos:
+        caminho_base = gerar(tamanho)
+        for modo in modos:
+            print(f'[{tamanho} / {modo}]', file=sys.stderr)
+            for resultado in executar_modo(modo, caminho_base, args):
+                resultados.append(dict(tamanho=tamanho, **resultado))
+
+    relatorio = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit_atual(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'perfil_banco': os.environ.get('DB_PERFIL', 'desenvolvimento'),
+        'parametros': {
+            'repeticoes': args.repeticoes,
+            'aquecimento': args.aquecimento,
+            'workers': args.workers,
+            'worker_gunicorn': WORKER_GUNICORN,
+            'concorrencia': args.concorrencia,
+        },
+        'resultados': resultados,
+    }
+
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+        print(f'Resultado gravado em {args.saida}', file=sys.stderr)
+    else:
+        print(texto)
+
+
+if __name__ == '__main__':
+    main()
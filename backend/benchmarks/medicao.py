@@ -0,0 +1,74 @@
+"""Instrumentação da aplicação durante os benchmarks.
+
+Cada resposta recebe os cabeçalhos X-Bench-SQL (comandos SQL executados na
+requisição) e X-Bench-RSS-Pico (pico de memória residente do processo
+durante a requisição, em KiB). Assim os números chegam ao medidor tanto pelo
+test client quanto por um gunicorn em outro processo.
+"""
+import resource
+import sys
+
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CABECALHO_SQL = 'X-Bench-SQL'
+CABECALHO_RSS = 'X-Bench-RSS-Pico'
+
+_PROC_STATUS = '/proc/self/status'
+_PROC_CLEAR_REFS = '/proc/self/clear_refs'
+
+
+def zerar_pico_rss():
+    """Zera o pico de RSS do processo (Linux); retorna False se não suportado"""
+    try:
+        with open(_PROC_CLEAR_REFS, 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def pico_rss_kb():
+    """Pico de RSS do processo em KiB (desde o último zerar_pico_rss no Linux)"""
+    try:
+        with open(_PROC_STATUS) as f:
+            for linha in f:
+                if linha.startswith('VmHWM:'):
+                    return int(linha.split()[1])
+    except OSError:
+        pass
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em bytes no macOS e em KiB no Linux
+    return pico // 1024 if sys.platform == 'darwin' else pico
+
+
+def _contar_sql(*_args):
+    if has_request_context():
+        g.bench_sql = g.get('bench_sql', 0) + 1
+
+
+def instrumentar(app):
+    """Registra a contagem de SQL e a medição de memória por requisição"""
+    if not event.contains(Engine, 'before_cursor_execute', _contar_sql):
+        event.listen(Engine, 'before_cursor_execute', _contar_sql)
+
+    @app.before_request
+    def _iniciar_medicao():
+        g.bench_sql = 0
+        zerar_pico_rss()
+
+    @app.after_request
+    def _informar_medicao(resposta):
+        # Em respostas em streaming os números cobrem só o início da resposta
+        resposta.headers[CABECALHO_SQL] = str(g.get('bench_sql', 0))
+        resposta.headers[CABECALHO_RSS] = str(pico_rss_kb())
+        return resposta
+
+    return app
+
+
+def criar_app():
+    """Aplicação instrumentada (banco em DATABASE_URL)"""
+    from app import create_app
+    return instrumentar(create_app())
@@ -0,0 +1,7 @@
+"""Aplicação instrumentada para o gunicorn dos benchmarks:
+
+    gunicorn benchmarks.servidor:app
+"""
+from benchmarks.medicao import criar_app
+
+app = criar_app()
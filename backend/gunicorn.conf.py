@@ -0,0 +1,30 @@
+"""Configuração do gunicorn (lida automaticamente ao rodar a partir de backend/).
+
+As métricas do Prometheus (/api/metrics) de todos os workers são somadas a
+partir de arquivos em PROMETHEUS_MULTIPROC_DIR. O diretório é limpo ao subir
+o servidor e os arquivos de workers encerrados são marcados como mortos.
+
+Os workers são sync: as rotas de PDF e CSV ocupam CPU e os relatórios usam
+um pool de processos, que trava sob o monkey-patching do gevent. O feed
+/api/ordens/stream (SSE) roda num segundo gunicorn, com workers gevent
+(gunicorn_stream.conf.py), e este responde 404 nessa rota
+(EVENTOS_ORDENS_STREAM=0).
+"""
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault('EVENTOS_ORDENS_STREAM', '0')
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR',
+                      os.path.join(tempfile.gettempdir(), 'dashboard_os_metricas'))
+
+
+def on_starting(server):
+    diretorio = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(diretorio, ignore_errors=True)
+    os.makedirs(diretorio, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
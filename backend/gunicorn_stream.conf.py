@@ -0,0 +1,46 @@
+"""Configuração do gunicorn do feed de alterações (/api/ordens/stream):
+
+    gunicorn -c gunicorn_stream.conf.py wsgi:app
+
+Cada conexão SSE aberta é um greenlet parado esperando eventos, então
+centenas de dashboards abertos não ocupam um worker cada, como aconteceria
+com o worker sync de gunicorn.conf.py. Sem o gevent instalado, cai para
+gthread (uma thread por conexão, até GUNICORN_THREADS). As demais rotas
+continuam no gunicorn da API; o frontend abre o EventSource direto neste
+servidor (VITE_EVENTOS_URL). Os eventos são lidos de eventos_ordens, então
+DATABASE_URL tem de apontar para o mesmo banco da API.
+
+As métricas deste servidor ficam num diretório próprio, para que subir um
+não apague os arquivos do outro.
+"""
+import os
+import shutil
+import tempfile
+
+bind = os.environ.get('GUNICORN_STREAM_BIND', '127.0.0.1:5001')
+workers = int(os.environ.get('GUNICORN_STREAM_WORKERS', 1))
+
+try:
+    import gevent  # noqa: F401
+except ImportError:
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_THREADS', 32))
+else:
+    worker_class = 'gevent'
+    worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+os.environ['EVENTOS_ORDENS_STREAM'] = '1'
+os.environ['PROMETHEUS_MULTIPROC_DIR'] = os.environ.get(
+    'PROMETHEUS_MULTIPROC_DIR_STREAM',
+    os.path.join(tempfile.gettempdir(), 'dashboard_os_metricas_stream'))
+
+
+def on_starting(server):
+    diretorio = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(diretorio, ignore_errors=True)
+    os.makedirs(diretorio, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,40 @@
+"""indices compostos em ordens_servico
+
+Revision ID: 3f2a9c1d7e41
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7e41'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (nome, colunas) — espelha OrdemServico.__table_args__
+INDICES = [
+    ('ix_ordens_servico_data_criacao_id', ['data_criacao', 'id']),
+    ('ix_ordens_servico_status_data_criacao', ['status', 'data_criacao']),
+    ('ix_ordens_servico_status_data_vencimento', ['status', 'data_vencimento']),
+    ('ix_ordens_servico_data_vencimento', ['data_vencimento']),
+    ('ix_ordens_servico_tecnico_campo_data_criacao', ['tecnico_campo_id', 'data_criacao', 'status']),
+    ('ix_ordens_servico_tecnico_app_data_criacao', ['tecnico_app_id', 'data_criacao', 'status']),
+    ('ix_ordens_servico_cidade_data_criacao', ['cidade_id', 'data_criacao', 'status']),
+]
+
+
+def upgrade():
+    # As tabelas foram criadas com db.create_all(); bancos novos já recebem
+    # os índices por lá, por isso o if_not_exists
+    for nome, colunas in INDICES:
+        op.create_index(nome, 'ordens_servico', colunas, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for nome, _ in reversed(INDICES):
+        op.drop_index(nome, table_name='ordens_servico', if_exists=True)
@@ -0,0 +1,59 @@
+"""resumo diario de ordens de servico
+
+Revision ID: 8b4e6d2a1c73
+Revises: 3f2a9c1d7e41
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e6d2a1c73'
+down_revision = '3f2a9c1d7e41'
+branch_labels = None
+depends_on = None
+
+
+INDICES = [
+    ('ix_resumo_diario_ordens_dia', ['dia']),
+    ('ix_resumo_diario_ordens_tecnico_campo_dia', ['tecnico_campo_id', 'dia']),
+    ('ix_resumo_diario_ordens_tecnico_app_dia', ['tecnico_app_id', 'dia']),
+    ('ix_resumo_diario_ordens_cidade_dia', ['cidade_id', 'dia']),
+]
+
+
+def upgrade():
+    op.create_table(
+        'resumo_diario_ordens',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('dia', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('tecnico_campo_id', sa.Integer(), nullable=False),
+        sa.Column('tecnico_app_id', sa.Integer(), nullable=True),
+        sa.Column('cidade_id', sa.Integer(), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('total_instaladas', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    for nome, colunas in INDICES:
+        op.create_index(nome, 'resumo_diario_ordens', colunas, unique=False, if_not_exists=True)
+
+    # Carga inicial a partir das ordens existentes
+    op.execute('DELETE FROM resumo_diario_ordens')
+    op.execute("""
+        INSERT INTO resumo_diario_ordens
+            (dia, status, tecnico_campo_id, tecnico_app_id, cidade_id, total, total_instaladas)
+        SELECT date(data_criacao), status, tecnico_campo_id, tecnico_app_id, cidade_id,
+               count(id), sum(CASE WHEN status = 'INSTALADA' THEN 1 ELSE 0 END)
+        FROM ordens_servico
+        GROUP BY date(data_criacao), status, tecnico_campo_id, tecnico_app_id, cidade_id
+    """)
+
+
+def downgrade():
+    for nome, _ in reversed(INDICES):
+        op.drop_index(nome, table_name='resumo_diario_ordens', if_exists=True)
+    op.drop_table('resumo_diario_ordens')
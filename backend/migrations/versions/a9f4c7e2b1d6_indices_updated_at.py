@@ -0,0 +1,33 @@
+"""indices em updated_at para a ETag das listagens
+
+Revision ID: a9f4c7e2b1d6
+Revises: e7a3b9c2d5f8
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9f4c7e2b1d6'
+down_revision = 'e7a3b9c2d5f8'
+branch_labels = None
+depends_on = None
+
+
+# (nome, tabela) — espelha os __table_args__ de OrdemServico e Cliente
+INDICES = [
+    ('ix_ordens_servico_updated_at', 'ordens_servico'),
+    ('ix_clientes_updated_at', 'clientes'),
+]
+
+
+def upgrade():
+    for nome, tabela in INDICES:
+        op.create_index(nome, tabela, ['updated_at'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for nome, tabela in reversed(INDICES):
+        op.drop_index(nome, table_name=tabela, if_exists=True)
@@ -0,0 +1,38 @@
+"""registro de exclusões e índice em tecnicos.updated_at para o sync
+
+Revision ID: b3e9d5a7f2c1
+Revises: f4c8a2d6e1b7
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e9d5a7f2c1'
+down_revision = 'f4c8a2d6e1b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'exclusoes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tabela', sa.String(length=30), nullable=False),
+        sa.Column('registro_id', sa.Integer(), nullable=False),
+        sa.Column('momento', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    op.create_index('ix_exclusoes_momento_id', 'exclusoes', ['momento', 'id'],
+                    unique=False, if_not_exists=True)
+    op.create_index('ix_tecnicos_updated_at', 'tecnicos', ['updated_at'],
+                    unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_tecnicos_updated_at', table_name='tecnicos', if_exists=True)
+    op.drop_index('ix_exclusoes_momento_id', table_name='exclusoes', if_exists=True)
+    op.drop_table('exclusoes')
@@ -0,0 +1,27 @@
+"""indice da relacao polimorfica em contatos
+
+Revision ID: c5d1e8f4a2b9
+Revises: 8b4e6d2a1c73
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d1e8f4a2b9'
+down_revision = '8b4e6d2a1c73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Espelha Contato.__table_args__; bancos criados com db.create_all() já têm o índice
+    op.create_index('ix_contatos_entidade', 'contatos',
+                    ['entidade_tipo', 'entidade_id', 'principal'],
+                    unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_contatos_entidade', table_name='contatos', if_exists=True)
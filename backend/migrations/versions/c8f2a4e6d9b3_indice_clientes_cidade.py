@@ -0,0 +1,25 @@
+"""indice em clientes.cidade_id
+
+Revision ID: c8f2a4e6d9b3
+Revises: b3e9d5a7f2c1
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8f2a4e6d9b3'
+down_revision = 'b3e9d5a7f2c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_clientes_cidade_id', 'clientes', ['cidade_id'],
+                    unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_clientes_cidade_id', table_name='clientes', if_exists=True)
@@ -0,0 +1,46 @@
+"""contadores de ordens por status, tecnico e cidade
+
+Revision ID: d2b6f1a8c4e3
+Revises: a9f4c7e2b1d6
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2b6f1a8c4e3'
+down_revision = 'a9f4c7e2b1d6'
+branch_labels = None
+depends_on = None
+
+
+DIMENSOES = ('status', 'tecnico_campo_id', 'cidade_id')
+
+
+def upgrade():
+    op.create_table(
+        'contadores_ordens',
+        sa.Column('dimensao', sa.String(length=20), nullable=False),
+        sa.Column('valor', sa.String(length=50), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('total_instaladas', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('dimensao', 'valor'),
+        if_not_exists=True
+    )
+
+    # Carga inicial a partir das ordens existentes
+    op.execute('DELETE FROM contadores_ordens')
+    for dimensao in DIMENSOES:
+        op.execute(f"""
+            INSERT INTO contadores_ordens (dimensao, valor, total, total_instaladas)
+            SELECT '{dimensao}', CAST({dimensao} AS VARCHAR(50)),
+                   count(id), sum(CASE WHEN status = 'INSTALADA' THEN 1 ELSE 0 END)
+            FROM ordens_servico
+            GROUP BY {dimensao}
+        """)
+
+
+def downgrade():
+    op.drop_table('contadores_ordens')
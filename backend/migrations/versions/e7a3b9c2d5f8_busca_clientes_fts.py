@@ -0,0 +1,37 @@
+"""indice de busca textual de clientes (FTS5)
+
+Revision ID: e7a3b9c2d5f8
+Revises: c5d1e8f4a2b9
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a3b9c2d5f8'
+down_revision = 'c5d1e8f4a2b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 só existe no SQLite; nos demais bancos a busca usa ilike
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    from app.services.busca_clientes import CRIAR_INDICE, reconstruir
+
+    conexao = op.get_bind()
+    conexao.execute(CRIAR_INDICE)
+    reconstruir(conexao)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    from app.services.busca_clientes import REMOVER_INDICE
+
+    op.get_bind().execute(REMOVER_INDICE)
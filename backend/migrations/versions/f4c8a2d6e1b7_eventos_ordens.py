@@ -0,0 +1,33 @@
+"""eventos de ordens para o feed SSE
+
+Revision ID: f4c8a2d6e1b7
+Revises: d2b6f1a8c4e3
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c8a2d6e1b7'
+down_revision = 'd2b6f1a8c4e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'eventos_ordens',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tipo', sa.String(length=20), nullable=False),
+        sa.Column('ordem_id', sa.Integer(), nullable=False),
+        sa.Column('momento', sa.DateTime(), nullable=False),
+        sa.Column('dados', sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('eventos_ordens')
@@ -1,82 +1,285 @@
+import argparse
 import json
 import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+
 from app import create_app, db
 from app.models.cidade import Cidade
 from app.models.cliente import Cliente
 from app.models.tecnico import Tecnico
 from app.models.ordem_servico import OrdemServico
+from app.services.contato import Contato
+from app.services.resumo_diario import reconstruir
+from app.services.contadores_ordens import reconstruir as reconstruir_contadores
+from app.services.busca_clientes import indice_disponivel, reconstruir as reconstruir_busca
+from app.services.cache_agregados import obter_cache
+
+# Linhas enviadas ao banco por comando INSERT (executemany)
+LOTE_PADRAO = 1000
+
+# Caminho padrão dos arquivos JSON gerados por converter_dados
+DADOS_PADRAO = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'src', 'assets')
+
+# Prazo padrão entre a abertura e o vencimento de uma OS
+PRAZO_VENCIMENTO = timedelta(days=7)
+
+STATUS_SINTETICOS = ('INSTALADA', 'PENDENTE', 'AGENDADA', 'CANCELADA')
+
+
+def inserir_em_lotes(modelo, linhas, lote):
+    """Insere as linhas (dicionários) com executemany, em lotes"""
+    for i in range(0, len(linhas), lote):
+        db.session.execute(insert(modelo.__table__), linhas[i:i + lote])
+    return len(linhas)
+
+
+class Carregador:
+    """Carga em massa de cidades, técnicos, clientes e ordens de serviço.
+
+    Cidades, técnicos e clientes já existentes são lidos uma única vez para
+    dicionários em memória; os que faltam são inseridos em lote e os mapas
+    recarregados, sem nenhuma consulta por linha. Tudo acontece em uma única
+    transação, confirmada pelo chamador.
+    """
+
+    def __init__(self, lote=LOTE_PADRAO):
+        self.lote = lote
+        self.cidades = {}
+        self.tecnicos = {}
+        self.clientes = {}
+        self.numeros_os = set()
+        self.totais = {}
+        self._carregar_mapas()
+
+    def _carregar_mapas(self):
+        self.cidades = {nome: id for id, nome in db.session.execute(select(Cidade.id, Cidade.nome))}
+        self.tecnicos = {nome: id for id, nome in db.session.execute(select(Tecnico.id, Tecnico.nome))}
+        self.clientes = {
+            self._chave_cliente(nome, cpf, endereco): id
+            for id, nome, cpf, endereco in db.session.execute(
+                select(Cliente.id, Cliente.nome_completo, Cliente.cpf, Cliente.endereco))
+        }
+        self.numeros_os = set(db.session.scalars(select(OrdemServico.numero_os)))
+
+    @staticmethod
+    def _chave_cliente(nome, cpf, endereco):
+        # CPF identifica o cliente; sem ele, nome + endereço
+        return ('cpf', cpf) if cpf else ('nome', nome, endereco)
+
+    def _contar(self, nome, quantidade):
+        self.totais[nome] = self.totais.get(nome, 0) + quantidade
+
+    def garantir_cidades(self, cidades):
+        """cidades: {nome: uf}; insere as que ainda não existem"""
+        novas = [{'nome': nome, 'uf': uf} for nome, uf in cidades.items() if nome not in self.cidades]
+        if novas:
+            self._contar('cidades', inserir_em_lotes(Cidade, novas, self.lote))
+            self.cidades = {nome: id for id, nome in db.session.execute(select(Cidade.id, Cidade.nome))}
+
+    def garantir_tecnicos(self, nomes):
+        novos = [{'nome': nome, 'ativo': True} for nome in nomes if nome not in self.tecnicos]
+        if novos:
+            self._contar('tecnicos', inserir_em_lotes(Tecnico, novos, self.lote))
+            self.tecnicos = {nome: id for id, nome in db.session.execute(select(Tecnico.id, Tecnico.nome))}
+
+    def garantir_clientes(self, clientes):
+        """clientes: lista de dicionários com os campos de Cliente e 'celular'"""
+        novos = {}
+        for cliente in clientes:
+            chave = self._chave_cliente(cliente['nome_completo'], cliente['cpf'], cliente['endereco'])
+            if chave not in self.clientes and chave not in novos:
+                novos[chave] = cliente
+        if not novos:
+            return
+
+        celulares = {chave: cliente.pop('celular', None) for chave, cliente in novos.items()}
+        self._contar('clientes', inserir_em_lotes(Cliente, list(novos.values()), self.lote))
+        self.clientes = {
+            self._chave_cliente(nome, cpf, endereco): id
+            for id, nome, cpf, endereco in db.session.execute(
+                select(Cliente.id, Cliente.nome_completo, Cliente.cpf, Cliente.endereco))
+        }
+
+        contatos = [
+            {'entidade_tipo': 'cliente', 'entidade_id': self.clientes[chave],
+             'tipo': 'celular', 'valor': celular, 'principal': True}
+            for chave, celular in celulares.items() if celular
+        ]
+        self._contar('contatos', inserir_em_lotes(Contato, contatos, self.lote))
 
-def seed_data():
+    def inserir_ordens(self, ordens):
+        """Insere as ordens cujo número ainda não existe"""
+        novas = []
+        for ordem in ordens:
+            if ordem['numero_os'] in self.numeros_os:
+                continue
+            self.numeros_os.add(ordem['numero_os'])
+            novas.append(ordem)
+        self._contar('ordens', inserir_em_lotes(OrdemServico, novas, self.lote))
+
+    def carregar_planilha(self, registros):
+        """Carrega as linhas do dados_os.json (formato de converter_dados)"""
+        def texto(valor):
+            return str(valor).strip() if valor not in (None, '') else ''
+
+        linhas = []
+        for item in registros:
+            numero_os = texto(item.get('os'))
+            data = texto(item.get('data'))
+            if not numero_os or not data:
+                continue
+            linhas.append(item)
+
+        self.garantir_cidades({
+            texto(item.get('cidade')) or 'Desconhecida': texto(item.get('uf'))[:2]
+            for item in linhas
+        })
+        self.garantir_tecnicos({
+            nome for item in linhas
+            for nome in (texto(item.get('tecnico_campo')) or 'Desconhecido', texto(item.get('tecnico_app')))
+            if nome
+        })
+
+        clientes = []
+        for item in linhas:
+            cidade = texto(item.get('cidade')) or 'Desconhecida'
+            clientes.append({
+                'nome_completo': texto(item.get('nome_cliente')) or 'Cliente sem nome',
+                'cpf': texto(item.get('cpf')) or None,
+                'endereco': texto(item.get('endereco')),
+                'bairro': texto(item.get('bairro')),
+                'cidade_id': self.cidades[cidade],
+                'uf': texto(item.get('uf'))[:2],
+                'cep': texto(item.get('cep')) or None,
+                'ponto_referencia': texto(item.get('referencia')) or None,
+                'celular': texto(item.get('celular') or item.get('telefone')) or None
+            })
+        self.garantir_clientes(clientes)
+
+        ordens = []
+        for item, cliente in zip(linhas, clientes):
+            data_criacao = datetime.fromisoformat(texto(item['data']))
+            status = texto(item.get('status'))
+            tecnico_app = texto(item.get('tecnico_app'))
+            ordens.append({
+                'numero_os': texto(item['os']),
+                'status': status,
+                'data_criacao': data_criacao,
+                'data_vencimento': data_criacao + PRAZO_VENCIMENTO,
+                'data_instalacao': data_criacao if status == 'INSTALADA' else None,
+                'cliente_id': self.clientes[self._chave_cliente(
+                    cliente['nome_completo'], cliente['cpf'], cliente['endereco'])],
+                'tecnico_campo_id': self.tecnicos[texto(item.get('tecnico_campo')) or 'Desconhecido'],
+                'tecnico_app_id': self.tecnicos[tecnico_app] if tecnico_app else None,
+                'cidade_id': cliente['cidade_id'],
+                'fez_na_rua': texto(item.get('fez_rua')).upper() == 'SIM',
+                'baixou_no_app': texto(item.get('baixou_app')).upper() == 'SIM'
+            })
+        self.inserir_ordens(ordens)
+
+    def gerar_sinteticas(self, quantidade, dias=365, semente=None, referencia=None):
+        """Gera ordens sintéticas distribuídas nos últimos dias, para testes de carga.
+
+        Com a mesma semente e a mesma data de referência (padrão: agora) os
+        dados gerados são idênticos.
+        """
+        aleatorio = random.Random(semente)
+
+        self.garantir_cidades({f'Cidade Sintética {i:02d}': 'SP' for i in range(1, 21)})
+        self.garantir_tecnicos([f'Técnico Sintético {i:03d}' for i in range(1, 51)])
+        cidades = [self.cidades[f'Cidade Sintética {i:02d}'] for i in range(1, 21)]
+        tecnicos = [self.tecnicos[f'Técnico Sintético {i:03d}'] for i in range(1, 51)]
+
+        total_clientes = max(1, quantidade // 5)
+        clientes = [{
+            'nome_completo': f'Cliente Sintético {i:07d}',
+            'cpf': f'SINT{i:07d}',
+            'endereco': f'Rua Sintética, {i}',
+            'bairro': 'Centro',
+            'cidade_id': cidades[i % len(cidades)],
+            'uf': 'SP',
+            'cep': None,
+            'ponto_referencia': None,
+            'celular': f'(11) 9{i:08d}'
+        } for i in range(total_clientes)]
+        self.garantir_clientes([dict(cliente) for cliente in clientes])
+        ids_clientes = [self.clientes[('cpf', cliente['cpf'])] for cliente in clientes]
+
+        # Numeração continua após as ordens sintéticas já existentes
+        inicio = sum(1 for numero in self.numeros_os if numero.startswith('SINT-'))
+        agora = (referencia or datetime.now()).replace(microsecond=0)
+        ordens = []
+        for i in range(inicio, inicio + quantidade):
+            data_criacao = agora - timedelta(seconds=aleatorio.randrange(dias * 86400))
+            status = aleatorio.choice(STATUS_SINTETICOS)
+            indice_cliente = aleatorio.randrange(total_clientes)
+            ordens.append({
+                'numero_os': f'SINT-{i:08d}',
+                'status': status,
+                'data_criacao': data_criacao,
+                'data_vencimento': data_criacao + PRAZO_VENCIMENTO,
+                'data_instalacao': data_criacao + timedelta(days=aleatorio.randint(0, 6))
+                if status == 'INSTALADA' else None,
+                'cliente_id': ids_clientes[indice_cliente],
+                'tecnico_campo_id': aleatorio.choice(tecnicos),
+                'tecnico_app_id': aleatorio.choice(tecnicos) if aleatorio.random() < 0.5 else None,
+                'cidade_id': clientes[indice_cliente]['cidade_id'],
+                'fez_na_rua': aleatorio.random() < 0.3,
+                'baixou_no_app': aleatorio.random() < 0.7
+            })
+            # Limita a memória usada com N muito grande
+            if len(ordens) >= self.lote * 10:
+                self.inserir_ordens(ordens)
+                ordens = []
+        self.inserir_ordens(ordens)
+
+
+def seed_data(dados=DADOS_PADRAO, lote=LOTE_PADRAO, sinteticas=0, semente=None):
     app = create_app()
     with app.app_context():
         db.create_all()
+        inicio = time.perf_counter()
 
-        # Caminho base para os arquivos JSON
-        base_path = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'src', 'assets')
-
-        # Seed Cidades
-        cidades_path = os.path.join(base_path, 'dados_cidades.json')
-        if os.path.exists(cidades_path):
-            with open(cidades_path) as f:
-                data = json.load(f)
-                for item in data:
-                    cidade = Cidade(nome=item.get('cidade', ''), estado=item.get('estado', ''))
-                    db.session.add(cidade)
-            db.session.commit()
-            print("Cidades populadas com sucesso!")
-
-        # Seed Tecnicos
-        tecnicos_path = os.path.join(base_path, 'dados_tecnicos_count.json')
-        if os.path.exists(tecnicos_path):
-            with open(tecnicos_path) as f:
-                data = json.load(f)
-                for item in data:
-                    tecnico = Tecnico(nome=item.get('tecnico', ''), especialidade='Geral')
-                    db.session.add(tecnico)
-            db.session.commit()
-            print("Técnicos populados com sucesso!")
-
-        # Seed Clientes (exemplo)
-        cliente_exemplo = Cliente(nome='Cliente Exemplo', endereco='Rua Exemplo, 123', telefone='(11) 99999-9999')
-        db.session.add(cliente_exemplo)
-        db.session.commit()
-        print("Clientes populados com sucesso!")
-
-        # Seed Ordens de Serviço
-        ordens_path = os.path.join(base_path, 'dados_os.json')
-        if os.path.exists(ordens_path):
-            with open(ordens_path) as f:
-                data = json.load(f)
-                for item in data:
-                    # Encontrar cidade e técnico existentes ou criar novos se necessário
-                    cidade = Cidade.query.filter_by(nome=item.get('cidade', '')).first()
-                    if not cidade:
-                        cidade = Cidade(nome=item.get('cidade', ''), estado='Desconhecido')
-                        db.session.add(cidade)
-                        db.session.commit()
-
-                    tecnico = Tecnico.query.filter_by(nome=item.get('tecnico', '')).first()
-                    if not tecnico:
-                        tecnico = Tecnico(nome=item.get('tecnico', ''), especialidade='Geral')
-                        db.session.add(tecnico)
-                        db.session.commit()
-
-                    # Cliente associado à OS
-                    cliente = Cliente.query.first()
-
-                    ordem_servico = OrdemServico(
-                        data_abertura=item.get('data_abertura', ''),
-                        status=item.get('status', ''),
-                        descricao=item.get('descricao', ''),
-                        cliente_id=cliente.id if cliente else None,
-                        tecnico_id=tecnico.id if tecnico else None,
-                        cidade_id=cidade.id if cidade else None
-                    )
-                    db.session.add(ordem_servico)
+        try:
+            carregador = Carregador(lote=lote)
+
+            # Ordens da planilha (cidades, técnicos e clientes vêm das linhas)
+            ordens_path = os.path.join(dados, 'dados_os.json')
+            if os.path.exists(ordens_path):
+                with open(ordens_path, encoding='utf-8') as f:
+                    carregador.carregar_planilha(json.load(f))
+
+            if sinteticas:
+                carregador.gerar_sinteticas(sinteticas, semente=semente)
+
+            # Inserções em massa não passam pelos eventos do ORM
+            reconstruir()
+            reconstruir_contadores()
+            if indice_disponivel():
+                reconstruir_busca()
             db.session.commit()
-            print("Ordens de Serviço populadas com sucesso!")
+        except Exception:
+            db.session.rollback()
+            raise
+        obter_cache().invalidar()
 
-if __name__ == '__main__':
-    seed_data()
+        for nome, total in carregador.totais.items():
+            print(f'{nome.capitalize()} inseridos: {total}')
+        print(f'Carga concluída em {time.perf_counter() - inicio:.2f}s')
 
 
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Popula o banco de dados')
+    parser.add_argument('--dados', default=DADOS_PADRAO,
+                        help='Diretório com o dados_os.json (padrão: frontend/src/assets)')
+    parser.add_argument('--lote', type=int, default=LOTE_PADRAO,
+                        help='Linhas por comando INSERT (padrão: %(default)s)')
+    parser.add_argument('--sinteticas', type=int, default=0,
+                        help='Quantidade de ordens sintéticas geradas para testes de carga')
+    parser.add_argument('--semente', type=int, help='Semente dos dados sintéticos')
+    args = parser.parse_args()
+    seed_data(args.dados, args.lote, args.sinteticas, args.semente)
@@ -0,0 +1,84 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app, db as _db
+
+
+@pytest.fixture
+def app():
+    """Aplicação de testes com banco SQLite em memória e o esquema dos modelos"""
+    app = create_app('testing')
+    with app.app_context():
+        _db.create_all()
+        yield app
+        _db.session.remove()
+        _db.drop_all()
+
+
+@pytest.fixture
+def db(app):
+    return _db
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def criar_ordens(db):
+    """Cria `quantidade` ordens pendentes (cada uma com um cliente e o contato
+    principal dele) para um técnico e uma cidade; retorna as ordens"""
+    from datetime import datetime, timedelta
+    from app.models import Cidade, Cliente, OrdemServico, Tecnico
+    from app.services.contato import Contato
+
+    cidade = Cidade(nome='Cidade Teste', uf='SP')
+    tecnico = Tecnico(nome='Técnico Teste')
+    db.session.add_all([cidade, tecnico])
+    db.session.flush()
+    cidade_id, tecnico_id = cidade.id, tecnico.id
+    contador = iter(range(1, 1_000_000))
+
+    def criar(quantidade, status='PENDENTE', data_criacao=None):
+        ordens = []
+        for _ in range(quantidade):
+            n = next(contador)
+            cliente = Cliente(nome_completo=f'Cliente {n}', endereco='Rua A', bairro='Centro',
+                              cidade_id=cidade_id, uf='SP')
+            db.session.add(cliente)
+            db.session.flush()
+            db.session.add(Contato(entidade_tipo='cliente', entidade_id=cliente.id,
+                                   tipo='celular', valor=f'(11) 9{n:08d}', principal=True))
+            criacao = data_criacao or datetime(2024, 1, 1) + timedelta(hours=n)
+            ordens.append(OrdemServico(
+                numero_os=f'OS-{n:06d}', status=status, data_criacao=criacao,
+                data_vencimento=criacao + timedelta(days=7), cliente_id=cliente.id,
+                tecnico_campo_id=tecnico_id, cidade_id=cidade_id))
+        db.session.add_all(ordens)
+        db.session.commit()
+        return ordens
+
+    criar.cidade_id = cidade_id
+    criar.tecnico_id = tecnico_id
+    return criar
+
+
+@pytest.fixture
+def contar_comandos(db):
+    """Context manager que junta os comandos SQL enviados ao banco"""
+    @contextmanager
+    def contar():
+        comandos = []
+
+        def registrar(conn, cursor, statement, parameters, context, executemany):
+            comandos.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', registrar)
+        try:
+            yield comandos
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', registrar)
+    return contar
@@ -0,0 +1,51 @@
+from sqlalchemy import insert
+
+from app.models import Cidade, Cliente
+from app.services.busca_clientes import indice_disponivel, reconstruir
+
+
+def _clientes(db, nomes):
+    cidade = Cidade(nome='Cidade', uf='SP')
+    db.session.add(cidade)
+    db.session.flush()
+    db.session.execute(insert(Cliente.__table__), [
+        {'nome_completo': nome, 'endereco': 'Rua A', 'bairro': 'Centro', 'cidade_id': cidade.id, 'uf': 'SP'}
+        for nome in nomes
+    ])
+    reconstruir()
+    db.session.commit()
+
+
+def _buscar(cliente, termo, **params):
+    consulta = '&'.join(f'{k}={v}' for k, v in params.items())
+    return [c['nome_completo'] for c in cliente.get(f'/api/clientes/busca?termo={termo}&{consulta}').get_json()]
+
+
+def test_melhor_resultado_vem_primeiro_com_muitos_candidatos(db, cliente):
+    # Mais de 2000 ocorrências do termo; as melhores foram inseridas por último
+    _clientes(db, [f'ANA SILVA {i:05d}' for i in range(3000)] + ['SILVANA PEREIRA', 'SILVA JUNIOR'])
+
+    assert _buscar(cliente, 'silva', limite=2) == ['SILVA JUNIOR', 'SILVANA PEREIRA']
+
+
+def test_paginas_alem_dos_primeiros_candidatos(db, cliente):
+    _clientes(db, [f'JOSE SOUZA {i:05d}' for i in range(2500)])
+
+    vistos = []
+    for pagina in range(1, 4):
+        vistos += _buscar(cliente, 'souza', limite=1000, pagina=pagina)
+    assert len(vistos) == len(set(vistos)) == 2500
+    assert _buscar(cliente, 'souza', limite=1000, pagina=4) == []
+
+
+def test_indice_disponivel_consultado_uma_vez(db, contar_comandos):
+    _clientes(db, ['MARIA DA SILVA'])
+    assert indice_disponivel()
+    with contar_comandos() as comandos:
+        assert indice_disponivel()
+        # O flush de um cliente reindexa a linha dele
+        db.session.add(Cliente(nome_completo='JOAO SOUZA', endereco='Rua B', bairro='Centro',
+                               cidade_id=1, uf='SP'))
+        db.session.flush()
+    assert any('INSERT INTO busca_clientes' in comando for comando in comandos)
+    assert not any('sqlite_master' in comando for comando in comandos)
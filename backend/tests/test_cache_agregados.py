@@ -0,0 +1,26 @@
+from app.models import Cidade
+from app.services.cache_agregados import obter_cache
+
+
+def test_rollback_nao_deixa_invalidacao_pendente(db):
+    cache = obter_cache()
+
+    db.session.add(Cidade(nome='Descartada', uf='SP'))
+    db.session.flush()
+    db.session.rollback()
+    invalidacoes = cache.invalidacoes
+
+    # Commit sem alterações que afetam as agregações: o cache fica
+    cache.guardar('chave', b'{}')
+    db.session.commit()
+    assert cache.invalidacoes == invalidacoes
+    assert cache.obter('chave') == b'{}'
+
+
+def test_commit_invalida_o_cache(db):
+    cache = obter_cache()
+    db.session.add(Cidade(nome='Nova', uf='SP'))
+    db.session.flush()
+    cache.guardar('chave', b'{}')
+    db.session.commit()
+    assert cache.obter('chave') is None
@@ -0,0 +1,46 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.services.consultas_lentas import mascarar, mascarar_parametros, normalizar_sql
+
+
+@pytest.mark.parametrize('valor', [
+    'PENDENTE', 'INSTALADA', 'SP', 'RJ', '2024-01-31', '2024-01-31 08:15:00',
+    '2024-01-31T08:15:00.123456', None, True, 42, 3.5,
+])
+def test_mantem_valores_que_nao_identificam_ninguem(valor):
+    assert mascarar(valor) == valor
+
+
+@pytest.mark.parametrize('valor', [
+    'MARIA DA SILVA', 'JOAO', 'maria', 'XX', 'RUA A 10', '123.456.789-00',
+    '(11) 98765-4321', '2024-01-31 maria', '',
+])
+def test_mascara_textos_livres(valor):
+    assert mascarar(valor) == f'<texto:{len(valor)}>'
+
+
+def test_mascara_outros_tipos():
+    assert mascarar(datetime(2024, 1, 31, 8, 15)) == '2024-01-31T08:15:00'
+    assert mascarar(date(2024, 1, 31)) == '2024-01-31'
+    assert mascarar(b'\x00\x01') == '<bytes:2>'
+    assert mascarar(object()) == '<object>'
+
+
+def test_mascara_parametros():
+    assert mascarar_parametros(('MARIA', 'PENDENTE', 7)) == ['<texto:5>', 'PENDENTE', 7]
+    assert mascarar_parametros({'nome': 'ANA', 'uf': 'SP'}) == {'nome': '<texto:3>', 'uf': 'SP'}
+    lote = mascarar_parametros([('A',), ('B',), ('C',), ('D',)], executemany=True)
+    assert lote == {'conjuntos': 4, 'primeiros': [['<texto:1>']] * 3}
+
+
+def test_normalizar_sql():
+    sql = """SELECT *  FROM clientes
+             WHERE nome = 'O''Brien' AND id IN (?, ?,?) AND t1.valor > -2.5 LIMIT 10"""
+    assert normalizar_sql(sql) == (
+        'SELECT * FROM clientes WHERE nome = ? AND id IN (?, ...) AND t1.valor > ? LIMIT ?')
+
+
+def test_normalizar_sql_agrupa_listas_de_tamanhos_diferentes():
+    assert normalizar_sql('SELECT 1 WHERE id IN (?, ?)') == normalizar_sql('SELECT 1 WHERE id IN (?,?,?,?)')
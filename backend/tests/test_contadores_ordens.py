@@ -0,0 +1,31 @@
+import pytest
+
+from app.models import OrdemServico
+from app.services import contadores_ordens
+from app.services.contadores_ordens import contagens, divergencias
+
+
+@pytest.fixture(params=['upsert', 'portavel'])
+def modo_escrita(request, monkeypatch):
+    """Roda o teste com o ON CONFLICT e com o UPDATE + INSERT dos bancos
+    sem upsert"""
+    if request.param == 'portavel':
+        monkeypatch.setattr(contadores_ordens, 'UPSERT_NATIVO', ())
+    return request.param
+
+
+def test_contadores_acompanham_as_ordens(db, criar_ordens, modo_escrita):
+    criar_ordens(3)
+    db.session.get(OrdemServico, 1).status = 'INSTALADA'
+    db.session.delete(db.session.get(OrdemServico, 2))
+    db.session.commit()
+
+    assert contagens('status') == {'PENDENTE': (1, 0), 'INSTALADA': (1, 1)}
+    assert contagens('cidade_id') == {criar_ordens.cidade_id: (2, 1)}
+    assert divergencias() == []
+
+    db.session.delete(db.session.get(OrdemServico, 1))
+    db.session.delete(db.session.get(OrdemServico, 3))
+    db.session.commit()
+    assert contagens('status') == {}
+    assert divergencias() == []
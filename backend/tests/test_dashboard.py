@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+
+
+def test_resumo_conta_os_dias_com_ordens(cliente, criar_ordens):
+    # 30 ordens de hora em hora a partir de 01/01: dias 1 e 2
+    criar_ordens(30)
+    criar_ordens(2, status='INSTALADA', data_criacao=datetime(2024, 1, 10, 9))
+
+    resumo = cliente.get('/api/dashboard/resumo').get_json()
+    assert resumo['total'] == 32
+    assert resumo['datas'] == [
+        {'data': '2024-01-01', 'total': 23, 'instaladas': 0},
+        {'data': '2024-01-02', 'total': 7, 'instaladas': 0},
+        {'data': '2024-01-10', 'total': 2, 'instaladas': 2},
+    ]
+    assert resumo['dias'] == 3
+    assert {item['status']: item['total'] for item in resumo['status']} == {
+        'PENDENTE': 30, 'INSTALADA': 2}
+
+    inicio = datetime(2024, 1, 2)
+    periodo = cliente.get('/api/dashboard/resumo', query_string={
+        'data_inicio': inicio.isoformat(),
+        'data_fim': (inicio + timedelta(days=30)).isoformat(),
+    }).get_json()
+    assert [item['data'] for item in periodo['datas']] == ['2024-01-02', '2024-01-10']
+    assert periodo['dias'] == 2
+    assert periodo['total'] == 9
+
+
+def test_resumo_sem_ordens(cliente):
+    resumo = cliente.get('/api/dashboard/resumo').get_json()
+    assert resumo['datas'] == []
+    assert resumo['dias'] == 0
+    assert resumo['total'] == 0
@@ -0,0 +1,31 @@
+import time
+
+from app.models import OrdemServico
+
+
+def test_listagem_responde_304_ate_mudar(db, cliente, criar_ordens):
+    criar_ordens(3)
+    primeira = cliente.get('/api/ordens/')
+    etag = primeira.headers['ETag']
+    assert primeira.status_code == 200
+
+    repetida = cliente.get('/api/ordens/', headers={'If-None-Match': etag})
+    assert repetida.status_code == 304
+    assert repetida.data == b''
+
+    # Outros filtros são outra versão
+    assert cliente.get('/api/ordens/?status=PENDENTE', headers={'If-None-Match': etag}).status_code == 200
+
+    time.sleep(0.01)
+    ordem = db.session.get(OrdemServico, 1)
+    ordem.observacoes = 'alterada'
+    db.session.commit()
+    depois = cliente.get('/api/ordens/', headers={'If-None-Match': etag})
+    assert depois.status_code == 200
+    assert depois.headers['ETag'] != etag
+
+
+def test_detalhe_responde_304(cliente, criar_ordens):
+    criar_ordens(1)
+    etag = cliente.get('/api/ordens/1').headers['ETag']
+    assert cliente.get('/api/ordens/1', headers={'If-None-Match': etag}).status_code == 304
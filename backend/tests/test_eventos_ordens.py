@@ -0,0 +1,193 @@
+import json
+import os
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.models import EventoOrdem, OrdemServico
+from app.services import eventos_ordens
+from app.services.eventos_ordens import (
+    ATUALIZADA, CRIADA, EXCLUIDA, Evento, Filtros, gerar_stream
+)
+
+
+@pytest.fixture
+def canal(app):
+    """Canal do processo sem a thread de distribuição: os testes chamam
+    distribuir_novos() quando querem entregar os eventos"""
+    canal = app.extensions['eventos_ordens']
+    canal._pid = os.getpid()
+    app.config['EVENTOS_ORDENS_HEARTBEAT'] = 0.01
+    return canal
+
+
+def eventos(db):
+    return [(tipo, json.loads(dados)) for tipo, dados in db.session.execute(
+        select(EventoOrdem.tipo, EventoOrdem.dados).order_by(EventoOrdem.id))]
+
+
+def blocos(corpo, quantidade):
+    """Próximos blocos do text/event-stream que não são keep-alive"""
+    lidos = []
+    while len(lidos) < quantidade:
+        bloco = next(corpo)
+        bloco = bloco.decode('utf-8') if isinstance(bloco, bytes) else bloco
+        if not bloco.startswith(':'):
+            lidos.append(bloco)
+    return lidos
+
+
+def evento_do_bloco(bloco):
+    campos = dict(linha.split(': ', 1) for linha in bloco.strip().split('\n'))
+    return int(campos['id']), campos['event'], json.loads(campos['data'])
+
+
+def test_eventos_gravados_no_flush(db, criar_ordens):
+    criar_ordens(1)
+    ordem = db.session.get(OrdemServico, 1)
+    ordem.status = 'INSTALADA'
+    db.session.commit()
+    ordem.observacoes = 'só observação'
+    db.session.commit()
+    db.session.delete(ordem)
+    db.session.commit()
+
+    gravados = eventos(db)
+    assert [tipo for tipo, _ in gravados] == [CRIADA, ATUALIZADA, ATUALIZADA, EXCLUIDA]
+    assert gravados[0][1]['numero_os'] == 'OS-000001'
+    assert gravados[1][1]['status'] == 'INSTALADA'
+    assert gravados[1][1]['anterior'] == {'status': 'PENDENTE'}
+    assert 'anterior' not in gravados[2][1]
+    assert gravados[3][1]['id'] == 1
+
+
+def test_rollback_nao_grava_eventos(db, criar_ordens):
+    criar_ordens(1)
+    db.session.get(OrdemServico, 1).status = 'CANCELADA'
+    db.session.flush()
+    db.session.rollback()
+    assert [tipo for tipo, _ in eventos(db)] == [CRIADA]
+
+
+@pytest.mark.parametrize('filtros, aceitos', [
+    (Filtros(), [True, True, True]),
+    (Filtros(status='INSTALADA'), [True, True, False]),
+    (Filtros(tecnico_id=7), [True, False, True]),
+    (Filtros(cidade_id=3, status='PENDENTE'), [True, False, False]),
+])
+def test_filtros(filtros, aceitos):
+    ordens = [
+        # Saiu de INSTALADA: quem filtra pelo status antigo também recebe
+        {'status': 'PENDENTE', 'tecnico_campo_id': 7, 'cidade_id': 3,
+         'anterior': {'status': 'INSTALADA'}},
+        {'status': 'INSTALADA', 'tecnico_campo_id': 8, 'cidade_id': 4},
+        {'status': 'CANCELADA', 'tecnico_campo_id': 9, 'cidade_id': 3,
+         'anterior': {'tecnico_campo_id': 7}},
+    ]
+    assert [filtros.aceita(ordem) for ordem in ordens] == aceitos
+
+
+def test_retoma_do_last_event_id(cliente, canal, criar_ordens):
+    criar_ordens(4)
+    resposta = cliente.get('/api/ordens/stream?status=PENDENTE',
+                           headers={'Last-Event-ID': '2'}, buffered=False)
+    assert resposta.mimetype == 'text/event-stream'
+    corpo = iter(resposta.response)
+    try:
+        assert blocos(corpo, 1) == ['retry: 3000\n\n']
+        assert [evento_do_bloco(b)[:2] for b in blocos(corpo, 2)] == [(3, CRIADA), (4, CRIADA)]
+    finally:
+        resposta.close()
+    assert not canal._assinaturas
+
+
+def test_pede_para_recarregar_se_eventos_foram_descartados(app, cliente, canal, criar_ordens):
+    app.config['EVENTOS_ORDENS_RETENCAO'] = 2
+    criar_ordens(5)
+    resposta = cliente.get('/api/ordens/stream', headers={'Last-Event-ID': '1'}, buffered=False)
+    corpo = iter(resposta.response)
+    try:
+        primeiro, reiniciar, *guardados = blocos(corpo, 4)
+        assert reiniciar.startswith('event: reiniciar\n')
+        assert [evento_do_bloco(b)[0] for b in guardados] == [4, 5]
+    finally:
+        resposta.close()
+
+
+def test_heartbeat_sem_eventos(app, canal):
+    with app.app_context():
+        assinatura = canal.assinar(Filtros())
+    corpo = gerar_stream(canal, assinatura, [], True, 0, heartbeat=0.01)
+    assert next(corpo) == 'retry: 3000\n\n'
+    assert next(corpo) == ': keep-alive\n\n'
+    corpo.close()
+    assert assinatura not in canal._assinaturas
+
+
+def test_distribui_eventos_novos_filtrados(db, canal, criar_ordens):
+    criar_ordens(1)
+    instaladas = canal.assinar(Filtros(status='INSTALADA'))
+    todas = canal.assinar(Filtros())
+    corpo_instaladas = gerar_stream(canal, instaladas, [], True, canal.ultimo_id(), 0.01)
+    corpo_todas = gerar_stream(canal, todas, [], True, canal.ultimo_id(), 0.01)
+
+    criar_ordens(1)
+    db.session.get(OrdemServico, 1).status = 'INSTALADA'
+    db.session.commit()
+    assert canal.distribuir_novos() == 2
+
+    assert [evento_do_bloco(b)[:2] for b in blocos(corpo_todas, 3)[1:]] == [
+        (2, CRIADA), (3, ATUALIZADA)]
+    assert [evento_do_bloco(b)[:2] for b in blocos(corpo_instaladas, 2)[1:]] == [(3, ATUALIZADA)]
+    corpo_todas.close()
+    corpo_instaladas.close()
+
+
+def _gravar_evento(db, id):
+    dados = json.dumps({'id': id, 'status': 'PENDENTE'})
+    db.session.execute(insert(EventoOrdem.__table__).values(
+        id=id, tipo=CRIADA, ordem_id=id, dados=dados))
+    db.session.commit()
+
+
+def test_evento_confirmado_depois_de_um_id_maior_e_entregue(db, canal, monkeypatch):
+    # Simula o PostgreSQL: o id 2 é reservado antes do 3, mas confirmado depois
+    _gravar_evento(db, 1)
+    assinatura = canal.assinar(Filtros())
+    corpo = gerar_stream(canal, assinatura, [], True, canal.ultimo_id(), 0.01)
+    _gravar_evento(db, 3)
+    canal.distribuir_novos()
+    assert canal._lacunas.keys() == {2}
+    assert [evento_do_bloco(b)[0] for b in blocos(corpo, 2)[1:]] == [3]
+
+    _gravar_evento(db, 2)
+    canal.distribuir_novos()
+    assert [evento_do_bloco(b)[0] for b in blocos(corpo, 1)] == [2]
+    assert not canal._lacunas
+
+    # Um id que nunca aparece (transação desfeita) deixa de ser procurado
+    _gravar_evento(db, 5)
+    canal.distribuir_novos()
+    assert canal._lacunas.keys() == {4}
+    monkeypatch.setattr(eventos_ordens, 'ESPERA_LACUNA', -1)
+    canal.distribuir_novos()
+    assert not canal._lacunas
+    corpo.close()
+
+
+def test_evento_tardio_nao_repete_os_pendentes(canal):
+    assinatura = canal.assinar(Filtros())
+    pendente = Evento(2, CRIADA, '{"id": 2}')
+    corpo = gerar_stream(canal, assinatura, [pendente], True, 1, 0.01)
+    assert evento_do_bloco(blocos(corpo, 2)[1])[0] == 2
+    assinatura.entregar(Evento(2, CRIADA, '{"id": 2}', tardio=True))
+    assinatura.entregar(Evento(3, CRIADA, '{"id": 3}'))
+    assert evento_do_bloco(blocos(corpo, 1)[0])[0] == 3
+    corpo.close()
+
+
+def test_stream_desligado_no_gunicorn_da_api(app, cliente):
+    app.config['EVENTOS_ORDENS_STREAM'] = False
+    resposta = cliente.get('/api/ordens/stream')
+    assert resposta.status_code == 404
+    assert 'gunicorn_stream.conf.py' in resposta.get_json()['erro']
@@ -0,0 +1,37 @@
+from app.models import OrdemServico
+
+
+def _ordem(criar_ordens, numero, **extras):
+    return dict({
+        'numero_os': numero, 'status': 'PENDENTE',
+        'data_criacao': '2024-01-01T10:00:00', 'data_vencimento': '2024-01-08T10:00:00',
+        'cliente_id': 1, 'tecnico_campo_id': criar_ordens.tecnico_id, 'cidade_id': criar_ordens.cidade_id,
+    }, **extras)
+
+
+def test_booleanos_so_aceitam_true_ou_false(cliente, criar_ordens):
+    criar_ordens(1)
+    resposta = cliente.post('/api/ordens/bulk', json=[
+        _ordem(criar_ordens, 'L-1', fez_na_rua=True, baixou_no_app=False),
+        _ordem(criar_ordens, 'L-2'),
+        _ordem(criar_ordens, 'L-3', fez_na_rua='false'),
+        _ordem(criar_ordens, 'L-4', baixou_no_app=0),
+        _ordem(criar_ordens, 'L-5', fez_na_rua=None),
+    ])
+    assert resposta.status_code == 207
+    dados = resposta.get_json()
+    assert dados['criadas'] == 2
+    assert [r['status'] for r in dados['resultados']] == ['criada', 'criada', 'erro', 'erro', 'erro']
+    assert 'fez_na_rua' in ' '.join(dados['resultados'][2]['erros'])
+
+    criadas = {o.numero_os: o for o in OrdemServico.query.filter(OrdemServico.numero_os.like('L-%'))}
+    assert criadas['L-1'].fez_na_rua is True and criadas['L-1'].baixou_no_app is False
+    assert criadas['L-2'].fez_na_rua is False
+
+
+def test_atualizar_status_rejeita_booleano_em_texto(cliente, criar_ordens):
+    criar_ordens(1)
+    resposta = cliente.patch('/api/ordens/status',
+                             json={'ids': [1], 'status': 'INSTALADA', 'baixou_no_app': 'false'})
+    assert resposta.status_code == 400
+    assert OrdemServico.query.get(1).status == 'PENDENTE'
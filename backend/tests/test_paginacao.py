@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.paginacao import CursorInvalido, codificar_cursor, decodificar_cursor
+
+
+def test_cursor_ida_e_volta():
+    chave = (datetime(2024, 3, 1, 12, 30, 15, 123456), 42)
+    cursor = codificar_cursor(*chave)
+    assert decodificar_cursor(cursor) == chave
+    # Opaco e seguro para URL: base64url sem preenchimento
+    assert '=' not in cursor and '/' not in cursor and '+' not in cursor
+
+
+@pytest.mark.parametrize('cursor', ['', 'nao-e-base64!', codificar_cursor(datetime(2024, 1, 1), 1)[:-3],
+                                    'WyJ4IiwxXQ'])  # ["x",1]
+def test_cursor_invalido(cursor):
+    with pytest.raises(CursorInvalido):
+        decodificar_cursor(cursor)
+
+
+def test_paginas_cobrem_todas_as_ordens_sem_repetir(cliente, criar_ordens):
+    # Mesma data_criacao em todas: o desempate é pelo id
+    criar_ordens(25, data_criacao=datetime(2024, 5, 1))
+    criar_ordens(12)
+
+    ids, cursor, paginas = [], None, 0
+    while True:
+        url = '/api/ordens/?limite=10' + (f'&cursor={cursor}' if cursor else '')
+        dados = cliente.get(url).get_json()
+        ids += [item['id'] for item in dados['itens']]
+        paginas += 1
+        cursor = dados['next_cursor']
+        if cursor is None:
+            break
+
+    assert paginas == 4
+    assert len(ids) == len(set(ids)) == 37
+
+
+def test_cursor_invalido_na_rota(cliente):
+    resposta = cliente.get('/api/ordens/?cursor=invalido')
+    assert resposta.status_code == 400
+    assert 'erro' in resposta.get_json()
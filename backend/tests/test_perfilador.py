@@ -0,0 +1,46 @@
+import pytest
+
+from app.services import perfilador as modulo
+from app.services.perfilador import CABECALHO
+
+
+@pytest.fixture
+def perfilador(app, tmp_path):
+    perfilador = app.extensions['perfilador']
+    perfilador.diretorio = str(tmp_path)
+    perfilador.amostragem = 1  # toda requisição é amostrada
+    return perfilador
+
+
+def test_perfila_uma_requisicao_por_vez(cliente, perfilador):
+    # Outra requisição do processo já está sendo perfilada
+    assert modulo._perfil_ativo.acquire(blocking=False)
+    try:
+        resposta = cliente.get('/api/ordens/')
+        assert resposta.status_code == 200
+        assert CABECALHO not in resposta.headers
+    finally:
+        modulo._perfil_ativo.release()
+
+    resposta = cliente.get('/api/ordens/')
+    assert resposta.headers[CABECALHO]
+    assert [p['endpoint'] for p in perfilador.listar()] == ['ordens.listar_ordens']
+    assert not modulo._perfil_ativo.locked()
+
+
+def test_libera_o_perfil_quando_a_requisicao_falha(app, cliente, perfilador):
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+
+    @app.route('/falha')
+    def falha():
+        raise RuntimeError('falha')
+
+    assert cliente.get('/falha').status_code == 500
+    assert not modulo._perfil_ativo.locked()
+
+
+def test_stream_de_eventos_nunca_e_perfilado(app, perfilador):
+    with app.test_request_context('/api/ordens/stream'):
+        assert perfilador.motivo() is None
+    with app.test_request_context('/api/ordens/'):
+        assert perfilador.motivo() == 'amostragem'
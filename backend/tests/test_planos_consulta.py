@@ -0,0 +1,15 @@
+from app.services.planos_consulta import varredura_completa, verificar_planos
+
+
+def test_varredura_completa_so_sem_indice():
+    assert varredura_completa('SCAN ordens_servico')
+    assert varredura_completa('SCAN clientes')
+    assert not varredura_completa('SCAN ordens_servico USING INDEX ix_ordens_servico_data_criacao_id')
+    assert not varredura_completa('SEARCH clientes USING INTEGER PRIMARY KEY (rowid=?)')
+    assert not varredura_completa('SCAN cidades')
+
+
+def test_rotas_verificadas_usam_indices(app, db):
+    problemas = verificar_planos(app, db)
+    assert not problemas, '\n'.join(
+        f'{url}: {" ".join(sql.split())} -> {plano}' for url, sql, plano in problemas)
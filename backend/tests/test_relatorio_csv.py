@@ -0,0 +1,104 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from app.models import Cidade, Cliente, OrdemServico, Tecnico
+from app.routes import relatorios
+
+# Saída do relatorio_admin_csv anterior (pandas + send_file) para os dados
+# de criar_dados, gravada em tests/dados/relatorio_admin_<tipo>.csv
+DADOS = os.path.join(os.path.dirname(__file__), 'dados')
+TIPOS = ('os', 'tecnicos', 'cidades')
+
+
+def criar_dados(db):
+    """Ordens com campos que exigem aspas no CSV (';', aspas e quebras de
+    linha), acentos e ordens sem data de instalação"""
+    cidades = [
+        Cidade(nome='São Paulo', uf='SP', regiao='Sudeste'),
+        Cidade(nome='Campinas; Região "Metropolitana"', uf='SP', regiao=None),
+    ]
+    tecnicos = [
+        Tecnico(nome='Ana "Aninha" Souza', identificacao_campo='C;01', identificacao_app=None),
+        Tecnico(nome='Bruno Lima', identificacao_campo='C02', identificacao_app='APP-2'),
+        Tecnico(nome='Carla Dias', identificacao_campo=None, identificacao_app='APP-3'),
+    ]
+    db.session.add_all(cidades + tecnicos)
+    db.session.flush()
+
+    clientes = [
+        Cliente(nome_completo='José da Silva', endereco='Rua A, 10', bairro='Centro',
+                cidade_id=cidades[0].id, uf='SP'),
+        Cliente(nome_completo='Maria; "Mari" Souza', endereco='Av. B, 20\nFundos',
+                bairro='Jardim; Norte', cidade_id=cidades[1].id, uf='SP'),
+        Cliente(nome_completo='Pedro Álvares', endereco='Travessa "C"\r\nCasa 2',
+                bairro='Vila Nova', cidade_id=cidades[0].id, uf='SP'),
+    ]
+    db.session.add_all(clientes)
+    db.session.flush()
+
+    ordens = [
+        # (cliente, técnico, cidade, status, criação, instalação)
+        (0, 0, 0, 'INSTALADA', datetime(2024, 1, 5, 9, 30), datetime(2024, 1, 8, 14)),
+        (1, 0, 1, 'PENDENTE', datetime(2024, 1, 6, 23, 59), None),
+        (2, 0, 0, 'PENDENTE', datetime(2024, 2, 1), None),
+        (0, 1, 0, 'INSTALADA', datetime(2024, 2, 10, 8), datetime(2024, 2, 11)),
+        (1, 1, 1, 'INSTALADA', datetime(2024, 3, 1, 12), datetime(2024, 3, 2, 12)),
+        (2, 1, 0, 'CANCELADA', datetime(2024, 3, 15), None),
+        (0, 2, 1, 'AGENDADA', datetime(2024, 12, 31, 23), None),
+    ]
+    for n, (cliente, tecnico, cidade, status, criacao, instalacao) in enumerate(ordens, 1):
+        db.session.add(OrdemServico(
+            numero_os=f'OS;{n:03d}' if n == 2 else f'OS-{n:03d}', status=status,
+            data_criacao=criacao, data_instalacao=instalacao,
+            data_vencimento=datetime(criacao.year, criacao.month, 28),
+            cliente_id=clientes[cliente].id, tecnico_campo_id=tecnicos[tecnico].id,
+            cidade_id=cidades[cidade].id))
+    db.session.commit()
+
+
+def _esperado(tipo):
+    with open(os.path.join(DADOS, f'relatorio_admin_{tipo}.csv'), 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('tipo', TIPOS)
+def test_csv_identico_ao_anterior(db, cliente, tipo):
+    criar_dados(db)
+    resposta = cliente.get(f'/api/relatorios/admin/csv?tipo={tipo}')
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'text/csv'
+    assert resposta.data == _esperado(tipo)
+
+
+@pytest.mark.parametrize('tipo', TIPOS)
+def test_csv_em_pedacos_de_uma_linha(db, cliente, monkeypatch, tipo):
+    criar_dados(db)
+    monkeypatch.setattr(relatorios, 'LOTE_CSV', 1)
+    resposta = cliente.get(f'/api/relatorios/admin/csv?tipo={tipo}', buffered=False)
+    pedacos = list(resposta.response)
+    resposta.close()
+
+    esperado = _esperado(tipo)
+    assert b''.join(pedacos) == esperado
+    # Cabeçalho (com o BOM) e depois um pedaço por linha
+    assert pedacos[0].startswith(b'\xef\xbb\xbf')
+    assert len(pedacos) == 1 + {'os': 7, 'tecnicos': 3, 'cidades': 2}[tipo]
+
+
+def test_gerar_csv_le_as_linhas_sob_demanda(monkeypatch):
+    monkeypatch.setattr(relatorios, 'LOTE_CSV', 10)
+    lidas = []
+
+    def linhas():
+        for i in range(1000):
+            lidas.append(i)
+            yield (i, f'linha {i}')
+
+    gerador = relatorios._gerar_csv(['n', 'texto'], linhas(), list)
+    assert next(gerador) == b'\xef\xbb\xbfn;texto\n'
+    assert next(gerador).count(b'\n') == 10
+    # Só o primeiro lote foi lido do banco
+    assert len(lidas) == 10
+    assert sum(pedaco.count(b'\n') for pedaco in gerador) == 990
@@ -0,0 +1,27 @@
+from werkzeug.datastructures import MultiDict
+
+from app.routes.relatorios import _montar_html_tecnicos
+
+
+def _comandos_do_relatorio(db, contar_comandos, args):
+    # Sessão limpa: técnico e cidade do título não vêm do identity map
+    db.session.remove()
+    with contar_comandos() as comandos:
+        html, _nome = _montar_html_tecnicos(args)
+    return len(comandos), html
+
+
+def test_relatorio_tecnicos_usa_numero_fixo_de_comandos(db, criar_ordens, contar_comandos):
+    args = MultiDict({'tecnico_id': criar_ordens.tecnico_id, 'cidade_id': criar_ordens.cidade_id})
+
+    criar_ordens(10)
+    poucas, html = _comandos_do_relatorio(db, contar_comandos, args)
+    assert html.count('<td>OS-') == 10
+
+    criar_ordens(490)
+    muitas, html = _comandos_do_relatorio(db, contar_comandos, args)
+    assert html.count('<td>OS-') == 500
+
+    # Consulta das ordens com JOINs + técnico e cidade do título
+    assert poucas == muitas
+    assert muitas <= 3
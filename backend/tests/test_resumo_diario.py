@@ -0,0 +1,72 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.models import OrdemServico
+from app.services.resumo_diario import _intervalos, agregar
+
+
+def test_intervalos_sem_limites():
+    assert _intervalos(None, None) == (True, None, None, [])
+
+
+def test_intervalos_dias_completos():
+    usar_resumo, primeiro, final, bordas = _intervalos(datetime(2024, 1, 1), datetime(2024, 1, 10))
+    assert usar_resumo and primeiro == date(2024, 1, 1) and final == date(2024, 1, 10)
+    # data_fim é inclusiva: o instante da meia-noite do último dia vem da tabela
+    assert bordas == [(datetime(2024, 1, 10), datetime(2024, 1, 10))]
+
+
+def test_intervalos_bordas_parciais():
+    inicio, fim = datetime(2024, 1, 1, 10, 30), datetime(2024, 1, 10, 12)
+    usar_resumo, primeiro, final, bordas = _intervalos(inicio, fim)
+    assert usar_resumo and primeiro == date(2024, 1, 2) and final == date(2024, 1, 10)
+    assert bordas == [
+        (inicio, datetime(2024, 1, 1, 23, 59, 59, 999999)),
+        (datetime(2024, 1, 10), fim),
+    ]
+
+
+def test_intervalos_mesmo_dia_vai_direto_as_ordens():
+    inicio, fim = datetime(2024, 1, 5, 8), datetime(2024, 1, 5, 18)
+    assert _intervalos(inicio, fim) == (False, None, None, [(inicio, fim)])
+
+
+@pytest.fixture
+def ordens_em_varios_dias(db, criar_ordens):
+    """Ordens de 6 em 6 horas por 10 dias, uma a cada três instalada"""
+    ordens = []
+    for i in range(40):
+        criacao = datetime(2024, 1, 1) + timedelta(hours=6 * i)
+        ordens += criar_ordens(1, status='INSTALADA' if i % 3 == 0 else 'PENDENTE',
+                               data_criacao=criacao)
+    return [(o.data_criacao, o.status) for o in ordens]
+
+
+@pytest.mark.parametrize('inicio, fim', [
+    (None, None),
+    (datetime(2024, 1, 3), None),
+    (None, datetime(2024, 1, 6, 12)),
+    (datetime(2024, 1, 2), datetime(2024, 1, 8)),
+    (datetime(2024, 1, 2, 5), datetime(2024, 1, 8, 7)),
+    (datetime(2024, 1, 4, 1), datetime(2024, 1, 4, 20)),
+])
+def test_agregar_igual_a_contagem_direta(ordens_em_varios_dias, inicio, fim):
+    esperado = {}
+    for criacao, status in ordens_em_varios_dias:
+        if (inicio is None or criacao >= inicio) and (fim is None or criacao <= fim):
+            total, instaladas = esperado.get(status, (0, 0))
+            esperado[status] = (total + 1, instaladas + (status == 'INSTALADA'))
+
+    assert agregar(['status'], inicio, fim) == esperado
+
+
+def test_resumo_acompanha_alteracoes(db, ordens_em_varios_dias):
+    ordem = OrdemServico.query.filter_by(status='PENDENTE').first()
+    ordem.status = 'INSTALADA'
+    ordem.data_criacao = datetime(2024, 2, 1, 9)
+    db.session.commit()
+
+    fevereiro = agregar(['status'], datetime(2024, 2, 1), datetime(2024, 2, 28))
+    assert fevereiro == {'INSTALADA': (1, 1)}
+    assert sum(total for total, _ in agregar(['status']).values()) == 40
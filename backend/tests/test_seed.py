@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.models import OrdemServico
+from seed import Carregador
+
+REFERENCIA = datetime(2024, 12, 31, 18)
+
+COLUNAS = (OrdemServico.numero_os, OrdemServico.status, OrdemServico.data_criacao,
+           OrdemServico.data_instalacao, OrdemServico.cliente_id, OrdemServico.tecnico_campo_id,
+           OrdemServico.tecnico_app_id, OrdemServico.cidade_id, OrdemServico.fez_na_rua)
+
+
+def _gerar(db, quantidade, semente):
+    Carregador(lote=100).gerar_sinteticas(quantidade, semente=semente, referencia=REFERENCIA)
+    db.session.commit()
+    return db.session.execute(select(*COLUNAS).order_by(OrdemServico.numero_os)).all()
+
+
+def _recriar(db):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+
+
+def test_mesma_semente_gera_os_mesmos_dados(db):
+    primeira = _gerar(db, 500, semente=7)
+    _recriar(db)
+    segunda = _gerar(db, 500, semente=7)
+    assert len(primeira) == 500
+    assert primeira == segunda
+
+    _recriar(db)
+    assert _gerar(db, 500, semente=8) != primeira
+
+
+def test_geracao_continua_a_numeracao(db):
+    _gerar(db, 50, semente=1)
+    ordens = _gerar(db, 30, semente=1)
+    assert len(ordens) == 80
+    assert ordens[-1].numero_os == 'SINT-00000079'
@@ -0,0 +1,17 @@
+from app.models import Cliente, OrdemServico, Tecnico
+from app.services.serializacao import serializador
+
+
+def test_serializador_igual_ao_to_dict(db, criar_ordens):
+    criar_ordens(5)
+    for modelo in (OrdemServico, Cliente, Tecnico):
+        serializar = serializador(modelo)
+        linhas = serializar.selecionar(modelo.query.order_by(modelo.id)).all()
+        assert serializar.serializar(linhas) == [
+            registro.to_dict() for registro in modelo.query.order_by(modelo.id)]
+
+
+def test_rota_devolve_o_mesmo_json(cliente, criar_ordens):
+    criar_ordens(3)
+    assert cliente.get('/api/ordens/').get_json() == [
+        ordem.to_dict() for ordem in OrdemServico.query.order_by(OrdemServico.id)]
@@ -0,0 +1,127 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import literal, select
+
+from app.services.serie_temporal import completar_periodos, inicio_do_periodo, lttb
+
+
+def _inicio_sqlite(db, dia, intervalo):
+    expressao = inicio_do_periodo(literal(dia.isoformat()), intervalo, 'sqlite')
+    return date.fromisoformat(db.session.execute(select(expressao)).scalar_one())
+
+
+@pytest.mark.parametrize('dia, intervalo, esperado', [
+    (date(2024, 1, 7), 'semana', date(2024, 1, 1)),     # domingo
+    (date(2024, 1, 1), 'semana', date(2024, 1, 1)),     # segunda
+    (date(2024, 1, 3), 'semana', date(2024, 1, 1)),
+    (date(2023, 1, 1), 'semana', date(2022, 12, 26)),   # domingo, semana do ano anterior
+    (date(2024, 2, 29), 'mes', date(2024, 2, 1)),
+    (date(2024, 5, 15), 'trimestre', date(2024, 4, 1)),  # meio do trimestre
+    (date(2024, 3, 31), 'trimestre', date(2024, 1, 1)),
+    (date(2024, 12, 31), 'trimestre', date(2024, 10, 1)),
+    (date(2024, 7, 1), 'trimestre', date(2024, 7, 1)),
+])
+def test_inicio_do_periodo_sqlite(db, dia, intervalo, esperado):
+    assert _inicio_sqlite(db, dia, intervalo) == esperado
+
+
+def test_inicio_do_periodo_sqlite_em_um_ano_inteiro(db):
+    dia = date(2024, 1, 1)
+    while dia.year == 2024:
+        assert _inicio_sqlite(db, dia, 'semana') == dia - timedelta(days=dia.weekday())
+        assert _inicio_sqlite(db, dia, 'trimestre') == date(2024, (dia.month - 1) // 3 * 3 + 1, 1)
+        dia += timedelta(days=1)
+
+
+def test_completar_periodos_preenche_com_zero():
+    pontos = [
+        {'data': date(2024, 1, 1), 'total': 5, 'instaladas': 1},
+        {'data': date(2024, 4, 1), 'total': 2, 'instaladas': 2},
+    ]
+    completos = completar_periodos(pontos, 'mes')
+    assert [p['data'] for p in completos] == [date(2024, m, 1) for m in (1, 2, 3, 4)]
+    assert [p['total'] for p in completos] == [5, 0, 0, 2]
+    assert completos[1] == {'data': date(2024, 2, 1), 'total': 0, 'instaladas': 0}
+
+    semanas = completar_periodos([{'data': date(2024, 1, 1), 'total': 1, 'instaladas': 0},
+                                  {'data': date(2024, 1, 22), 'total': 1, 'instaladas': 0}],
+                                 'semana')
+    assert [p['total'] for p in semanas] == [1, 0, 0, 1]
+    assert completar_periodos([], 'dia') == []
+
+
+def _serie(tamanho):
+    inicio = date(2020, 1, 1)
+    return [{'data': inicio + timedelta(days=i), 'total': (i * 37) % 101, 'instaladas': 0}
+            for i in range(tamanho)]
+
+
+@pytest.mark.parametrize('tamanho, limite', [(1000, 100), (1000, 3), (101, 100), (5000, 499)])
+def test_lttb_reduz_ao_limite(tamanho, limite):
+    pontos = _serie(tamanho)
+    reduzidos = lttb(pontos, limite)
+    assert len(reduzidos) == limite
+    assert reduzidos[0] is pontos[0] and reduzidos[-1] is pontos[-1]
+    datas = [p['data'] for p in reduzidos]
+    assert datas == sorted(set(datas))
+
+
+def test_lttb_mantem_series_curtas():
+    pontos = _serie(50)
+    assert lttb(pontos, 50) == pontos
+    assert lttb(pontos, 500) == pontos
+    assert lttb(pontos, 2) == pontos  # abaixo do mínimo não reduz
+
+
+def _criar_em(criar_ordens, dias, status='PENDENTE'):
+    for dia in dias:
+        criar_ordens(1, status=status, data_criacao=datetime.combine(dia, datetime.min.time()))
+
+
+def test_serie_mensal_completa_os_meses_vazios(cliente, criar_ordens):
+    _criar_em(criar_ordens, [date(2024, 1, 5), date(2024, 1, 20), date(2024, 4, 2)])
+    resposta = cliente.get('/api/ordens/serie?intervalo=mes')
+    assert resposta.status_code == 200
+    serie, = resposta.get_json()['series']
+    assert serie['periodos'] == 4
+    assert serie['total'] == 3
+    assert [(p['data'], p['total']) for p in serie['pontos']] == [
+        ('2024-01-01', 2), ('2024-02-01', 0), ('2024-03-01', 0), ('2024-04-01', 1)]
+
+
+def test_serie_reduzida_a_max_pontos(cliente, criar_ordens):
+    _criar_em(criar_ordens, [date(2024, 1, 1) + timedelta(days=i) for i in range(20)])
+    serie, = cliente.get('/api/ordens/serie?max_pontos=5').get_json()['series']
+    assert serie['periodos'] == 20
+    assert len(serie['pontos']) == 5
+    assert serie['pontos'][0]['data'] == '2024-01-01'
+    assert serie['pontos'][-1]['data'] == '2024-01-20'
+
+
+@pytest.mark.parametrize('agrupar', ['status', 'tecnico', 'cidade'])
+def test_serie_agrupada(cliente, criar_ordens, agrupar):
+    _criar_em(criar_ordens, [date(2024, 1, 1), date(2024, 1, 2)])
+    _criar_em(criar_ordens, [date(2024, 1, 2)], status='INSTALADA')
+    series = cliente.get(f'/api/ordens/serie?agrupar={agrupar}').get_json()['series']
+
+    if agrupar == 'status':
+        assert [(s['chave'], s['nome'], s['total']) for s in series] == [
+            ('PENDENTE', 'PENDENTE', 2), ('INSTALADA', 'INSTALADA', 1)]
+        assert [p['total'] for p in series[1]['pontos']] == [1]
+    else:
+        esperado = ((criar_ordens.tecnico_id, 'Técnico Teste') if agrupar == 'tecnico'
+                    else (criar_ordens.cidade_id, 'Cidade Teste'))
+        serie, = series
+        assert (serie['chave'], serie['nome']) == esperado
+        assert [(p['data'], p['total'], p['instaladas']) for p in serie['pontos']] == [
+            ('2024-01-01', 1, 0), ('2024-01-02', 2, 1)]
+
+
+@pytest.mark.parametrize('consulta', [
+    'max_pontos=2', 'max_pontos=5001', 'intervalo=ano', 'agrupar=cliente', 'data_inicio=ontem',
+])
+def test_serie_parametros_invalidos(cliente, consulta):
+    resposta = cliente.get(f'/api/ordens/serie?{consulta}')
+    assert resposta.status_code == 400
+    assert 'erro' in resposta.get_json()
@@ -0,0 +1,121 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import OrdemServico
+from app.services.sincronizacao import (
+    TokenInvalido, codificar_token, decodificar_token
+)
+
+
+@pytest.fixture(autouse=True)
+def sem_margem(app):
+    # Alterações recém-gravadas já entram na sincronização
+    app.config['SYNC_MARGEM'] = 0
+
+
+def sincronizar(cliente, token=None, limite=None):
+    parametros = {}
+    if token:
+        parametros['since'] = token
+    if limite:
+        parametros['limite'] = limite
+    resposta = cliente.get('/api/sync', query_string=parametros)
+    assert resposta.status_code == 200, resposta.get_json()
+    return resposta.get_json()
+
+
+def sincronizar_tudo(cliente, token=None, limite=None):
+    """Repete enquanto houver mais; retorna as páginas"""
+    paginas = [sincronizar(cliente, token, limite)]
+    while paginas[-1]['mais']:
+        paginas.append(sincronizar(cliente, paginas[-1]['token'], limite))
+    return paginas
+
+
+def test_token_ida_e_volta():
+    posicoes = {
+        'ordens': (datetime(2024, 1, 1, 8, 30, 0, 123456), 42),
+        'clientes': (datetime(2024, 1, 2), None),
+        'tecnicos': (datetime(2024, 1, 3), 7),
+        'exclusoes': (datetime(2024, 1, 4), None),
+    }
+    assert decodificar_token(codificar_token(posicoes)) == posicoes
+
+
+@pytest.mark.parametrize('token', ['', 'abc', 'e30', codificar_token({})])
+def test_token_invalido(token):
+    with pytest.raises(TokenInvalido):
+        decodificar_token(token)
+
+
+def test_token_invalido_responde_400(cliente):
+    resposta = cliente.get('/api/sync?since=abc')
+    assert resposta.status_code == 400
+    assert 'erro' in resposta.get_json()
+
+
+def test_carga_completa_paginada(cliente, criar_ordens):
+    criar_ordens(5)
+    paginas = sincronizar_tudo(cliente, limite=2)
+
+    assert len(paginas) == 3
+    ids = [ordem['id'] for pagina in paginas for ordem in pagina['ordens']]
+    assert ids == [1, 2, 3, 4, 5]
+    assert sum(len(pagina['clientes']) for pagina in paginas) == 5
+    assert sum(len(pagina['tecnicos']) for pagina in paginas) == 1
+
+    # Nada mudou: a próxima sincronização vem vazia
+    vazia = sincronizar(cliente, paginas[-1]['token'])
+    assert not vazia['mais']
+    assert vazia['ordens'] == vazia['clientes'] == vazia['tecnicos'] == []
+    assert vazia['excluidos'] == {'ordens': [], 'clientes': [], 'tecnicos': []}
+
+
+def test_alteracoes_e_exclusoes_desde_o_token(db, cliente, criar_ordens):
+    criar_ordens(4)
+    token = sincronizar_tudo(cliente)[-1]['token']
+    time.sleep(0.01)
+
+    db.session.get(OrdemServico, 1).observacoes = 'alterada'
+    db.session.delete(db.session.get(OrdemServico, 2))
+    db.session.commit()
+
+    delta = sincronizar(cliente, token)
+    assert [ordem['id'] for ordem in delta['ordens']] == [1]
+    assert delta['ordens'][0]['observacoes'] == 'alterada'
+    assert delta['excluidos']['ordens'] == [2]
+    assert delta['clientes'] == []
+
+    # O mesmo delta não é entregue duas vezes
+    seguinte = sincronizar(cliente, delta['token'])
+    assert seguinte['ordens'] == [] and seguinte['excluidos']['ordens'] == []
+
+
+def test_id_excluido_e_recriado_vem_como_linha(db, cliente, criar_ordens):
+    criar_ordens(3)
+    token = sincronizar_tudo(cliente)[-1]['token']
+    time.sleep(0.01)
+
+    db.session.delete(db.session.get(OrdemServico, 3))
+    db.session.commit()
+    recriada, = criar_ordens(1)
+    assert recriada.id == 3  # o SQLite reaproveita o maior id
+
+    delta = sincronizar(cliente, token)
+    assert [ordem['id'] for ordem in delta['ordens']] == [3]
+    assert delta['excluidos']['ordens'] == []
+
+
+def test_token_mais_antigo_que_as_exclusoes_responde_410(app, cliente):
+    antigo = datetime.utcnow() - timedelta(days=app.config['SYNC_EXCLUSOES_DIAS'] + 1)
+    token = codificar_token(dict.fromkeys(('ordens', 'clientes', 'tecnicos', 'exclusoes'),
+                                          (antigo, None)))
+    resposta = cliente.get('/api/sync', query_string={'since': token})
+    assert resposta.status_code == 410
+    assert 'erro' in resposta.get_json()
+
+    # Sem retenção configurada, nenhum token expira
+    app.config['SYNC_EXCLUSOES_DIAS'] = 0
+    assert cliente.get('/api/sync', query_string={'since': token}).status_code == 200
@@ -1,43 +1,88 @@
 import React, { useState, useEffect } from 'react';
+import axios from 'axios';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer, LineChart, Line, PieChart, Pie, Cell } from 'recharts';
 
-// Importação dos dados
-import dadosCidades from '../assets/dados_cidades.json';
-import dadosTecnicos from '../assets/dados_tecnicos_count.json';
-import dadosDatas from '../assets/dados_datas.json';
-
 const COLORS = ['#0088FE', '#00C49F', '#FFBB28', '#FF8042', '#8884d8', '#82ca9d'];
 
+// Pontos desenhados no gráfico de evolução (o servidor reduz a série)
+const MAX_PONTOS_SERIE = 200;
+
+// Espera após um evento de /api/ordens/stream antes de recarregar o resumo
+const ATRASO_RECARGA_MS = 2000;
+
+// Feed de alterações: em produção roda num servidor próprio (workers gevent),
+// separado da API
+const URL_EVENTOS = import.meta.env.VITE_EVENTOS_URL || 'http://localhost:5000/api/ordens/stream';
+
 const Dashboard: React.FC = () => {
   const [totalOS, setTotalOS] = useState<number>(0);
   const [dadosCidadesFormatados, setDadosCidadesFormatados] = useState<any[]>([]);
   const [dadosTecnicosFormatados, setDadosTecnicosFormatados] = useState<any[]>([]);
-  const [dadosDatasFormatados, setDadosDatasFormatados] = useState<any[]>([]);
+  const [totalDias, setTotalDias] = useState<number>(0);
+  const [dadosSerie, setDadosSerie] = useState<any[]>([]);
+
+  const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
-    // Processar dados das cidades
-    const cidadesValidas = dadosCidades.filter(item => item.cidade && item.cidade !== '');
-    setDadosCidadesFormatados(cidadesValidas);
+    const fetchResumo = async () => {
+      try {
+        // Cidades, técnicos, status e o número de dias vêm agregados pela API;
+        // o gráfico de evolução usa a série já reduzida no servidor
+        const [response, serieRes] = await Promise.all([
+          axios.get('http://localhost:5000/api/dashboard/resumo'),
+          axios.get('http://localhost:5000/api/ordens/serie', {
+            params: { intervalo: 'dia', max_pontos: MAX_PONTOS_SERIE }
+          })
+        ]);
+        
+        setDadosCidadesFormatados(response.data.cidades);
+        setDadosTecnicosFormatados(response.data.tecnicos);
+        setTotalDias(response.data.dias);
+        setTotalOS(response.data.total);
+        setDadosSerie(serieRes.data.series[0]?.pontos ?? []);
+      } catch (err) {
+        console.error('Erro ao buscar resumo do dashboard:', err);
+        setError('Erro ao carregar dados. Tente novamente mais tarde.');
+      }
+    };
     
-    // Calcular total de OS
-    const total = cidadesValidas.reduce((acc, item) => acc + item.total, 0);
-    setTotalOS(total);
+    fetchResumo();
     
-    // Processar dados dos técnicos
-    const tecnicosValidos = dadosTecnicos.filter(item => item.tecnico && item.tecnico !== '');
-    setDadosTecnicosFormatados(tecnicosValidos);
+    // Recarrega quando ordens são criadas, alteradas ou excluídas (com um
+    // pequeno atraso para agrupar alterações em sequência)
+    const eventos = new EventSource(URL_EVENTOS);
+    let espera: ReturnType<typeof setTimeout> | undefined;
+    const recarregar = () => {
+      clearTimeout(espera);
+      espera = setTimeout(fetchResumo, ATRASO_RECARGA_MS);
+    };
+    ['ordem_criada', 'ordem_atualizada', 'ordem_excluida', 'reiniciar'].forEach(tipo =>
+      eventos.addEventListener(tipo, recarregar)
+    );
     
-    // Processar dados das datas
-    const datasValidas = dadosDatas
-      .filter(item => item.data && item.data !== '')
-      .sort((a, b) => new Date(a.data).getTime() - new Date(b.data).getTime());
-    setDadosDatasFormatados(datasValidas);
+    return () => {
+      clearTimeout(espera);
+      eventos.close();
+    };
   }, []);
 
   return (
     <div className="space-y-6">
       <h1 className="text-2xl font-bold text-gray-800">Dashboard de Ordens de Serviço</h1>
       
+      {error && (
+        <div className="bg-red-50 p-4 rounded-md">
+          <div className="flex">
+            <div className="ml-3">
+              <h3 className="text-sm font-medium text-red-800">Erro</h3>
+              <div className="mt-2 text-sm text-red-700">
+                <p>{error}</p>
+              </div>
+            </div>
+          </div>
+        </div>
+      )}
+      
       {/* Cards de resumo */}
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-4">
         <div className="bg-white p-6 rounded-lg shadow-md">
@@ -55,8 +100,8 @@ const Dashboard: React.FC = () => {
         <div className="bg-white p-6 rounded-lg shadow-md">
           <h2 className="text-sm font-medium text-gray-500">Média Diária</h2>
           <p className="text-3xl font-bold text-gray-800">
-            {dadosDatasFormatados.length > 0 
-              ? (totalOS / dadosDatasFormatados.length).toFixed(1) 
+            {totalDias > 0 
+              ? (totalOS / totalDias).toFixed(1) 
               : '0'}
           </p>
         </div>
@@ -138,7 +183,7 @@ const Dashboard: React.FC = () => {
           <div className="h-80">
             <ResponsiveContainer width="100%" height="100%">
               <LineChart
-                data={dadosDatasFormatados}
+                data={dadosSerie}
                 margin={{ top: 5, right: 30, left: 20, bottom: 70 }}
               >
                 <CartesianGrid strokeDasharray="3 3" />